@@ -37,6 +37,8 @@ Migrate(app, db)
  # Init the db
 db.init_app(app)
 
+# Password hashing workers import this module again: keep everything that
+# should only run once (seeding, the server) below this guard.
 if __name__ == '__main__':
 
     with app.app_context():
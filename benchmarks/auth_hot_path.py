@@ -0,0 +1,318 @@
+"""
+Authentication hot-path benchmarks.
+
+Drives the app in-process through the Flask test client against a seeded
+database and reports, per endpoint, p50/p95/p99 latency, throughput and SQL
+statements per request. For routes behind ``auth_required`` it also reports
+the median time spent verifying the token, from the ``X-Auth-Verify-Ms``
+header that AUTH_PROFILE adds:
+
+- login       POST /api/v1/auth/login        (Login.post)
+- protected   GET  /protected
+- user_data   GET  /api/v1/admin/user        (UserData.get)
+- logout      GET  /api/v1/auth/logout       (Logout.get, one fresh token per call)
+- register    POST /api/v1/user/dao          (UserApi.post)
+
+Results can be saved as a baseline and later runs compared against it, so a
+change to the callbacks in src/__init__.py shows up as a diff in latency or
+in queries per request. Every endpoint is measured in several rounds and the
+median of the rounds is reported, and a p95 only counts as a regression when
+it grew by more than --threshold and by more than --min-delta-ms, so noise
+on sub-millisecond endpoints does not fail a comparison.
+
+    python benchmarks/auth_hot_path.py                      # print results
+    python benchmarks/auth_hot_path.py --save               # write the baseline
+    python benchmarks/auth_hot_path.py --compare            # diff against it
+    python benchmarks/auth_hot_path.py --database postgresql://...  # any SQLAlchemy URL
+
+By default a throw-away SQLite file is used. The target database is dropped
+and recreated, so never point --database at real data.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings("ignore")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "auth_hot_path.json")
+PASSWORD = "Bench#Pass123"
+
+
+def build_app(database_url):
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["AUTH_PROFILE"] = "true"
+    # Required by create_app but never called by the measured routes
+    os.environ.setdefault("OPEN_AI_API_KEY", "benchmark")
+    from src import create_app
+    from src.utils import db, limiter
+
+    app = create_app()
+    db.init_app(app)
+    app.config["TESTING"] = True
+    # The rate limits would reject most of the iterations.
+    limiter.enabled = False
+    return app
+
+
+def seed(app, users):
+    from src.utils import db
+    from src.models import User
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        template = User()
+        template.set_password(PASSWORD)
+        for i in range(users):
+            db.session.add(User(
+                email=f"user{i}@bench.test",
+                username=f"user{i}@bench.test",
+                firstname="Bench",
+                lastname=f"User{i}",
+                phone_number=f"9{i:08d}",
+                password_hash=template.password_hash,
+                confirmed=True,
+                type_of_user="admin" if i == 0 else "normal",
+            ))
+        db.session.commit()
+
+
+class QueryCounter:
+    """Counts SQL statements sent to the engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def access_token(app, email):
+    from flask_jwt_extended import create_access_token
+    from src.models import User
+
+    with app.app_context():
+        return create_access_token(identity=User.query.filter_by(email=email).one())
+
+
+def scenarios(app, iterations, round_=0):
+    """Yield (name, list of (method, path, kwargs)) with one request per iteration."""
+    admin = "user0@bench.test"
+    token = access_token(app, admin)
+    bearer = {"Authorization": f"Bearer {token}"}
+
+    yield "login", [
+        ("post", "/api/v1/auth/login", {"json": {"username": admin, "password": PASSWORD}})
+    ] * iterations
+    yield "protected", [("get", "/protected", {"headers": bearer})] * iterations
+    yield "user_data", [("get", "/api/v1/admin/user", {"headers": bearer})] * iterations
+    yield "logout", [
+        ("get", "/api/v1/auth/logout", {"headers": {"Authorization": f"Bearer {access_token(app, admin)}"}})
+        for _ in range(iterations)
+    ]
+    stamp = int(time.time())
+    yield "register", [
+        ("post", "/api/v1/user/dao", {"json": {
+            "firstName": "New",
+            "lastName": "User",
+            "authEmail": f"new{stamp}r{round_}x{i}@bench.test",
+            "authPassword": PASSWORD,
+            "countryName": "Portugal",
+            "countryTelCode": "351",
+            "phoneNumber": f"8{round_ % 10}{stamp % 1000:03d}{i:05d}",
+            "postalCode": "1000",
+            "userAddress": "Rua 1",
+            "registeringAs": "normal",
+        }})
+        for i in range(iterations)
+    ]
+
+
+def run(app, name, requests, warmup):
+    from src.utils import db
+
+    client = app.test_client(use_cookies=False)
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    # Warm up on the first request's shape; requests that must be unique
+    # (logout, register) are not replayed.
+    if name not in ("logout", "register"):
+        method, path, kwargs = requests[0]
+        for _ in range(warmup):
+            getattr(client, method)(path, **kwargs)
+
+    latencies, verify_ms, errors = [], [], 0
+    counter.count = 0
+    started = time.perf_counter()
+    for method, path, kwargs in requests:
+        t0 = time.perf_counter()
+        response = getattr(client, method)(path, **kwargs)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+        if "X-Auth-Verify-Ms" in response.headers:
+            verify_ms.append(float(response.headers["X-Auth-Verify-Ms"]))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(quantiles[49], 3),
+        "p95_ms": round(quantiles[94], 3),
+        "p99_ms": round(quantiles[98], 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "queries_per_request": round(counter.count / len(latencies), 2),
+        "verify_ms": round(statistics.median(verify_ms), 3) if verify_ms else None,
+    }
+
+
+def combine(rounds):
+    """Median of every metric over the rounds of one endpoint."""
+    combined = {
+        key: round(statistics.median(row[key] for row in rounds), 3)
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_per_request")
+    }
+    verify_ms = [row["verify_ms"] for row in rounds if row.get("verify_ms") is not None]
+    combined["verify_ms"] = round(statistics.median(verify_ms), 3) if verify_ms else None
+    combined["requests"] = sum(row["requests"] for row in rounds)
+    combined["errors"] = sum(row["errors"] for row in rounds)
+    return combined
+
+
+def print_results(results, baseline=None):
+    header = (f"{'endpoint':10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'sql/req':>8} "
+              f"{'errors':>7} {'verify ms':>10}")
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        verify_ms = f"{row['verify_ms']:10.3f}" if row.get("verify_ms") is not None else f"{'-':>10}"
+        print(
+            f"{name:10} {row['p50_ms']:9.3f} {row['p95_ms']:9.3f} {row['p99_ms']:9.3f} "
+            f"{row['throughput_rps']:9.1f} {row['queries_per_request']:8.2f} {row['errors']:7d} {verify_ms}"
+        )
+        old = (baseline or {}).get(name)
+        if old:
+            print(
+                f"{'  vs base':10} {_delta(row['p50_ms'], old['p50_ms']):>9} {_delta(row['p95_ms'], old['p95_ms']):>9} "
+                f"{_delta(row['p99_ms'], old['p99_ms']):>9} {_delta(row['throughput_rps'], old['throughput_rps']):>9} "
+                f"{row['queries_per_request'] - old['queries_per_request']:+8.2f}"
+            )
+
+
+def _delta(new, old):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def regressions(results, baseline, threshold, min_delta_ms=1.0):
+    """
+    Endpoints that issue more queries, or whose p95 grew both by more than
+    ``threshold`` (relative) and by more than ``min_delta_ms``.
+    """
+    found = []
+    for name, row in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if row["queries_per_request"] > old["queries_per_request"]:
+            found.append(f"{name}: {old['queries_per_request']} -> {row['queries_per_request']} queries/request")
+        grown = row["p95_ms"] - old["p95_ms"]
+        if old["p95_ms"] and grown / old["p95_ms"] > threshold and grown > min_delta_ms:
+            found.append(f"{name}: p95 {old['p95_ms']} -> {row['p95_ms']} ms")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="runs per endpoint; the median is reported")
+    parser.add_argument("--users", type=int, default=100, help="users seeded before the run")
+    parser.add_argument("--database", help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--only", nargs="*", help="run only these endpoints")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="diff against --baseline, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative p95 growth when comparing")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="p95 growth below this many ms is never a regression")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    database = args.database
+    if not database:
+        tmpdir = tempfile.mkdtemp(prefix="auth-bench-")
+        database = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    try:
+        return run_suite(args, database)
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run_suite(args, database):
+    app = build_app(database)
+    seed(app, args.users)
+
+    rounds = {}
+    for round_ in range(args.rounds):
+        for name, requests in scenarios(app, args.iterations, round_):
+            if args.only and name not in args.only:
+                continue
+            rounds.setdefault(name, []).append(run(app, name, requests, args.warmup))
+    results = {name: combine(rows) for name, rows in rounds.items()}
+
+    baseline = None
+    if args.compare and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"{args.rounds} x {args.iterations} requests per endpoint, {args.users} users, {database.split(':', 1)[0]}, "
+          f"JWT_ALGORITHM={app.config['JWT_ALGORITHM']}")
+    print_results(results, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "meta": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "database": database.split(":", 1)[0],
+                    "iterations": args.iterations,
+                    "rounds": args.rounds,
+                    "jwt_algorithm": app.config["JWT_ALGORITHM"],
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                },
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.threshold, args.min_delta_ms)
+        for line in found:
+            print(f"REGRESSION {line}")
+        return 1 if found else 0
+    return 0
+
+
+# seed() hashes on the password pool, whose workers import this script again.
+if __name__ == "__main__":
+    sys.exit(main())
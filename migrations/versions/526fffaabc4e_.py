@@ -0,0 +1,26 @@
+"""add token_epoch to user
+
+Revision ID: 526fffaabc4e
+Revises: 79421ce31ecd
+Create Date: 2026-10-18 10:12:48.551904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '526fffaabc4e'
+down_revision = '79421ce31ecd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_epoch', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('token_epoch')
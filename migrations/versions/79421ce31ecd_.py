@@ -0,0 +1,187 @@
+"""merge token_blocklist2 into token_blocklist with a binary, unique jti
+
+Revision ID: 79421ce31ecd
+Revises: c15ac6d95b0c
+Create Date: 2026-10-18 09:41:37.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import uuid
+
+
+# revision identifiers, used by Alembic.
+revision = '79421ce31ecd'
+down_revision = 'c15ac6d95b0c'
+branch_labels = None
+depends_on = None
+
+
+def _jti_to_bytes(jti):
+    # Same packing as src.models.token_block_list.jti_to_bytes, copied so the
+    # migration does not depend on application code. None for non-UUID JTIs,
+    # which no token of this application carries.
+    try:
+        return uuid.UUID(jti).bytes
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+def _old_tables():
+    old_blocklist = sa.table(
+        'token_blocklist',
+        sa.column('id', sa.Integer()),
+        sa.column('jti', sa.String(36)),
+        sa.column('type', sa.String(16)),
+        sa.column('user_id', sa.Integer()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('expires_at', sa.DateTime()),
+    )
+    old_blocklist2 = sa.table(
+        'token_blocklist2',
+        sa.column('id', sa.Integer()),
+        sa.column('jti', sa.String(36)),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('expires_at', sa.DateTime()),
+    )
+    return old_blocklist, old_blocklist2
+
+
+def upgrade():
+    op.create_table('token_blocklist_compact',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.LargeBinary(length=16), nullable=False),
+    sa.Column('type', sa.String(length=16), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    bind = op.get_bind()
+    old_blocklist, old_blocklist2 = _old_tables()
+    compact = sa.table(
+        'token_blocklist_compact',
+        sa.column('id', sa.Integer()),
+        sa.column('jti', sa.LargeBinary(16)),
+        sa.column('type', sa.String(16)),
+        sa.column('user_id', sa.Integer()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('expires_at', sa.DateTime()),
+    )
+
+    # One row per jti: keep the oldest revocation (and its id), the latest
+    # expiry, and whatever type/user information either table had.
+    merged = {}
+    rows = [dict(row._mapping) for row in bind.execute(sa.select(old_blocklist).order_by(old_blocklist.c.id))]
+    rows += [
+        dict(row._mapping, id=None, type='access', user_id=None)
+        for row in bind.execute(sa.select(old_blocklist2).order_by(old_blocklist2.c.id))
+    ]
+    for row in rows:
+        key = _jti_to_bytes(row['jti'])
+        if key is None:
+            continue
+        current = merged.get(key)
+        if current is None:
+            merged[key] = dict(row, jti=key)
+            continue
+        if current['id'] is None and row['id'] is not None:
+            current.update(id=row['id'], type=row['type'], user_id=row['user_id'])
+        if row['created_at'] and (current['created_at'] is None or row['created_at'] < current['created_at']):
+            current['created_at'] = row['created_at']
+        if row['expires_at'] and (current['expires_at'] is None or row['expires_at'] > current['expires_at']):
+            current['expires_at'] = row['expires_at']
+
+    with_ids = [row for row in merged.values() if row['id'] is not None]
+    without_ids = [{k: v for k, v in row.items() if k != 'id'} for row in merged.values() if row['id'] is None]
+    if with_ids:
+        op.bulk_insert(compact, with_ids)
+        # Explicit ids do not advance a Postgres serial; move it past them so
+        # the rows below and later inserts do not reuse them.
+        if bind.dialect.name == 'postgresql':
+            op.execute(
+                "SELECT setval(pg_get_serial_sequence('token_blocklist_compact', 'id'), "
+                "(SELECT MAX(id) FROM token_blocklist_compact))"
+            )
+    if without_ids:
+        op.bulk_insert(compact, without_ids)
+
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blocklist_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_token_blocklist_jti'))
+    op.drop_table('token_blocklist')
+
+    with op.batch_alter_table('token_blocklist2', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blocklist2_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_token_blocklist2_jti'))
+    op.drop_table('token_blocklist2')
+
+    op.rename_table('token_blocklist_compact', 'token_blocklist')
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_blocklist_jti'), ['jti'], unique=True)
+        batch_op.create_index(batch_op.f('ix_token_blocklist_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    compact = sa.table(
+        'token_blocklist',
+        sa.column('id', sa.Integer()),
+        sa.column('jti', sa.LargeBinary(16)),
+        sa.column('type', sa.String(16)),
+        sa.column('user_id', sa.Integer()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('expires_at', sa.DateTime()),
+    )
+    rows = [dict(row._mapping) for row in bind.execute(sa.select(compact).order_by(compact.c.id))]
+
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blocklist_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_token_blocklist_jti'))
+    op.drop_table('token_blocklist')
+
+    op.create_table('token_blocklist2',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('token_blocklist2', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_blocklist2_jti'), ['jti'], unique=False)
+        batch_op.create_index(batch_op.f('ix_token_blocklist2_expires_at'), ['expires_at'], unique=False)
+
+    op.create_table('token_blocklist',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('type', sa.String(length=16), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_blocklist_jti'), ['jti'], unique=False)
+        batch_op.create_index(batch_op.f('ix_token_blocklist_expires_at'), ['expires_at'], unique=False)
+
+    # Rows without a user can only live in the old token_blocklist2 table.
+    old_blocklist, old_blocklist2 = _old_tables()
+    for row in rows:
+        row['jti'] = str(uuid.UUID(bytes=bytes(row['jti'])))
+    with_user = [row for row in rows if row['user_id'] is not None]
+    without_user = [
+        {'jti': row['jti'], 'created_at': row['created_at'], 'expires_at': row['expires_at']}
+        for row in rows if row['user_id'] is None
+    ]
+    if with_user:
+        op.bulk_insert(old_blocklist, with_user)
+        if bind.dialect.name == 'postgresql':
+            op.execute(
+                "SELECT setval(pg_get_serial_sequence('token_blocklist', 'id'), "
+                "(SELECT MAX(id) FROM token_blocklist))"
+            )
+    if without_user:
+        op.bulk_insert(old_blocklist2, without_user)
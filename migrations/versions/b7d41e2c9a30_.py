@@ -0,0 +1,24 @@
+"""add lower(email) index to user
+
+Revision ID: b7d41e2c9a30
+Revises: 526fffaabc4e
+Create Date: 2026-10-18 14:05:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e2c9a30'
+down_revision = '526fffaabc4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_user_email_lower', table_name='user')
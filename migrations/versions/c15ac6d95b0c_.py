@@ -0,0 +1,64 @@
+"""add expires_at to the token blocklists
+
+Revision ID: c15ac6d95b0c
+Revises: 8a552e531f70
+Create Date: 2026-10-18 09:05:12.418230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import timedelta
+
+
+# revision identifiers, used by Alembic.
+revision = 'c15ac6d95b0c'
+down_revision = '8a552e531f70'
+branch_labels = None
+depends_on = None
+
+LEGACY_TOKEN_LIFETIME = timedelta(days=30)
+
+
+def upgrade():
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_token_blocklist_expires_at'), ['expires_at'], unique=False)
+
+    with op.batch_alter_table('token_blocklist2', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_token_blocklist2_expires_at'), ['expires_at'], unique=False)
+
+    # Existing rows never recorded the token's exp. No token lives longer than
+    # a refresh token (30 days by default) and every revoked token was issued
+    # before it was revoked, so created_at + 30 days is a safe upper bound.
+    for table_name in ('token_blocklist', 'token_blocklist2'):
+        _backfill_expires_at(table_name)
+
+
+def _backfill_expires_at(table_name):
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('expires_at', sa.DateTime()),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(table.c.id, table.c.created_at).where(table.c.expires_at.is_(None))
+    ).fetchall()
+    for row_id, created_at in rows:
+        bind.execute(
+            table.update()
+            .where(table.c.id == row_id)
+            .values(expires_at=created_at + LEGACY_TOKEN_LIFETIME)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('token_blocklist2', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blocklist2_expires_at'))
+        batch_op.drop_column('expires_at')
+
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blocklist_expires_at'))
+        batch_op.drop_column('expires_at')
@@ -34,10 +34,17 @@ from flask import request, g
 from src.config import Config, DevelopmentConfig, ProductionConfig
 
 from src.utils import load_extentions, db, limiter, cors, csrf
-from src.utils import create_additional_claims
-from src.models import User, TokenBlocklist, TokenBlocklist2
+from src.utils import create_additional_claims, TokenSubject
+from src.utils import ClaimsPrincipal, wants_claims_principal
+from src.utils import revoked_token_cache, revoked_jti_filter, shared_revocation_set
+from src.utils import token_blocklist, token_epochs, blocklist_purge, user_cache
+from src.utils import token_refresher, jwt_keys
+from src.utils import CachingJWTManager, decoded_token_cache, claim_profiles
+from src.utils import password_hasher, login_throttle, auth_profiler, mail_queue, google_certs
+from src.models import User, TokenBlocklist
 from src.blueprints import (user_api_bp,
                             auth_api, auth2_api_bp,
+                            admin_api,
                             )
 
 from src.utils.handling_errors import handle_errors
@@ -105,8 +112,54 @@ def create_app():
     
 
     load_extentions(app=app)
+    revoked_token_cache.init_app(app)
+    revoked_jti_filter.init_app(app)
+    shared_revocation_set.init_app(app)
+    token_epochs.init_app(app)
+    user_cache.init_app(app)
+    token_blocklist.init_app(app)
+    blocklist_purge.init_app(app)
+    # Re-issues access tokens close to expiry (once per JTI)
+    token_refresher.init_app(app)
+    jwt_keys.init_app(app)
+    decoded_token_cache.init_app(app)
+    claim_profiles.init_app(app)
+    # Password hashing/verification on a bounded process pool
+    password_hasher.init_app(app)
+    # Failed-login backoff per account and address, checked before hashing
+    login_throttle.init_app(app)
+    # Emails sent off the request thread, with per-address resend cooldowns
+    mail_queue.init_app(app)
+    # Google ID-token certificates cached by max-age; client config read once
+    google_certs.init_app(app)
+    # Query/latency headers on auth_required routes when AUTH_PROFILE is on
+    auth_profiler.init_app(app)
     #csrf.init_app(app=app)
-    jwt_ex = JWTManager(app)
+    # JWTManager with verified tokens cached by digest (see decoded_token_cache)
+    jwt_ex = CachingJWTManager(app)
+
+    # With an asymmetric JWT_ALGORITHM tokens are signed by the key ring and
+    # carry the signing key's "kid", which selects the verification key.
+    # Flask-JWT-Extended asks for the headers first and then for the key; the
+    # key is resolved once there and handed over in g, so a rotation between
+    # the two calls cannot label a token with another key's kid.
+    if jwt_keys.enabled:
+        @jwt_ex.additional_headers_loader
+        def add_kid_header(identity):
+            g._jwt_signing_key = jwt_keys.signing_key
+            return {"kid": g._jwt_signing_key.kid}
+
+        @jwt_ex.encode_key_loader
+        def signing_key(identity):
+            key = g.pop('_jwt_signing_key', None) or jwt_keys.signing_key
+            return key.private_key
+
+        @jwt_ex.decode_key_loader
+        def verification_key(jwt_header, jwt_data):
+            key = jwt_keys.verification_key(jwt_header.get("kid"))
+            if key is None:
+                raise jwt.InvalidSignatureError("Token was signed with an unknown key")
+            return key
     app.logger.setLevel(logging.INFO)
     app.logger.setLevel(logging.DEBUG)
     app.logger.setLevel(logging.ERROR)
@@ -135,16 +188,20 @@ def create_app():
     # called when creating JWTs. The decorated method must take the identity
     # we are creating a token for and return a dictionary of additional
     # claims to add to the JWT.
+    # Callers that already hold the user pass the User (or a TokenSubject with
+    # a claims snapshot) as the identity, so the database is only queried
+    # when nothing but an id is available.
     @jwt_ex.additional_claims_loader
     def add_claims_to_access_token(identity):
 
-        claim_data = {
-            "aud": "some_audience",
-            "foo": "bar",
-            "identity": identity,
-        }
-        # get user from database
-        user = User.query.filter_by(id=identity).one_or_none()
+        claim_data = {}
+        if claim_profiles.aud:
+            claim_data["aud"] = claim_profiles.aud
+        if isinstance(identity, TokenSubject):
+            claim_data.update(identity.claims)
+            return claim_data
+
+        user = identity if isinstance(identity, User) else User.query.filter_by(id=identity).one_or_none()
 
         try:
             if user:
@@ -181,46 +238,39 @@ def create_app():
     # load handling errors
     handle_errors(app, CSRFError)
 
-    @app.after_request
-    def refresh_expiring_jwts(response):
-        try:
-            exp_timestamp = get_jwt()["exp"]
-            now = datetime.now(timezone.utc)
-            target_timestamp = datetime.timestamp(now + timedelta(minutes=15))
-            if target_timestamp > exp_timestamp:
-                access_token = create_access_token(identity=get_jwt_identity())
-                set_access_cookies(response, access_token)
-            return response
-        except (RuntimeError, KeyError):
-            # Case where there is not a valid JWT. Just return the original response
-            return response
-    
     # Register a callback function that takes whatever object is passed in as the
     # identity when creating JWTs and converts it to a JSON serializable format.
     @jwt_ex.user_identity_loader
     def user_identity_lookup(user):
+        if isinstance(user, (User, TokenSubject)):
+            return str(user.id)
         return str(user)
     
     # Register a callback function that loads a user from your database whenever
     # a protected route is accessed. This should return any python object on a
     # successful lookup, or None if the lookup failed for any reason (for example
     # if the user has been deleted from the database).
+    # Users come from a per-process snapshot cache, so a warm request does
+    # not touch the user table at all. Routes marked with @claims_only (and
+    # the admin/ceo decorators) get a ClaimsPrincipal built from the token.
     @jwt_ex.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
-        return User.query.filter_by(id=identity).one_or_none()
+        if not str(identity).isdigit():
+            return None
+        if wants_claims_principal():
+            return ClaimsPrincipal(jwt_data)
+        return user_cache.get(int(identity))
 
     # Callback function to check if a JWT exists in the database blocklist
     @jwt_ex.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload: dict) -> bool:
-        jti = jwt_payload["jti"]
-        token = db.session.query(TokenBlocklist.id).filter_by(jti=jti).scalar()
-
-        return token is not None
+        return token_blocklist.is_revoked(jwt_payload)
 
     csrf.exempt(user_api_bp)
     csrf.exempt(auth_api)
     csrf.exempt(auth2_api_bp)
+    csrf.exempt(admin_api)
     csrf.exempt(bp_author)
 
 
@@ -229,6 +279,7 @@ def create_app():
     app.register_blueprint(user_api_bp, url_prefix='/api/v1/user')
     app.register_blueprint(auth_api, url_prefix='/api/v1/auth')
     app.register_blueprint(auth2_api_bp, url_prefix='/api/v1/auth2')
+    app.register_blueprint(admin_api, url_prefix='/api/v1/admin')
  
 
     routes(app=app)
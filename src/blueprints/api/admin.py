@@ -3,10 +3,13 @@ import os
 
 sys.path.append(os.path.abspath("flask-jwt-authentication-2025"))
 
+import time
+
 from flask_restful import Api, Resource, reqparse
-from src.utils import admin_required
+from src.utils import db, admin_required, auth_required, get_role_flags, token_blocklist
+from src.models import User, canonical_jti
 
-from flask import jsonify, make_response
+from flask import current_app, jsonify, make_response, request
 from flask_jwt_extended import (
     jwt_required,
     current_user,
@@ -14,15 +17,15 @@ from flask_jwt_extended import (
 )
 
 class UserData(Resource):
-    @jwt_required()
+    @auth_required(claims_only=False)
     def get(self):
-        claims = get_jwt()
+        roles = get_role_flags(get_jwt())
         response = make_response(jsonify(
             status_code=200,
             #foo="bar",
             message="Welcome to protected route!",
-            is_administrator=claims['is_administrator'],
-            is_ceo_user=claims['is_ceo_user'],
+            is_administrator=roles['is_administrator'],
+            is_ceo_user=roles['is_ceo_user'],
             id=current_user.id,
             full_name=current_user.firstname + " " + current_user.lastname,
             email=current_user.email,
@@ -48,4 +51,72 @@ class Admin(Resource):
         return response
 
 
+class RevokeTokens(Resource):
+    """
+    Bulk revocation for admins and incident response.
+
+    Body: ``{"jtis": [...], "user_ids": [...]}``, either list may be left out.
+    A JTI is a UUID string or ``{"jti", "exp", "type", "user_id"}``; without
+    ``exp`` the row is kept as long as the longest-lived token could be.
+    ``type`` is "access" (default) or "refresh", and ``user_id`` must be an
+    existing user.
+    Every token of the listed users is revoked by bumping their token epoch.
+    """
+
+    @admin_required()
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        jtis = data.get('jtis') or []
+        user_ids = data.get('user_ids') or []
+        if not isinstance(jtis, list) or not isinstance(user_ids, list):
+            return make_response(jsonify(status_code=400, error="'jtis' and 'user_ids' must be lists."), 400)
+
+        max_batch = current_app.config.get('TOKEN_REVOCATION_MAX_BATCH', 10000)
+        if len(jtis) + len(user_ids) > max_batch:
+            return make_response(jsonify(status_code=400, error=f"At most {max_batch} JTIs and users per request."), 400)
+
+        lifetime = max(
+            current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
+            current_app.config['JWT_REFRESH_TOKEN_EXPIRES'],
+        ).total_seconds()
+        default_exp = int(time.time() + lifetime)
+        tokens = {}
+        try:
+            for item in jtis:
+                item = {'jti': item} if isinstance(item, str) else dict(item)
+                jti = canonical_jti(item['jti'])
+                token_type = item.get('type') or 'access'
+                if token_type not in ('access', 'refresh'):
+                    raise ValueError(f"Unknown token type {token_type!r}")
+                owner = item.get('user_id')
+                tokens[jti] = {
+                    'jti': jti,
+                    'exp': int(item.get('exp') or default_exp),
+                    'type': token_type,
+                    'sub': str(int(owner)) if owner is not None else None,
+                }
+            user_ids = [int(user_id) for user_id in user_ids]
+        except (KeyError, TypeError, ValueError):
+            return make_response(jsonify(status_code=400, error="Malformed 'jtis' or 'user_ids'."), 400)
+
+        owners = {int(token['sub']) for token in tokens.values() if token['sub'] is not None}
+        if owners:
+            known = {user_id for (user_id,) in db.session.query(User.id).filter(User.id.in_(owners))}
+            if owners - known:
+                return make_response(jsonify(
+                    status_code=400,
+                    error="Unknown 'user_id' in 'jtis'.",
+                    unknown_users=sorted(owners - known),
+                    ), 400)
+
+        revoked = token_blocklist.revoke_many(list(tokens.values()))
+        epochs = token_blocklist.revoke_all_for_users(user_ids) if user_ids else {}
 
+        return make_response(jsonify(
+            status_code=200,
+            message="Tokens revoked",
+            revoked=len(revoked),
+            already_revoked=len(tokens) - len(revoked),
+            token_epochs={str(user_id): epoch for user_id, epoch in epochs.items()},
+            unknown_users=sorted(set(user_ids) - set(epochs)),
+            ), 200)
@@ -8,19 +8,19 @@ sys.path.append(os.path.abspath("flask-jwt-authentication-2025"))
 from flask import jsonify, current_app
 from flask_restful import Api, Resource, reqparse
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from src.utils import limiter
+from src.utils import limiter, principal_or_remote_address
 from src.models import User
 from src.factory import (
     create_user, confirm_user_email, create_user_object, delete_user
 )
 
-from src.utils import admin_required
-from flask_jwt_extended import jwt_required,current_user
+from src.utils import auth_required
+from flask_jwt_extended import current_user
 
 class UserManagementApi(Resource):
    
-    @admin_required()
-    @limiter.limit("20 per minute")
+    @auth_required(roles="admin")
+    @limiter.limit("20 per minute", key_func=principal_or_remote_address)
     def patch(self, token):
         """
         Email confirmation endpoint
@@ -33,24 +33,24 @@ class UserManagementApi(Resource):
         """
         return f"confirmed"
     
-    @admin_required()
-    @limiter.limit("20 per minute")
+    @auth_required(roles="admin")
+    @limiter.limit("20 per minute", key_func=principal_or_remote_address)
     def put(self, user_id):
         """
         Update user details
         """
         return f"updated"
     
-    @admin_required()
-    @limiter.limit("5 per minute")
+    @auth_required(roles="admin")
+    @limiter.limit("5 per minute", key_func=principal_or_remote_address)
     def delete(self, user_id):
         """
         Delete a user by ID
         """
         return f"deleted"
     
-    @admin_required()
-    @limiter.limit("15 per minute")
+    @auth_required(roles="admin")
+    @limiter.limit("15 per minute", key_func=principal_or_remote_address)
     def get(self):
         users = User.query.all()
         serialized_users = User.serialize_all(users)
@@ -5,11 +5,13 @@ import os
 sys.path.append(os.path.abspath("flask-jwt-authentication-2025"))
 
 from flask_restful import Api, Resource, reqparse
-from src.utils import db
-from src.models import User, TokenBlocklist, TokenBlocklist2
+from src.utils import db, token_blocklist, claims_only
+from src.utils import TokenSubject, create_additional_claims, user_cache, get_role_flags
+from src.utils import login_throttle, mail_queue, introspect_token, introspection_max_age
+from src.models import User, TokenBlocklist, upgrade_password_hash
 
 from flask import (
-    Blueprint, jsonify,
+    Blueprint, jsonify, request,
     make_response, current_app
 )
 
@@ -18,11 +20,13 @@ from datetime import timedelta
 from datetime import timezone
 from flask_jwt_extended import (
     create_access_token,
+    create_refresh_token,
     jwt_required,
     current_user,
     get_jwt,
     get_jwt_identity,
     set_access_cookies,
+    set_refresh_cookies,
     unset_jwt_cookies
 )
 from sqlalchemy.sql import func
@@ -96,20 +100,29 @@ class Login(Resource):
         password = data.get('password')
         
 
-        user = User.query.filter_by(email=username).one_or_none()
+        # Locked accounts/addresses are turned away before any hashing
+        login_throttle.check(username)
+        # Only the credential columns, through the lower(email) index
+        user = User.get_credentials(username)
         if not user:
+            login_throttle.failure(username)
             return make_response(jsonify(status_code=401, error="User has not found."),401)
         if not user.check_password(password):
+            login_throttle.failure(username)
             return make_response(jsonify(status_code=401, error="Wrong password. Try again"),401)
+        login_throttle.success(username)
+        upgrade_password_hash(user, password)
         # Generate a JWT token
 
         if not user.confirmed:
-            status = send_confirmation_email(user.email)
-            if not status:
+            # Same answer whether a link is sent now or one was sent moments ago
+            if send_confirmation_email(user.email) == mail_queue.FULL:
                 return make_response(jsonify(status_code=401, error="Your account has not been confirmed yet."),401)
             return make_response(jsonify(status_code=201, message=f"Your account has not been confirmed yet. We've sent a confirmation link to [{user.email}]. "),200)
         
-        access_token = create_access_token(identity=str(user.id), expires_delta=current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES'))
+        subject = TokenSubject(user.id, claims=create_additional_claims(user=user) or {})
+        access_token = create_access_token(identity=subject, expires_delta=current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES'))
+        refresh_token = create_refresh_token(identity=subject)
         
         response = make_response(jsonify({'status_code': 200, 'message':"User logged successfull!", "username": user.email, "registered_as": user.type_of_user}),200)
         
@@ -140,27 +153,55 @@ class Login(Resource):
         removed becasue of the error: "Cookies is missing. And Token has been revoked"
         """
         #set_access_cookies(response, access_token) #domain="http://localhost:5000"
+        set_refresh_cookies(response, refresh_token)
         # For production, set domain and secure properly
         
         current_app.logger.info(f"Set-Cookies headers: {response.headers}")
         return response
 
 
+class Refresh(Resource):
+    @claims_only()
+    @jwt_required(refresh=True)
+    def post(self):
+        """
+        Exchange a refresh token for a new access/refresh pair.
+
+        No password is checked: the refresh token is the proof. It is single
+        use, so it is revoked here atomically and a second request with the
+        same token (a replay, or a race with another tab) is rejected.
+        """
+        token = get_jwt()
+        if not token_blocklist.rotate(token):
+            return make_response(jsonify(status_code=401, error="Refresh token has already been used."), 401)
+
+        user = user_cache.get(current_user.id)
+        if user is None:
+            return make_response(jsonify(status_code=401, error="User has not found."), 401)
+
+        # Roles come from the (cached) user so role changes apply on the next
+        # refresh; the epoch was just checked against the current one.
+        claims = create_additional_claims(user=user, token_epoch=get_role_flags(token)["token_epoch"]) or {}
+        subject = TokenSubject(user.id, claims=claims)
+
+        response = make_response(jsonify(status_code=200, message="Token refreshed successfully"), 200)
+        set_access_cookies(response, create_access_token(identity=subject))
+        set_refresh_cookies(response, create_refresh_token(identity=subject))
+        return response
+
+
 class Logout(Resource):
+    @claims_only()
     @jwt_required(verify_type=False)
     def get(self): 
         
         token = get_jwt()
-        jti = token["jti"]
         ttype = token["type"]
-        now = datetime.now(timezone.utc)
         block_list=None
 
         try:
-            block_list = TokenBlocklist(jti=jti, type=ttype, created_at=now)
-            db.session.add(block_list)
-            db.session.commit()
-            response = make_response(jsonify(msg=f"{ttype.capitalize()} token successfully revoked", logout="Your session has been terminated!", block_list=block_list.to_dict()), 200)
+            block_list = token_blocklist.revoke(token)
+            response = make_response(jsonify(msg=f"{ttype.capitalize()} token successfully revoked", logout="Your session has been terminated!", block_list=block_list), 200)
         except Exception as e:
             response = make_response(jsonify(error=str(e)),500)      
         
@@ -169,20 +210,17 @@ class Logout(Resource):
 
 
     # Delete
+    @claims_only()
     @jwt_required(verify_type=False)
     def delete(self):
 
         token = get_jwt()
-        jti = token["jti"]
         ttype = token["type"]
-        now = datetime.now(timezone.utc)
         block_list=None
 
         try:
-            block_list = TokenBlocklist(jti=jti, type=ttype, created_at=now)
-            db.session.add(block_list)
-            db.session.commit()
-            response = jsonify(msg=f"{ttype.capitalize()} token successfully revoked", logout="Your session has been terminated!", block_list=block_list.to_dict())
+            block_list = token_blocklist.revoke(token)
+            response = jsonify(msg=f"{ttype.capitalize()} token successfully revoked", logout="Your session has been terminated!", block_list=block_list)
         except Exception as e:
             return jsonify(error=str(e))        
         
@@ -193,7 +231,76 @@ class Logout(Resource):
 
  
 
+class LogoutEverywhere(Resource):
+    @claims_only()
+    @jwt_required(verify_type=False)
+    def post(self):
+        """
+        Revoke every token issued to the current user, on every device.
+
+        Bumps the user's token epoch, so all outstanding tokens fail the
+        blocklist check with a single write.
+        """
+        try:
+            token_epoch = token_blocklist.revoke_all_for_user(int(get_jwt_identity()))
+            response = make_response(jsonify(msg="All tokens successfully revoked", logout="All your sessions have been terminated!", token_epoch=token_epoch), 200)
+        except Exception as e:
+            response = make_response(jsonify(error=str(e)),500)
+
+        return response
+
+
+class Introspect(Resource):
+    def post(self):
+        """
+        Tell other services whether our tokens are active, so they need
+        neither the signing secret nor a call to /protected.
+
+        Body: ``{"token": "..."}`` (or form field ``token``) answers with one
+        object; ``{"tokens": [...]}`` answers ``{"results": [...]}`` in order.
+        ``Cache-Control: max-age`` lasts until the earliest exp of the active
+        tokens, at most TOKEN_INTROSPECTION_MAX_AGE. Answers for tokens that
+        could not be checked right now are sent with ``no-store``.
+
+        The endpoint answers 503 until TOKEN_INTROSPECTION_KEY is set, so it is
+        never an unauthenticated token oracle.
+        """
+        key = current_app.config.get('TOKEN_INTROSPECTION_KEY')
+        if not key:
+            return make_response(jsonify(status_code=503, error="Token introspection is not configured."), 503)
+        if not secrets.compare_digest(request.headers.get('X-Introspection-Key', ''), key):
+            return make_response(jsonify(status_code=401, error="Invalid introspection key."), 401)
+
+        data = request.get_json(silent=True)
+        if data is None:
+            data = request.form
+        if not isinstance(data, dict):
+            return make_response(jsonify(status_code=400, error="The body must be an object."), 400)
+
+        tokens = data.get('tokens')
+        if tokens is None:
+            token = data.get('token')
+            if not isinstance(token, str) or not token:
+                return make_response(jsonify(status_code=400, error="'token' or 'tokens' is required."), 400)
+            answers = [introspect_token(token)]
+            response = make_response(jsonify(answers[0]), 200)
+        else:
+            max_batch = current_app.config.get('TOKEN_INTROSPECTION_MAX_BATCH', 100)
+            if (not isinstance(tokens, list) or len(tokens) > max_batch
+                    or not all(isinstance(token, str) for token in tokens)):
+                return make_response(jsonify(status_code=400, error=f"'tokens' must be a list of at most {max_batch} strings."), 400)
+            answers = [introspect_token(token) for token in tokens]
+            response = make_response(jsonify(results=answers), 200)
+
+        max_age = introspection_max_age(answers, cap=current_app.config.get('TOKEN_INTROSPECTION_MAX_AGE', 60))
+        response.headers['Cache-Control'] = f"private, max-age={max_age}" if max_age else "no-store"
+        return response
+
+
 api.add_resource(Login, '/login')
+api.add_resource(Refresh, '/refresh')
 api.add_resource(Logout, '/logout')
+api.add_resource(LogoutEverywhere, '/logout-everywhere')
+api.add_resource(Introspect, '/introspect')
 
 
@@ -1,6 +1,5 @@
 from flask import Blueprint, current_app, render_template, make_response, redirect, url_for, request, jsonify, session
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from src.utils import google_certs
 import os, sys
 
 
@@ -17,22 +16,22 @@ def index():
 
 @auth2_api_bp.route('/login')
 def login():
-    try:
-        CLIENT_ID = open('app/static/credentials_google_api.json', 'r').read()  # Carregue o ID do cliente do ficheiro de credenciais
-    except Exception as e:
-        return jsonify(error=e)
+    # Client id read once at startup (GOOGLE_CLIENT_CONFIG_FILE)
+    CLIENT_ID = google_certs.client_id
+    if not CLIENT_ID:
+        return make_response(jsonify(error="Google sign-in is not configured."), 503)
     #return render_template('login.html', client_id=CLIENT_ID)
     return make_response(jsonify(sms="Welcome to login page", client_id=CLIENT_ID))
 
 @auth2_api_bp.route('/google/signin', methods=['POST'])
 def google_auth():
     token = request.form.get('id_token')
+    if not google_certs.client_id:
+        return make_response(jsonify(error="Google sign-in is not configured."), 503)
 
     try:
-        idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), CLIENT_ID)
-
-        if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
-            raise ValueError('Wrong issuer.')
+        # Signature, expiry, audience and issuer, checked against cached certs
+        idinfo = google_certs.verify(token)
 
         # ID token is valid. Get the user's Google Account ID from the 'sub' claim.
         userid = idinfo['sub']
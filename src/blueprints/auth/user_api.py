@@ -14,7 +14,7 @@ from src.factory import (
     create_user, confirm_user_email, create_user_object, delete_user
 )
 
-from src.utils import admin_required
+from src.utils import admin_required, auth_required, principal_or_remote_address
 from flask_jwt_extended import jwt_required,current_user
 
 from src.factory import (
@@ -57,8 +57,8 @@ class UserApi(Resource):
             return make_response(jsonify(status_code=400, error=sms), 400)
         return make_response(jsonify(status_code=200, message="User has been created successfull"), 200)
 
-    @jwt_required()
-    @limiter.limit("5 per minute")
+    @auth_required()
+    @limiter.limit("5 per minute", key_func=principal_or_remote_address)
     def patch(self, token):
         """
         Email confirmation endpoint
@@ -87,8 +87,8 @@ class UserApi(Resource):
         
         return jsonify(status_code=200, message=response)
     
-    @jwt_required()
-    @limiter.limit("5 per minute")
+    @auth_required()
+    @limiter.limit("5 per minute", key_func=principal_or_remote_address)
     def put(self, user_id):
         """
         Update user details
@@ -114,8 +114,8 @@ class UserApi(Resource):
         #db.session.commit()
         return jsonify(status_code=200, message="User updated successfully", user=user.serialize())
     
-    @jwt_required()
-    @limiter.limit("5 per minute")
+    @auth_required()
+    @limiter.limit("5 per minute", key_func=principal_or_remote_address)
     def delete(self, user_id):
         """
         Delete a user by ID
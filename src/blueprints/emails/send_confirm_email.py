@@ -28,7 +28,7 @@ from flask_jwt_extended import (
     current_user,
 )
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from src.utils import mail, limiter
+from src.utils import mail, limiter, mail_queue
 from src.models import User
 from src.factory import create_user, confirm_user_email
 from flask_restful import Api, Resource, reqparse
@@ -39,35 +39,45 @@ from sendgrid import SendGridAPIClient
 
 # Email Utilities
 def send_async_email(msg):
-    """Send email asynchronously"""
-    with current_app.app_context():
-        mail.send(msg)
+    """Send email asynchronously (on the mail queue's worker thread)"""
+    return mail_queue.submit(lambda: mail.send(msg)) != mail_queue.FULL
+
+def _send_confirmation(email, confirm_url):
+    msg = Message(
+        "Confirm Your Email Address",
+        recipients=[email],
+        html=render_template('confirm_email.html', confirm_url=confirm_url)
+    )
+    mail.send(msg)
 
 def send_confirmation_email(email):
     """
-    Generate and send confirmation email
-    
+    Queue a confirmation email; rendering and SMTP happen off the request.
+
+    Repeated calls for one address within CONFIRMATION_EMAIL_COOLDOWN seconds
+    send nothing, since the link already sent is still valid.
+
     Args:
-        user: User object to send email to
-    
+        email: Address to send the confirmation link to
+
     Returns:
-        bool: True if email was successfully sent
+        str: ``mail_queue.QUEUED``, ``mail_queue.COOLDOWN`` if a link was sent
+        to the address less than CONFIRMATION_EMAIL_COOLDOWN seconds ago, or
+        ``mail_queue.FULL`` if nothing could be queued
     """
     # Token serializer
     token_serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
     token = token_serializer.dumps(email, salt='email-confirm')
+    # Built here: the external URL needs the request's host
     confirm_url = url_for('send_email.confirm_email', token=token, _external=True)
-    msg = Message(
-        "Confirm Your Email Address",
-        recipients=[email],
-        html=render_template('confirm_email.html', confirm_url=confirm_url)
+    status = mail_queue.submit(
+        lambda: _send_confirmation(email, confirm_url),
+        cooldown_key=f"confirm:{email.strip().lower()}",
+        cooldown=current_app.config.get('CONFIRMATION_EMAIL_COOLDOWN', 0),
     )
-    try:
-        send_async_email(msg)
-        return True
-    except Exception as e:
-        current_app.logger.error(f"Error sending email: {e}")
-        return False
+    if status == mail_queue.FULL:
+        current_app.logger.error("Error sending email: mail queue is full")
+    return status
 
 
 class SendConfirmEmailApi(Resource):
@@ -80,8 +90,14 @@ class SendConfirmEmailApi(Resource):
         if not user:
             return jsonify(status_code=401, error="User not found")
         status = send_confirmation_email(email)
-        if not status:
+        if status == mail_queue.FULL:
             return jsonify(status_code=401, message=f"Failed to send the confirmation email to '{email}'. ")
+        if status == mail_queue.COOLDOWN:
+            return make_response(jsonify(
+                status_code=429,
+                message=f"A confirmation email was already sent to '{email}' a moment ago. Please check your inbox.",
+                recipient=email,
+                ), 429)
         return jsonify(status_code=200, message=f"An email has been sent to '{email}' to confirm your registration.", recipient=email)
 
     @jwt_required()
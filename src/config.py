@@ -43,6 +43,17 @@ class Config(MySmtpConfig):
      # API Keys
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', '12345')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET', '12345')
+    # Client secrets file read once at startup; its client_id is the expected
+    # audience of Google ID tokens (GOOGLE_CLIENT_ID if the file is missing).
+    # With neither, or GOOGLE_CLIENT_ID left at '12345', Google sign-in answers 503.
+    GOOGLE_CLIENT_CONFIG_FILE = os.environ.get('GOOGLE_CLIENT_CONFIG_FILE', 'app/static/credentials_google_api.json')
+    # Google's signing certificates are cached for their Cache-Control max-age
+    # and refreshed in the background REFRESH_MARGIN seconds before they expire
+    # (src/utils/google_certs.py). Point GOOGLE_CERTS_URL at a local stand-in to test.
+    GOOGLE_CERTS_URL = os.environ.get('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v1/certs')
+    GOOGLE_CERTS_TIMEOUT = int(os.environ.get('GOOGLE_CERTS_TIMEOUT', 5))
+    GOOGLE_CERTS_REFRESH_MARGIN = int(os.environ.get('GOOGLE_CERTS_REFRESH_MARGIN', 60))
+    GOOGLE_CERTS_MIN_REFRESH_INTERVAL = int(os.environ.get('GOOGLE_CERTS_MIN_REFRESH_INTERVAL', 30))
 
     ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 
@@ -81,14 +92,154 @@ class Config(MySmtpConfig):
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
         
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_ALGORITHM = "HS256"
+    # HS256 signs with JWT_SECRET_KEY. RS256 or EdDSA sign with the key ring in
+    # JWT_KEY_DIR (src/utils/jwt_keys.py) and publish /.well-known/jwks.json;
+    # rotate with "flask rotate-jwt-key", old keys keep verifying meanwhile.
+    JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    JWT_KEY_DIR = os.getenv("JWT_KEY_DIR")
+    JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+    JWT_KEY_RELOAD_INTERVAL = int(os.getenv("JWT_KEY_RELOAD_INTERVAL", 30))
+    JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", 3600))
     JWT_COOKIE_HTTPONLY = False  # Set to False to allow JS access (if needed)
     JWT_ACCESS_TOKEN_EXPIRES = ACCESS_EXPIRES
+    # Refresh tokens are single use: /api/v1/auth/refresh revokes the one it
+    # receives and returns a new access/refresh pair.
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_REFRESH_TOKEN_DAYS", 30)))
+    JWT_REFRESH_COOKIE_NAME = "refresh_token_cookie"
     JWT_COOKIE_SAMESITE = 'None' if os.getenv("FLASK_ENV") == "production" else 'None'#'Lax'
     # If true this will only allow the cookies that contain your JWTs to be sent
     # over https. In production, this should always be set to True
     JWT_COOKIE_SECURE = True #os.getenv("FLASK_ENV") == "production"  # True in production (HTTPS)
 
+    # In-process cache for the revoked-token check (src/utils/revocation_cache.py).
+    # Negative answers are kept at most REVOKED_TOKEN_CACHE_TTL seconds and never
+    # beyond the token's own expiry.
+    REVOKED_TOKEN_CACHE_SIZE = int(os.getenv("REVOKED_TOKEN_CACHE_SIZE", 10000))
+    REVOKED_TOKEN_CACHE_TTL = int(os.getenv("REVOKED_TOKEN_CACHE_TTL", 60))
+
+    # Bloom filter of revoked JTIs (src/utils/bloom_filter.py). A definite miss
+    # skips the TokenBlocklist query. Memory is roughly
+    # -capacity * ln(error_rate) / ln(2)^2 bits, clamped to MAX_BYTES.
+    REVOKED_JTI_FILTER_CAPACITY = int(os.getenv("REVOKED_JTI_FILTER_CAPACITY", 100000))
+    REVOKED_JTI_FILTER_ERROR_RATE = float(os.getenv("REVOKED_JTI_FILTER_ERROR_RATE", 0.001))
+    REVOKED_JTI_FILTER_MAX_BYTES = int(os.getenv("REVOKED_JTI_FILTER_MAX_BYTES", 1024 * 1024))
+    REVOKED_JTI_FILTER_REFRESH = int(os.getenv("REVOKED_JTI_FILTER_REFRESH", 30))
+
+    # Host-wide revocation set shared by all workers through a memory-mapped file
+    # (src/utils/shared_revocation_set.py). None keeps it in the instance folder,
+    # an empty string disables it. Each slot takes 24 bytes.
+    SHARED_REVOCATION_SET_PATH = os.getenv("SHARED_REVOCATION_SET_PATH")
+    SHARED_REVOCATION_SET_SLOTS = int(os.getenv("SHARED_REVOCATION_SET_SLOTS", 65536))
+
+    # Where revocations are stored (src/utils/token_blocklist.py):
+    # "sql" (TokenBlocklist table), "memory" (single process) or "redis".
+    # The redis backend also publishes revocations on TOKEN_BLOCKLIST_CHANNEL
+    # so other nodes warm their local caches immediately.
+    TOKEN_BLOCKLIST_BACKEND = os.getenv("TOKEN_BLOCKLIST_BACKEND", "sql")
+    TOKEN_BLOCKLIST_REDIS_URL = os.getenv("TOKEN_BLOCKLIST_REDIS_URL", "redis://localhost:6379/0")
+    TOKEN_BLOCKLIST_CHANNEL = os.getenv("TOKEN_BLOCKLIST_CHANNEL", "jwt:revocations")
+    # Largest batch accepted by POST /api/v1/admin/revoke-tokens (JTIs + users)
+    TOKEN_REVOCATION_MAX_BATCH = int(os.getenv("TOKEN_REVOCATION_MAX_BATCH", 10000))
+
+    # Per-user token epochs cached for this many seconds; a "log out everywhere"
+    # reaches other workers on the same node within this window.
+    TOKEN_EPOCH_CACHE_SIZE = int(os.getenv("TOKEN_EPOCH_CACHE_SIZE", 10000))
+    TOKEN_EPOCH_CACHE_TTL = int(os.getenv("TOKEN_EPOCH_CACHE_TTL", 30))
+
+    # Snapshots of the users behind current_user (src/utils/user_cache.py).
+    # Local writes evict an entry on commit; other workers see them after the TTL.
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+
+    # Layout of the user claims in new tokens (src/utils/claim_profiles.py):
+    # "full" (readable role fields) or "compact" (role bitmask, no aud/nbf).
+    # Tokens of either layout are accepted. Minting a token larger than
+    # JWT_MAX_TOKEN_BYTES fails (0 = no budget); "flask jwt-size-report"
+    # prints the cookie bytes each profile costs per request.
+    JWT_CLAIM_PROFILE = os.getenv("JWT_CLAIM_PROFILE", "full")
+    JWT_MAX_TOKEN_BYTES = int(os.getenv("JWT_MAX_TOKEN_BYTES", 0))
+
+    # Verified token claims cached by token digest until the token's exp, capped
+    # at DECODED_TOKEN_CACHE_TTL seconds (src/utils/decoded_token_cache.py).
+    DECODED_TOKEN_CACHE_ENABLED = os.getenv("DECODED_TOKEN_CACHE_ENABLED", "true").lower() == "true"
+    DECODED_TOKEN_CACHE_SIZE = int(os.getenv("DECODED_TOKEN_CACHE_SIZE", 10000))
+    DECODED_TOKEN_CACHE_TTL = int(os.getenv("DECODED_TOKEN_CACHE_TTL", 300))
+
+    # Adds X-Auth-Queries / X-Auth-Verify-Ms / X-Auth-Request-Ms to responses of
+    # routes behind auth_required (src/utils/access_controller.py); for tests
+    # and benchmarks.
+    AUTH_PROFILE = os.getenv("AUTH_PROFILE", "false").lower() == "true"
+
+    # POST /api/v1/auth/introspect. Callers must send the key in
+    # X-Introspection-Key; without a key the endpoint answers 503. Answers may be cached until the token's exp, but
+    # at most MAX_AGE seconds, which bounds how long a revocation goes unseen
+    # (0 removes the cap).
+    TOKEN_INTROSPECTION_KEY = os.getenv("TOKEN_INTROSPECTION_KEY")
+    TOKEN_INTROSPECTION_MAX_AGE = int(os.getenv("TOKEN_INTROSPECTION_MAX_AGE", 60))
+    TOKEN_INTROSPECTION_MAX_BATCH = int(os.getenv("TOKEN_INTROSPECTION_MAX_BATCH", 100))
+
+    # Access tokens expiring within this many seconds are re-issued in a cookie
+    # on the next authenticated response (src/utils/token_refresher.py).
+    ACCESS_TOKEN_REFRESH_WINDOW = int(os.getenv("ACCESS_TOKEN_REFRESH_WINDOW", 15 * 60))
+    ACCESS_TOKEN_REFRESH_CACHE_SIZE = int(os.getenv("ACCESS_TOKEN_REFRESH_CACHE_SIZE", 10000))
+
+    # Password hashing runs on a process pool (src/utils/password_hasher.py).
+    # Up to PASSWORD_HASH_MAX_QUEUE calls wait for a free worker; more are
+    # rejected with 503 after PASSWORD_HASH_QUEUE_TIMEOUT seconds (0 = at once).
+    # 0 workers hashes on the request thread. Workers are started with
+    # PASSWORD_HASH_START_METHOD, "forkserver" (default) or "spawn"; "fork" is
+    # unsafe once the app runs threads. Both re-import the main module in every
+    # worker, so scripts that hash must guard their work with
+    # `if __name__ == "__main__":`. A call still running after
+    # PASSWORD_HASH_TIMEOUT seconds answers 503 but keeps its slot until done.
+    PASSWORD_HASH_START_METHOD = os.getenv("PASSWORD_HASH_START_METHOD")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 16))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 0))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+    # Algorithm of new password hashes: "scrypt" or "pbkdf2:sha256", optionally
+    # with the cost ("scrypt:32768:8:1"). Without a cost and with
+    # PASSWORD_HASH_TARGET_MS set, the cost is calibrated at startup so one hash
+    # takes about that long, saved in PASSWORD_HASH_CALIBRATION_FILE (default
+    # instance/password_hash.json) and shared by all workers; re-run
+    # "flask calibrate-password-hash" after moving to other hardware.
+    # Passwords stored with other parameters are re-hashed on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_TARGET_MS = int(os.getenv("PASSWORD_HASH_TARGET_MS", 0))
+    PASSWORD_HASH_CALIBRATION_FILE = os.getenv("PASSWORD_HASH_CALIBRATION_FILE")
+
+    # Failed logins per account and per client address (src/utils/login_throttle.py).
+    # After the free attempts within the window each failure locks the key for
+    # twice as long as the last one, BASE_DELAY up to MAX_DELAY seconds, and
+    # attempts are answered with 429 before any password hashing.
+    # "memory" counts per process, "redis" shares the counters between workers.
+    LOGIN_THROTTLE_ENABLED = os.getenv("LOGIN_THROTTLE_ENABLED", "true").lower() == "true"
+    LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+    LOGIN_THROTTLE_REDIS_URL = os.getenv("LOGIN_THROTTLE_REDIS_URL", "redis://localhost:6379/0")
+    LOGIN_THROTTLE_WINDOW = int(os.getenv("LOGIN_THROTTLE_WINDOW", 15 * 60))
+    LOGIN_THROTTLE_ACCOUNT_ATTEMPTS = int(os.getenv("LOGIN_THROTTLE_ACCOUNT_ATTEMPTS", 5))
+    LOGIN_THROTTLE_IP_ATTEMPTS = int(os.getenv("LOGIN_THROTTLE_IP_ATTEMPTS", 20))
+    LOGIN_THROTTLE_BASE_DELAY = int(os.getenv("LOGIN_THROTTLE_BASE_DELAY", 1))
+    LOGIN_THROTTLE_MAX_DELAY = int(os.getenv("LOGIN_THROTTLE_MAX_DELAY", 15 * 60))
+
+    # Emails are rendered and sent on a background thread (src/utils/mail_queue.py)
+    # so logins never wait for SMTP. Confirmation emails to one address are
+    # sent at most once per CONFIRMATION_EMAIL_COOLDOWN seconds; "memory" keeps
+    # the cooldowns per process, "redis" shares them between workers.
+    MAIL_QUEUE_ENABLED = os.getenv("MAIL_QUEUE_ENABLED", "true").lower() == "true"
+    MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", 1000))
+    MAIL_COOLDOWN_BACKEND = os.getenv("MAIL_COOLDOWN_BACKEND", "memory")
+    MAIL_COOLDOWN_REDIS_URL = os.getenv("MAIL_COOLDOWN_REDIS_URL", "redis://localhost:6379/0")
+    CONFIRMATION_EMAIL_COOLDOWN = int(os.getenv("CONFIRMATION_EMAIL_COOLDOWN", 5 * 60))
+
+    # Expired rows are deleted from the blocklist table in short batches
+    # (src/utils/blocklist_purge.py) by "flask purge-token-blocklist", run from
+    # cron, e.g. "0 * * * * cd /srv/app && flask purge-token-blocklist".
+    # A non-zero interval instead purges from every worker process that often.
+    TOKEN_BLOCKLIST_PURGE_INTERVAL = int(os.getenv("TOKEN_BLOCKLIST_PURGE_INTERVAL", 0))
+    TOKEN_BLOCKLIST_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_BLOCKLIST_PURGE_BATCH_SIZE", 500))
+
  
     # CORS Configuration
     CORS_ORIGIN = (
@@ -1,2 +1,2 @@
-from .user import User
-from .token_block_list import TokenBlocklist, TokenBlocklist2
\ No newline at end of file
+from .user import User, UserCredentials, upgrade_password_hash
+from .token_block_list import TokenBlocklist, canonical_jti
\ No newline at end of file
@@ -1,35 +1,74 @@
 import sys
 import os
+import uuid
 
 #sys.path.append(os.path.abspath("flask-jwt-authentication-2025"))
 
 from src.utils import db
-from flask_jwt_extended import current_user
 from sqlalchemy.sql import func
 
 
+def canonical_jti(jti: str) -> str:
+    """
+    The JTI in the form the blocklist reads it back: a lowercase, hyphenated
+    UUID string.
+
+    Flask-JWT-Extended issues UUID4 JTIs; nothing else can be stored.
+
+    Raises:
+        ValueError: if ``jti`` is not a UUID
+    """
+    try:
+        return str(uuid.UUID(jti))
+    except (ValueError, AttributeError, TypeError):
+        raise ValueError(f"JTI {jti!r} is not a UUID") from None
+
+
+def jti_to_bytes(jti: str) -> bytes:
+    """Pack a UUID JTI into its 16 raw bytes (ValueError for anything else)."""
+    return uuid.UUID(canonical_jti(jti)).bytes
+
+
+class BinaryJti(db.TypeDecorator):
+    """JTI column stored as 16 raw bytes and read back as a UUID string."""
+
+    impl = db.LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return jti_to_bytes(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
 # This could be expanded to fit the needs of your application. For example,
-# it could track who revoked a JWT, when a token expires, notes for why a
+# it could track who revoked a JWT, notes for why a
 # JWT was revoked, an endpoint to un-revoked a JWT, etc.
-# Making jti an index can significantly speed up the search when there are
-# tens of thousands of records. Remember this query will happen for every
-# (protected) request,
-# If your database supports a UUID type, this can be used for the jti column
-# as well
+# The jti is stored as a 16-byte binary UUID under a unique index: the index
+# stays small enough to live in cache, and a token can only be revoked once.
+# Remember this query will happen for every (protected) request.
 class TokenBlocklist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    jti = db.Column(db.String(36), nullable=False, index=True)
+    jti = db.Column(BinaryJti(), nullable=False, unique=True, index=True)
     type = db.Column(db.String(16), nullable=False)
+    # The user the token was issued to, not whoever revoked it
     user_id = db.Column(
         db.ForeignKey('user.id'),
-        default=lambda: current_user.id,
-        nullable=False,
+        nullable=True,
     )
     created_at = db.Column(
         db.DateTime,
         server_default=func.now(),
         nullable=False,
     )
+    # Copied from the token's "exp" claim. Once it has passed the JWT is
+    # rejected on its own, so the row can be purged.
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
 
     def to_dict(self):
         return {
@@ -37,20 +76,6 @@ class TokenBlocklist(db.Model):
             'jti': self.jti,
             'type': self.type,
             'user_id': self.user_id,
-            'created_at': self.created_at
+            'created_at': self.created_at,
+            'expires_at': self.expires_at
         }
-
-class TokenBlocklist2(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    jti = db.Column(db.String(36), nullable=False, index=True)
-    created_at = db.Column(
-        db.DateTime,
-        nullable=False,
-    )
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'jti': self.jti,
-            'created_at': self.created_at
-        }
\ No newline at end of file
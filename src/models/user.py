@@ -5,11 +5,11 @@ import os
 sys.path.append(os.path.abspath("flask-jwt-authentication-2025"))
 
 from sqlalchemy.exc import SQLAlchemyError, OperationalError, IntegrityError, DataError
-from sqlalchemy import or_
+from sqlalchemy import or_, func
 from datetime import datetime, timezone
 from src.utils import db, UserAlreadyExistsError, DatabaseQueryError, RecordNotFoundError
 from src.utils import DatabaseIntegrityError, InvalidUserDataError, DatabaseConnectionError
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils import password_hasher, PasswordHasherBusy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,6 +24,7 @@ class User(db.Model):
         email: User's email address (unique)
         password_hash: Hashed password
         confirmed: Email confirmation status
+        token_epoch: Counter embedded in every token; bumping it revokes them all
         created_at: Account creation timestamp
     """
     id = db.Column(db.Integer, primary_key=True)
@@ -37,20 +38,47 @@ class User(db.Model):
     address = db.Column(db.Text)
     address_2 = db.Column(db.Text)
     postal_code = db.Column(db.String(8))
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     confirmed = db.Column(db.Boolean, default=False, nullable=False)
     type_of_user = db.Column(db.String(30), nullable=True)
+    # Bumped to invalidate every token issued to the user ("log out everywhere")
+    token_epoch = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     #created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    @property
+    def full_name(self):
+        return f"{self.firstname or ''} {self.lastname or ''}".strip()
+
     def set_password(self, password):
-        """Securely hash and store password"""
-        self.password_hash = generate_password_hash(password)
+        """Securely hash and store password (on the password hashing pool)"""
+        self.password_hash = password_hasher.hash(password)
 
-    # NOTE: In a real application make sure to properly hash and salt passwords
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)   
-     
+        """Verify a password (on the password hashing pool)"""
+        return password_hasher.verify(self.password_hash, password)
+
+    @classmethod
+    def get_credentials(cls, email: str = None, *, username: str = None):
+        """
+        The columns a login needs, looked up by email through the lower(email)
+        index or, with ``username``, by the exact username.
+
+        Returns:
+            UserCredentials | None
+        """
+        if username is not None:
+            condition = cls.username == username
+        else:
+            condition = func.lower(cls.email) == normalize_email(email)
+        row = (
+            db.session.query(*(getattr(cls, column) for column in UserCredentials.COLUMNS))
+            .filter(condition)
+            .order_by(cls.id)
+            .first()
+        )
+        return UserCredentials(*row) if row is not None else None
+
     def to_dict(self):
         """Convert user object to dictionary."""
         return {
@@ -216,3 +244,63 @@ class User(db.Model):
             db.session.rollback()
             logger.error(f"Erro ao remover usuário {self.id}: {e}")
             raise DatabaseQueryError(f"Erro ao remover usuário: {e}") from e
+
+
+def normalize_email(email) -> str:
+    return str(email or "").strip().lower()
+
+
+def upgrade_password_hash(user, password) -> None:
+    """
+    Replace the stored hash of ``user`` (a User or UserCredentials) when it
+    was made with other parameters than the configured PASSWORD_HASH_METHOD.
+
+    Logins call this after ``check_password`` succeeded. The hash is saved
+    with a single UPDATE; the login already succeeded, so a failure here only
+    postpones the upgrade.
+    """
+    if not password_hasher.needs_rehash(user.password_hash):
+        return
+    try:
+        password_hash = password_hasher.rehash(password)
+        db.session.query(User).filter_by(id=user.id).update(
+            {User.password_hash: password_hash}, synchronize_session=False
+        )
+        db.session.commit()
+        user.password_hash = password_hash
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.warning(f"Could not re-hash password of user {user.id}: {e}")
+    except PasswordHasherBusy:
+        pass
+
+
+# Case-insensitive email lookups (User.get_credentials)
+db.Index('ix_user_email_lower', func.lower(User.email))
+
+
+class UserCredentials:
+    """
+    Narrow projection of a User for password logins.
+
+    Carries what the login and its tokens need, without the address and
+    other text columns.
+    """
+
+    COLUMNS = ("id", "email", "password_hash", "confirmed", "type_of_user", "token_epoch")
+    __slots__ = COLUMNS
+
+    def __init__(self, id, email, password_hash, confirmed, type_of_user, token_epoch):
+        self.id = id
+        self.email = email
+        self.password_hash = password_hash
+        self.confirmed = confirmed
+        self.type_of_user = type_of_user
+        self.token_epoch = token_epoch or 0
+
+    def check_password(self, password):
+        """Same as User.check_password, for the projected row."""
+        return password_hasher.verify(self.password_hash, password)
+
+    def __repr__(self):
+        return f"<UserCredentials {self.id}>"
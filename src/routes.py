@@ -21,8 +21,9 @@ from flask_jwt_extended import (
 from src.config import DevelopmentConfig, ProductionConfig
 
 from werkzeug.security import check_password_hash
-from src.utils import db
-from src.models import User, TokenBlocklist, TokenBlocklist2
+from src.utils import db, token_blocklist, claims_only, jwt_keys, claim_profiles, password_hasher
+from src.utils import login_throttle, mail_queue, google_certs, auth_required, TokenSubject, create_additional_claims
+from src.models import User, TokenBlocklist, upgrade_password_hash
 
 def routes(app):
 
@@ -31,6 +32,15 @@ def routes(app):
         return send_from_directory(os.path.join(app.root_path, 'static', 'assets', 'img', 'favicon'),
                                    'favicon.ico', mimetype='image/vnd.microsoft.icon')
 
+    # Public halves of the JWT signing keys, so other services can verify our
+    # tokens without calling back. Empty while tokens are signed with HS256.
+    @app.route('/.well-known/jwks.json', methods=['GET'])
+    def jwks():
+        response = make_response(jsonify(jwt_keys.jwks()), 200)
+        response.headers['Cache-Control'] = f"public, max-age={app.config.get('JWKS_MAX_AGE', 3600)}"
+        response.add_etag()
+        return response.make_conditional(request)
+
     @app.route("/debug-config/<string:dev>", methods=["GET"])
     def debug_config(dev):
         if app.config.get('DEVLOPER') != dev:
@@ -42,6 +52,13 @@ def routes(app):
         config_vars['FLASK_ENV'] = app.config["FLASK_ENV"]
         config_vars['JWT_COOKIE_CSRF_PROTECT'] = app.config["JWT_COOKIE_CSRF_PROTECT"]
         config_vars['JWT_COOKIE_SECURE'] = app.config["JWT_COOKIE_SECURE"]
+        config_vars['TOKEN_BLOCKLIST'] = token_blocklist.stats()
+        config_vars['JWT_KEYS'] = jwt_keys.stats()
+        config_vars['JWT_CLAIMS'] = claim_profiles.stats()
+        config_vars['PASSWORD_HASHER'] = password_hasher.stats()
+        config_vars['LOGIN_THROTTLE'] = login_throttle.stats()
+        config_vars['MAIL_QUEUE'] = mail_queue.stats()
+        config_vars['GOOGLE_CERTS'] = google_certs.stats()
           
         return jsonify(config_vars)
 
@@ -71,15 +88,19 @@ def routes(app):
     def login_without_cookies():
 
         data = request.get_json()
-        username = data.get('username')
+        username = data.get('username') or data.get('email')
         password = data.get('password')
 
-        user = User.query.filter_by(username=username).one_or_none()
+        login_throttle.check(username)
+        user = User.get_credentials(username=username) or User.get_credentials(username)
         if not user or not user.check_password(password):
-            return jsonify({"error": "Wrong username or password", "user": user.to_dict()}), 401
+            login_throttle.failure(username)
+            return jsonify({"error": "Wrong username or password"}), 401
+        login_throttle.success(username)
+        upgrade_password_hash(user, password)
         # Generate a JWT token
        
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=TokenSubject(user.id, claims=create_additional_claims(user=user) or {}))
 
         return make_response(jsonify({"secret_key": app.config['SECRET_KEY'], 
                                       "access_token": access_token,
@@ -91,16 +112,20 @@ def routes(app):
     def login_with_cookies():
         response = jsonify({"msg": "login successful"}), 200
         data = request.get_json()
-        username = data.get('username')
+        username = data.get('username') or data.get('email')
         password = data.get('password')
         
 
-        user = User.query.filter_by(username=username).one_or_none()
+        login_throttle.check(username)
+        user = User.get_credentials(username=username) or User.get_credentials(username)
         if not user or not user.check_password(password):
-            return jsonify({"error": "Wrong username or password", "user": user.to_dict()}), 401
+            login_throttle.failure(username)
+            return jsonify({"error": "Wrong username or password"}), 401
+        login_throttle.success(username)
+        upgrade_password_hash(user, password)
         # Generate a JWT token
        
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_access_token(identity=TokenSubject(user.id, claims=create_additional_claims(user=user) or {}))
 
         response = make_response(jsonify({"status_code": 200,
                                       "username": username
@@ -118,35 +143,32 @@ def routes(app):
     # Endpoint for revoking the current users access token. Saved the unique
     # identifier (jti) for the JWT into our database.
     @app.route("/logout-with-revoking-token", methods=["GET", "POST"])
+    @claims_only()
     @jwt_required()
     def modify_token():
-        jti = get_jwt()["jti"]
+        token = get_jwt()
+        jti = token["jti"]
         now = datetime.now(timezone.utc)
         block_list=None
         try:
-            block_list = TokenBlocklist2(jti=jti, created_at=now)
-            db.session.add(block_list)
-            db.session.commit()
+            block_list = token_blocklist.revoke(token)
         except Exception as e:
             return jsonify(error=str(e))
-        response = jsonify(msg="JWT revoked", time=now, jtid=jti, block_list=block_list.to_dict())
+        response = jsonify(msg="JWT revoked", time=now, jtid=jti, block_list=block_list)
         #unset_jwt_cookies(response)
         return response
 
     @app.route("/logout_with_revoking_token_2", methods=["get", "post"])
+    @claims_only()
     @jwt_required(verify_type=False)
     def modify_token_2():
         token = get_jwt()
-        jti = token["jti"]
         ttype = token["type"]
-        now = datetime.now(timezone.utc)
         block_list=None
 
         try:
-            block_list = TokenBlocklist(jti=jti, type=ttype, created_at=now)
-            db.session.add(block_list)
-            db.session.commit()
-            response = jsonify(msg=f"{ttype.capitalize()} token successfully revoked", logout="Your session has been terminated!", block_list=block_list.to_dict())
+            block_list = token_blocklist.revoke(token)
+            response = jsonify(msg=f"{ttype.capitalize()} token successfully revoked", logout="Your session has been terminated!", block_list=block_list)
         except Exception as e:
             return jsonify(error=str(e))        
         
@@ -172,7 +194,7 @@ def routes(app):
         return response
 
     @app.route("/only_headers")
-    @jwt_required(locations=["headers"])
+    @auth_required(locations=["headers"])
     def only_headers():
         return jsonify(foo="baz")
 
@@ -1,9 +1,17 @@
 from .jwt_conf import JwtConfig
+from .claim_profiles import (
+    ClaimProfile, FullClaimProfile, CompactClaimProfile, ClaimProfileManager, TokenBudgetExceeded,
+    CLAIM_PROFILES, claim_profiles, expand_claims, get_role_flags
+)
 from .sql_alchemy_conf import SqlAchemyConfig
 from .extentions import load_extentions #, add_request_id_header
 from .extentions import db, cors, limiter, mail, csrf
 from .access_controller import create_additional_claims
-from .access_controller import admin_required
+from .access_controller import TokenSubject, claims_snapshot
+from .access_controller import admin_required, ceo_required
+from .access_controller import auth_required, authenticate, current_principal, principal_or_remote_address
+from .access_controller import has_role, AuthProfiler, auth_profiler
+from .access_controller import ClaimsPrincipal, claims_only, wants_claims_principal
 from .logger_config import logger
 from .logger_config import get_message
 from .handling_errors import handle_errors
@@ -14,6 +22,27 @@ from .docx_factory import DocxFileFactory
 from .pdf_reader_factory import PdfReaderFactory
 from .openai_api import OpenAiApi
 from .middlewares import request_id_middleware
+from .ttl_cache import TTLCache
+from .revocation_cache import RevokedTokenCache, revoked_token_cache
+from .bloom_filter import BloomFilter, RevokedJtiFilter, revoked_jti_filter
+from .shared_revocation_set import SharedRevocationSet, shared_revocation_set
+from .blocklist_backends import (
+    BlocklistBackend, SqlBlocklistBackend, MemoryBlocklistBackend, RedisBlocklistBackend
+)
+from .token_epoch import TokenEpochStore, token_epochs
+from .user_cache import UserSnapshot, UserIdentityCache, user_cache
+from .token_blocklist import TokenBlocklistManager, token_blocklist
+from .blocklist_purge import purge_expired_tokens, BlocklistPurgeScheduler, blocklist_purge
+from .token_refresher import ExpiringTokenRefresher, token_refresher
+from .jwt_keys import SigningKey, JwtKeyRing, jwt_keys
+from .decoded_token_cache import DecodedTokenCache, CachingJWTManager, decoded_token_cache
+from .token_introspection import introspect_token, introspection_max_age
+from .password_hasher import PasswordHasher, PasswordHasherBusy, password_hasher
+from .login_throttle import (
+    LoginThrottle, LoginThrottled, MemoryThrottleStore, RedisThrottleStore, login_throttle
+)
+from .mail_queue import MailQueue, MemoryCooldown, RedisCooldown, mail_queue
+from .google_certs import GoogleCertCache, GoogleCertsUnavailable, google_certs
 from .exceptions import (
     DatabaseConnectionError, DatabaseIntegrityError, 
     BusinessRuleError, DuplicateError,EntityNotFoundError,
@@ -1,65 +1,288 @@
 
 
+import time
 from functools import wraps
 
 from flask import Flask
+from flask import g
 from flask import jsonify
+from flask import request
 
 from flask_jwt_extended import get_jwt
+from flask_jwt_extended import get_current_user
 from flask_jwt_extended import verify_jwt_in_request
 
+from .claim_profiles import CLAIM_PROFILES, claim_profiles, expand_claims, get_role_flags
 
 
-# Creating claim content
-def create_additional_claims(*, user):
+
+# Creating claim content, laid out by the active JWT_CLAIM_PROFILE
+def create_additional_claims(*, user, token_epoch=None):
     if not user:
         return False
 
     try:
-        return {
-            "type_of_user": user.type_of_user if hasattr(user, 'type_of_user') else None,
-            "is_administrator": True if str(user.type_of_user).lower() == 'admin' else False,
-            "is_ceo_user": True if str(user.type_of_user).lower() == 'ceo' else False,
-        }
+        return claim_profiles.build(user, token_epoch=token_epoch)
     except Exception as e:
         return False
 
-# Here is a custom decorator that verifies the JWT is present in the request,
-# as well as insuring that the JWT has a claim indicating that this user is
-# an administrator
-def admin_required():
+# Claims added by create_additional_claims under any profile. They are copied
+# from an existing token when a new one is minted for the same user (see
+# TokenSubject).
+USER_CLAIM_KEYS = tuple(key for profile in CLAIM_PROFILES.values() for key in profile.keys)
+
+
+def claims_snapshot(jwt_data):
+    """Pick the user claims out of a decoded token."""
+    return {key: jwt_data[key] for key in USER_CLAIM_KEYS if key in jwt_data}
+
+
+class TokenSubject:
+    """
+    Identity for create_access_token when the user's claims are already known.
+
+    Passing a TokenSubject (or the loaded User itself) instead of a bare id
+    lets the additional claims loader skip its database lookup.
+
+    Attributes:
+        id: The user's id, used as the token's "sub"
+        claims: User claims to embed, e.g. ``claims_snapshot(get_jwt())``
+    """
+
+    def __init__(self, id, claims=None):
+        self.id = id
+        self.claims = dict(claims or {})
+
+    def __str__(self):
+        return str(self.id)
+
+
+class ClaimsPrincipal:
+    """
+    ``current_user`` for routes that only need what the JWT already says.
+
+    Built from the decoded claims, so no query runs while a handler only reads
+    ``id``, ``type_of_user``, ``is_administrator`` or ``is_ceo_user``. Any other
+    attribute loads the user on first access: snapshot fields come from
+    ``user_cache``, ORM-only attributes (``password_hash``, ``save``...) from
+    the session.
+    """
+
+    __slots__ = ("id", "claims", "_snapshot", "_user")
+
+    def __init__(self, jwt_data):
+        self.id = int(jwt_data["sub"])
+        self.claims = jwt_data
+        self._snapshot = None
+        self._user = None
+
+    @property
+    def type_of_user(self):
+        return expand_claims(self.claims)["type_of_user"]
+
+    @property
+    def is_administrator(self):
+        return expand_claims(self.claims)["is_administrator"]
+
+    @property
+    def is_ceo_user(self):
+        return expand_claims(self.claims)["is_ceo_user"]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        from .user_cache import UserSnapshot, user_cache
+
+        if name in UserSnapshot.FIELDS or name == "full_name":
+            if self._snapshot is None:
+                self._snapshot = user_cache.get(self.id)
+            return getattr(self._snapshot, name)
+
+        if self._user is None:
+            from src.utils import db
+            from src.models import User
+            self._user = db.session.get(User, self.id)
+        return getattr(self._user, name)
+
+    def __repr__(self):
+        return f"<ClaimsPrincipal {self.id}>"
+
+
+def use_claims_principal(enabled: bool = True) -> None:
+    """Make the next JWT verification in this request load a ClaimsPrincipal (or the user)."""
+    g._jwt_claims_only = enabled
+
+
+def wants_claims_principal() -> bool:
+    return g.get("_jwt_claims_only", False)
+
+
+# Opt-in for routes that only need the claims: place it above @jwt_required()
+# so ``current_user`` is a ClaimsPrincipal instead of a loaded user.
+def claims_only():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            try:
-                if 'is_administrator' in claims and claims["is_administrator"]:
-                    return fn(*args, **kwargs)
-                else:
-                    return jsonify(msg="Admins only!", status_code=403)
-            except Exception as e:
-                print(f"Error to create the admin decorator. {str(e)}")
+            use_claims_principal()
+            return fn(*args, **kwargs)
 
         return decorator
 
     return wrapper
 
 
-def ceo_required():
+# 403 messages of the role checks
+ROLE_MESSAGES = {"admin": "Admins only!", "ceo": "CEO only!"}
+
+
+def has_role(jwt_data, role) -> bool:
+    flags = get_role_flags(jwt_data)
+    if role == "admin":
+        return flags["is_administrator"]
+    if role == "ceo":
+        return flags["is_ceo_user"]
+    return str(flags["type_of_user"]).lower() == str(role).lower()
+
+
+def authenticate(*, locations=None, optional=False, refresh=False, verify_type=True, claims_only=True):
+    """
+    Verify the request's JWT and remember the outcome in ``g``.
+
+    The first call decodes the token, runs the blocklist check and loads the
+    principal; later calls in the same request (stacked decorators, the
+    limiter key function, error handlers) reuse it when they ask for the same
+    kind of check. A required check never reuses an absent principal.
+
+    Returns:
+        The principal (``current_user``), or None for an optional, absent token
+    """
+    key = (refresh, optional, verify_type, claims_only,
+           tuple(locations) if isinstance(locations, list) else locations)
+    verified = g.get("_auth_verified")
+    if verified is not None and verified["key"] == key and (optional or verified["principal"] is not None):
+        return verified["principal"]
+
+    use_claims_principal(claims_only)
+    started = time.perf_counter()
+    found = verify_jwt_in_request(optional=optional, refresh=refresh, locations=locations, verify_type=verify_type)
+    principal = get_current_user() if found is not None else None
+    g._auth_verified = {
+        "key": key,
+        "principal": principal,
+        "verify_ms": (time.perf_counter() - started) * 1000,
+    }
+    return principal
+
+
+def current_principal():
+    """The principal verified earlier in this request, or None. Never verifies."""
+    verified = g.get("_auth_verified")
+    return verified["principal"] if verified else None
+
+
+def principal_or_remote_address() -> str:
+    """Rate limit key: the authenticated user when known, else the client address."""
+    principal = current_principal()
+    if principal is not None:
+        return f"user:{principal.id}"
+    return request.remote_addr or "127.0.0.1"
+
+
+def auth_required(roles=None, locations=None, optional=False, refresh=False, verify_type=True, claims_only=True):
+    """
+    One decorator for authenticated routes, verifying the JWT once per request.
+
+    Args:
+        roles: Any of these is enough: "admin", "ceo" or a type_of_user
+        locations: Where to look for the token, as in ``jwt_required``
+        claims_only: ``current_user`` is a ClaimsPrincipal (see ``claims_only``)
+
+    Put ``limiter.limit(..., key_func=principal_or_remote_address)`` below it
+    to rate limit per user.
+    """
+    if isinstance(roles, str):
+        roles = (roles,)
+
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            try:
-                if 'is_ceo_user' in claims and claims["is_ceo_user"]:
-                    return fn(*args, **kwargs)
-                else:
-                    return jsonify(msg="CEO only!", status_code=403)
-            except Exception as e:
-                print(f"Error to create the CEO decorator. {str(e)}")
+            principal = authenticate(
+                locations=locations, optional=optional, refresh=refresh,
+                verify_type=verify_type, claims_only=claims_only,
+            )
+            if roles and (principal is None or not any(has_role(get_jwt(), role) for role in roles)):
+                message = ROLE_MESSAGES.get(roles[0], "Insufficient role!") if len(roles) == 1 else "Insufficient role!"
+                response = jsonify(msg=message, status_code=403)
+                response.status_code = 403
+                return response
+            return fn(*args, **kwargs)
 
         return decorator
 
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+# Verifies the JWT is present in the request and that it carries a claim
+# indicating that this user is an administrator
+def admin_required():
+    return auth_required(roles=("admin",))
+
+
+def ceo_required():
+    return auth_required(roles=("ceo",))
+
+
+class AuthProfiler:
+    """
+    Per-request cost of the routes behind ``auth_required``, for tests and
+    benchmarks. With ``AUTH_PROFILE`` on, such responses carry
+
+    - ``X-Auth-Queries``: SQL statements run by the whole request
+    - ``X-Auth-Verify-Ms``: time spent verifying the token
+    - ``X-Auth-Request-Ms``: time from the first ``before_request`` on
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._engines = set()
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('AUTH_PROFILE', self.enabled)
+        app.extensions['auth_profiler'] = self
+        if not self.enabled:
+            return
+
+        @app.before_request
+        def start_auth_profile():
+            self._listen()
+            g._auth_profile = {"started": time.perf_counter(), "queries": 0}
+
+        @app.after_request
+        def add_auth_profile_headers(response):
+            profile = g.get("_auth_profile")
+            verified = g.get("_auth_verified")
+            if profile is not None and verified is not None:
+                response.headers['X-Auth-Queries'] = str(profile["queries"])
+                response.headers['X-Auth-Verify-Ms'] = f"{verified['verify_ms']:.3f}"
+                response.headers['X-Auth-Request-Ms'] = f"{(time.perf_counter() - profile['started']) * 1000:.3f}"
+            return response
+
+    def _listen(self) -> None:
+        from sqlalchemy import event
+        from src.utils import db
+
+        engine = db.engine
+        if id(engine) in self._engines:
+            return
+        self._engines.add(id(engine))
+        event.listen(engine, "before_cursor_execute", self._count_query)
+
+    @staticmethod
+    def _count_query(*args) -> None:
+        profile = g.get("_auth_profile") if g else None
+        if profile is not None:
+            profile["queries"] += 1
+
+
+auth_profiler = AuthProfiler()
@@ -0,0 +1,381 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class BlocklistBackend:
+    """
+    Storage for revoked JWTs.
+
+    Backends only answer "is this JTI revoked?" and record new revocations;
+    the in-process caches in front of them live in ``TokenBlocklistManager``.
+    Backends that can reach other nodes also broadcast revocations so those
+    nodes can warm their caches straight away.
+    """
+
+    name = "base"
+
+    def revoke(self, *, jti: str, token_type: str, user_id=None, expires_at: float = None) -> dict:
+        """Persist a revocation and return it as a dictionary."""
+        raise NotImplementedError
+
+    def is_revoked(self, jti: str) -> bool:
+        raise NotImplementedError
+
+    def claim(self, *, jti: str, token_type: str, user_id=None, expires_at: float = None) -> bool:
+        """
+        Revoke ``jti`` only if nobody has revoked it yet.
+
+        Used to rotate single-use tokens: of several concurrent callers
+        presenting the same token, exactly one gets True. Backends should
+        override this with an atomic check-and-set; the default is not atomic.
+
+        Returns:
+            bool: True if this call recorded the revocation
+        """
+        if self.is_revoked(jti):
+            return False
+        self.revoke(jti=jti, token_type=token_type, user_id=user_id, expires_at=expires_at)
+        return True
+
+    def revoke_many(self, records: list) -> list:
+        """
+        Revoke many tokens at once. ``records`` are dicts with ``jti``,
+        ``token_type``, ``user_id`` and ``expires_at`` as for ``revoke``.
+        Backends should override this with a single bulk write.
+
+        Returns:
+            list: The JTIs that were not revoked before
+        """
+        return [record['jti'] for record in records if self.claim(**record)]
+
+    def load_since(self, cursor=None):
+        """
+        Return revoked JTIs added after ``cursor`` and the cursor to use next.
+
+        Used to fill the Bloom filter at boot and to top it up afterwards.
+
+        Returns:
+            tuple: (list of JTIs, new cursor)
+        """
+        return [], cursor
+
+    def publish(self, message: dict) -> None:
+        """
+        Broadcast a revocation event to other nodes. No-op for local backends.
+
+        Events are ``{"jti": ..., "exp": ...}`` for a single token and
+        ``{"user_id": ..., "token_epoch": ...}`` for "log out everywhere".
+        Bulk revocations send one event per batch: ``{"jtis": [[jti, exp], ...]}``
+        and ``{"token_epochs": {user_id: token_epoch, ...}}``.
+        """
+
+    def subscribe(self, callback) -> None:
+        """Call ``callback(message)`` for events published by other nodes."""
+
+
+class SqlBlocklistBackend(BlocklistBackend):
+    """
+    Revocations stored in the ``TokenBlocklist`` table.
+
+    The table only holds UUID JTIs (see ``canonical_jti``); revoking anything
+    else raises ValueError, and such a JTI is never reported as revoked.
+    """
+
+    name = "sql"
+
+    def revoke(self, *, jti, token_type, user_id=None, expires_at=None):
+        from src.utils import db
+        from src.models import TokenBlocklist, canonical_jti
+
+        jti = canonical_jti(jti)
+        block_list = TokenBlocklist(
+            jti=jti,
+            type=token_type,
+            created_at=datetime.now(timezone.utc),
+            user_id=user_id,
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc) if expires_at is not None else None,
+        )
+        try:
+            db.session.add(block_list)
+            db.session.commit()
+        except IntegrityError:
+            # The unique jti index already holds this revocation.
+            db.session.rollback()
+            existing = TokenBlocklist.query.filter_by(jti=jti).one_or_none()
+            if existing is None:
+                raise
+            return existing.to_dict()
+        except Exception:
+            db.session.rollback()
+            raise
+        return block_list.to_dict()
+
+    def claim(self, *, jti, token_type, user_id=None, expires_at=None):
+        from src.utils import db
+        from src.models import TokenBlocklist, canonical_jti
+
+        jti = canonical_jti(jti)
+        block_list = TokenBlocklist(
+            jti=jti,
+            type=token_type,
+            created_at=datetime.now(timezone.utc),
+            user_id=user_id,
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc) if expires_at is not None else None,
+        )
+        try:
+            db.session.add(block_list)
+            db.session.commit()
+        except IntegrityError:
+            # The unique jti index makes the insert the check-and-set. Any
+            # other violation (e.g. an unknown user_id) revoked nothing.
+            db.session.rollback()
+            if db.session.query(TokenBlocklist.id).filter_by(jti=jti).scalar() is None:
+                raise
+            return False
+        except Exception:
+            db.session.rollback()
+            raise
+        return True
+
+    def revoke_many(self, records, chunk_size: int = 500):
+        from sqlalchemy import insert
+        from src.utils import db
+        from src.models import TokenBlocklist, canonical_jti
+
+        records = [dict(record, jti=canonical_jti(record['jti'])) for record in records]
+        records = list({record['jti']: record for record in records}.values())
+        existing = set()
+        try:
+            for start in range(0, len(records), chunk_size):
+                chunk = [record['jti'] for record in records[start:start + chunk_size]]
+                existing.update(
+                    jti for (jti,) in db.session.query(TokenBlocklist.jti).filter(TokenBlocklist.jti.in_(chunk))
+                )
+            now = datetime.now(timezone.utc)
+            rows = [{
+                'jti': record['jti'],
+                'type': record['token_type'],
+                'user_id': record.get('user_id'),
+                'created_at': now,
+                'expires_at': (datetime.fromtimestamp(record['expires_at'], timezone.utc)
+                               if record.get('expires_at') is not None else None),
+            } for record in records if record['jti'] not in existing]
+            if rows:
+                # One executemany INSERT and one commit for the whole batch
+                db.session.execute(insert(TokenBlocklist), rows)
+            db.session.commit()
+        except IntegrityError:
+            # Some JTIs were revoked concurrently; settle them one by one.
+            db.session.rollback()
+            return super().revoke_many([record for record in records if record['jti'] not in existing])
+        except Exception:
+            db.session.rollback()
+            raise
+        return [row['jti'] for row in rows]
+
+    def is_revoked(self, jti):
+        from src.utils import db
+        from src.models import TokenBlocklist, canonical_jti
+
+        try:
+            jti = canonical_jti(jti)
+        except ValueError:
+            return False
+        return db.session.query(TokenBlocklist.id).filter_by(jti=jti).scalar() is not None
+
+    def load_since(self, cursor=None):
+        from src.utils import db
+        from src.models import TokenBlocklist
+
+        last_id = cursor or 0
+        try:
+            rows = (
+                db.session.query(TokenBlocklist.id, TokenBlocklist.jti)
+                .filter(TokenBlocklist.id > last_id)
+                .order_by(TokenBlocklist.id)
+                .all()
+            )
+        except Exception:
+            db.session.rollback()
+            raise
+        if rows:
+            last_id = rows[-1][0]
+        return [jti for _, jti in rows], last_id
+
+
+class MemoryBlocklistBackend(BlocklistBackend):
+    """
+    Revocations kept in a dictionary of this process.
+
+    Meant for tests and single-process development servers; nothing is shared
+    between workers.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._records = {}
+        self._order = []
+        self._lock = threading.Lock()
+
+    def revoke(self, *, jti, token_type, user_id=None, expires_at=None):
+        record = {
+            'jti': jti,
+            'type': token_type,
+            'user_id': user_id,
+            'created_at': datetime.now(timezone.utc),
+        }
+        with self._lock:
+            if jti not in self._records:
+                self._order.append(jti)
+            self._records[jti] = (record, expires_at)
+        return dict(record)
+
+    def claim(self, *, jti, token_type, user_id=None, expires_at=None):
+        with self._lock:
+            if jti in self._records:
+                return False
+            self._order.append(jti)
+            self._records[jti] = ({
+                'jti': jti,
+                'type': token_type,
+                'user_id': user_id,
+                'created_at': datetime.now(timezone.utc),
+            }, expires_at)
+        return True
+
+    def revoke_many(self, records):
+        created_at = datetime.now(timezone.utc)
+        revoked = []
+        with self._lock:
+            for record in records:
+                jti = record['jti']
+                if jti in self._records:
+                    continue
+                self._order.append(jti)
+                self._records[jti] = ({
+                    'jti': jti,
+                    'type': record['token_type'],
+                    'user_id': record.get('user_id'),
+                    'created_at': created_at,
+                }, record.get('expires_at'))
+                revoked.append(jti)
+        return revoked
+
+    def is_revoked(self, jti):
+        with self._lock:
+            entry = self._records.get(jti)
+            if entry is None:
+                return False
+            if entry[1] is not None and entry[1] <= time.time():
+                del self._records[jti]
+                return False
+            return True
+
+    def load_since(self, cursor=None):
+        with self._lock:
+            start = cursor or 0
+            return list(self._order[start:]), len(self._order)
+
+
+class RedisBlocklistBackend(BlocklistBackend):
+    """
+    Revocations stored in Redis (or anything speaking its protocol).
+
+    Each revoked JTI is a key that expires together with the token, and every
+    revocation is published on ``channel`` so other nodes can warm their local
+    caches. ``client`` only needs the redis-py methods used here: ``set``,
+    ``exists``, ``publish``, ``pubsub`` and ``scan_iter``; a local fake such as
+    ``fakeredis.FakeStrictRedis`` can be passed in tests.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, *, prefix: str = "jwt:blocklist:", channel: str = "jwt:revocations"):
+        self.client = client
+        self.prefix = prefix
+        self.channel = channel
+        self._listener = None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisBlocklistBackend':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The 'redis' package is required for TOKEN_BLOCKLIST_BACKEND='redis'") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, jti: str) -> str:
+        return f"{self.prefix}{jti}"
+
+    def revoke(self, *, jti, token_type, user_id=None, expires_at=None):
+        record = {
+            'jti': jti,
+            'type': token_type,
+            'user_id': user_id,
+            'created_at': datetime.now(timezone.utc),
+        }
+        ttl = int(expires_at - time.time()) + 1 if expires_at is not None else None
+        payload = json.dumps({**record, 'created_at': record['created_at'].isoformat()})
+        self.client.set(self._key(jti), payload, ex=max(ttl, 1) if ttl is not None else None)
+        return record
+
+    def claim(self, *, jti, token_type, user_id=None, expires_at=None):
+        created_at = datetime.now(timezone.utc).isoformat()
+        ttl = int(expires_at - time.time()) + 1 if expires_at is not None else None
+        payload = json.dumps({'jti': jti, 'type': token_type, 'user_id': user_id, 'created_at': created_at})
+        return bool(self.client.set(self._key(jti), payload, ex=max(ttl, 1) if ttl is not None else None, nx=True))
+
+    def revoke_many(self, records):
+        created_at = datetime.now(timezone.utc).isoformat()
+        pipe = self.client.pipeline(transaction=False)
+        for record in records:
+            expires_at = record.get('expires_at')
+            ttl = int(expires_at - time.time()) + 1 if expires_at is not None else None
+            payload = json.dumps({'jti': record['jti'], 'type': record['token_type'],
+                                  'user_id': record.get('user_id'), 'created_at': created_at})
+            pipe.set(self._key(record['jti']), payload, ex=max(ttl, 1) if ttl is not None else None, nx=True)
+        return [record['jti'] for record, created in zip(records, pipe.execute()) if created]
+
+    def is_revoked(self, jti):
+        return bool(self.client.exists(self._key(jti)))
+
+    def load_since(self, cursor=None):
+        # Keys are scanned once at boot; later revocations arrive over pub/sub.
+        if cursor is not None:
+            return [], cursor
+        jtis = []
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            key = key.decode('utf-8') if isinstance(key, bytes) else key
+            jtis.append(key[len(self.prefix):])
+        return jtis, True
+
+    def publish(self, message):
+        try:
+            self.client.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Could not publish revocation event {message}: {e}")
+
+    def subscribe(self, callback):
+        if self._listener is not None and self._listener.is_alive():
+            return
+
+        def listen():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+            for message in pubsub.listen():
+                if message.get('type') != 'message':
+                    continue
+                try:
+                    callback(json.loads(message['data']))
+                except Exception as e:
+                    logger.warning(f"Ignoring malformed revocation message: {e}")
+
+        self._listener = threading.Thread(target=listen, name="jwt-revocation-listener", daemon=True)
+        self._listener.start()
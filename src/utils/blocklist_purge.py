@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import click
+
+logger = logging.getLogger(__name__)
+
+
+def purge_expired_tokens(*, batch_size: int = 500, max_batches: int = None, pause: float = 0.0, now: datetime = None) -> dict:
+    """
+    Delete ``TokenBlocklist`` rows whose token has already expired.
+
+    Rows are removed in batches of ``batch_size`` primary keys, each in its own
+    short transaction, so the table is never locked for long and concurrent
+    revocations keep going through.
+
+    Args:
+        batch_size: Rows deleted per transaction
+        max_batches: Stop after this many batches (None = until done)
+        pause: Seconds to sleep between batches
+        now: Reference time, defaults to the current UTC time
+
+    Returns:
+        dict: Rows removed and rows left in the table
+    """
+    from src.utils import db
+    from src.models import TokenBlocklist
+
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
+    removed = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        ids = [
+            row_id for (row_id,) in db.session.query(TokenBlocklist.id)
+            .filter(TokenBlocklist.expires_at.isnot(None), TokenBlocklist.expires_at < now)
+            .order_by(TokenBlocklist.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        try:
+            db.session.query(TokenBlocklist).filter(TokenBlocklist.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        removed += len(ids)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+
+    report = {"removed": removed, "remaining": db.session.query(TokenBlocklist.id).count()}
+    db.session.commit()
+
+    logger.info(f"Token blocklist purge: {report}")
+    return report
+
+
+class BlocklistPurgeScheduler:
+    """
+    Runs ``purge_expired_tokens`` every ``TOKEN_BLOCKLIST_PURGE_INTERVAL``
+    seconds on a daemon thread. The default interval of 0 disables the
+    scheduler; run ``flask purge-token-blocklist`` from cron instead.
+
+    When enabled, the thread starts on the first request a process serves, so
+    CLI commands never start one and each forked worker gets its own.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self.batch_size = 500
+        self.last_report = None
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.interval = app.config.get('TOKEN_BLOCKLIST_PURGE_INTERVAL', self.interval)
+        self.batch_size = app.config.get('TOKEN_BLOCKLIST_PURGE_BATCH_SIZE', self.batch_size)
+        app.extensions['blocklist_purge'] = self
+
+        @app.cli.command('purge-token-blocklist')
+        def purge_token_blocklist_command():
+            """Delete expired rows from the token blocklist table."""
+            report = purge_expired_tokens(batch_size=self.batch_size)
+            click.echo(report)
+
+        if self.interval:
+            app.before_request(self.start)
+
+    def start(self) -> None:
+        # Threads do not survive a fork, so a preloaded worker starts its own.
+        if self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-blocklist-purge", daemon=True)
+        self._thread_pid = os.getpid()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.last_report = purge_expired_tokens(batch_size=self.batch_size)
+            except Exception as e:
+                logger.error(f"Token blocklist purge failed: {e}")
+
+
+blocklist_purge = BlocklistPurgeScheduler()
@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    ``item in bloom`` is False only when the item was definitely never added;
+    True means "possibly added" and must be confirmed elsewhere.
+
+    Args:
+        capacity: Number of items the filter is sized for
+        error_rate: Target false-positive rate at ``capacity`` items
+        max_bytes: Optional upper bound for the bit array. When the size
+            derived from ``capacity``/``error_rate`` is larger it is clamped,
+            and the real false-positive rate goes up accordingly.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, max_bytes: int = None):
+        if capacity <= 0:
+            raise ValueError("Bloom filter capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("Bloom filter error rate must be between 0 and 1")
+
+        num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        if max_bytes:
+            num_bits = min(num_bits, max_bytes * 8)
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(num_bits, 8)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray(math.ceil(self.num_bits / 8))
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_error_rate(self) -> float:
+        """False-positive rate expected for the number of items added so far."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class RevokedJtiFilter:
+    """
+    Bloom filter of revoked JTIs used as a prefilter for ``check_if_token_revoked``.
+
+    The filter is filled through ``loader`` (the blocklist backend's
+    ``load_since``) the first time it is used in a worker and then topped up
+    with revocations added since the last cursor, at most every
+    ``REVOKED_JTI_FILTER_REFRESH`` seconds. Revocations made through the
+    blocklist manager are added directly. While nothing could be loaded the
+    filter reports every JTI as "possibly revoked" so the backend stays
+    authoritative.
+    """
+
+    def __init__(self):
+        self.capacity = 100000
+        self.error_rate = 0.001
+        self.max_bytes = None
+        self.refresh_interval = 30
+        self.skipped_queries = 0
+        self.loader = None
+        self._bloom = None
+        self._cursor = None
+        self._last_refresh = 0.0
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Size the filter from ``REVOKED_JTI_FILTER_*`` settings."""
+        self.capacity = app.config.get('REVOKED_JTI_FILTER_CAPACITY', self.capacity)
+        self.error_rate = app.config.get('REVOKED_JTI_FILTER_ERROR_RATE', self.error_rate)
+        self.max_bytes = app.config.get('REVOKED_JTI_FILTER_MAX_BYTES', self.max_bytes)
+        self.refresh_interval = app.config.get('REVOKED_JTI_FILTER_REFRESH', self.refresh_interval)
+        self.reset()
+        app.extensions['revoked_jti_filter'] = self
+
+    def reset(self) -> None:
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate, self.max_bytes)
+            self._cursor = None
+            self._last_refresh = 0.0
+            self._ready = False
+
+    def add(self, jti: str) -> None:
+        if self._bloom is None:
+            self.reset()
+        self._bloom.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        """
+        Returns:
+            bool: False when ``jti`` is definitely not revoked, True otherwise
+        """
+        self._refresh()
+        if not self._ready:
+            return True
+        if jti in self._bloom:
+            return True
+        self.skipped_queries += 1
+        return False
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self.loader is None:
+            return
+        if self._ready and now - self._last_refresh < self.refresh_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+
+        try:
+            if self._bloom is None:
+                self._bloom = BloomFilter(self.capacity, self.error_rate, self.max_bytes)
+            jtis, self._cursor = self.loader(self._cursor)
+            for jti in jtis:
+                self._bloom.add(jti)
+            self._ready = True
+            if self._bloom.count > self.capacity:
+                logger.warning(
+                    f"Revoked JTI filter holds {self._bloom.count} items for a capacity of "
+                    f"{self.capacity}; raise REVOKED_JTI_FILTER_CAPACITY."
+                )
+        except Exception as e:
+            logger.warning(f"Revoked JTI filter could not be loaded: {e}")
+        finally:
+            self._last_refresh = now
+            self._lock.release()
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        return {
+            "ready": self._ready,
+            "items": bloom.count if bloom else 0,
+            "size_bytes": bloom.size_bytes if bloom else 0,
+            "num_hashes": bloom.num_hashes if bloom else 0,
+            "estimated_error_rate": round(bloom.estimated_error_rate(), 6) if bloom else 0.0,
+            "skipped_queries": self.skipped_queries,
+        }
+
+
+revoked_jti_filter = RevokedJtiFilter()
@@ -0,0 +1,214 @@
+import logging
+
+import click
+
+logger = logging.getLogger(__name__)
+
+# Role bits used by the compact profile
+ROLE_ADMIN = 1
+ROLE_CEO = 2
+ROLE_BITS = {"admin": ROLE_ADMIN, "ceo": ROLE_CEO}
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """A freshly minted JWT is larger than ``JWT_MAX_TOKEN_BYTES``."""
+
+
+class ClaimProfile:
+    """
+    How the user claims are laid out inside a token.
+
+    ``build`` produces the claims for a new token; ``expand_claims`` (below)
+    reads either layout back, so tokens minted under another profile keep
+    working after ``JWT_CLAIM_PROFILE`` changes.
+    """
+
+    name = "base"
+    # Claims copied verbatim when a token is re-issued for the same user
+    keys = ()
+    # Registered claims; None leaves them out of the token
+    aud = "some_audience"
+    encode_nbf = True
+
+    def build(self, *, type_of_user, token_epoch=0) -> dict:
+        raise NotImplementedError
+
+
+class FullClaimProfile(ClaimProfile):
+    """Readable role fields; the layout tokens have always had."""
+
+    name = "full"
+    keys = ("type_of_user", "is_administrator", "is_ceo_user", "token_epoch")
+
+    def build(self, *, type_of_user, token_epoch=0):
+        role = str(type_of_user).lower()
+        return {
+            "type_of_user": type_of_user,
+            "is_administrator": role == "admin",
+            "is_ceo_user": role == "ceo",
+            "token_epoch": token_epoch or 0,
+        }
+
+
+class CompactClaimProfile(ClaimProfile):
+    """
+    Roles packed into one integer and default values left out.
+
+    - ``rl``: bitmask of ``ROLE_BITS``
+    - ``ut``: type of user, unless the bits already spell it exactly
+    - ``te``: token epoch, only when it is not 0
+
+    The unverified ``aud`` claim and ``nbf`` (always equal to ``iat``) are
+    dropped as well.
+    """
+
+    name = "compact"
+    keys = ("rl", "ut", "te")
+    aud = None
+    encode_nbf = False
+
+    def build(self, *, type_of_user, token_epoch=0):
+        role = str(type_of_user).lower()
+        claims = {"rl": ROLE_BITS.get(role, 0)}
+        # "Admin" sets the admin bit but must still read back as "Admin"
+        if type_of_user is not None and type_of_user not in ROLE_BITS:
+            claims["ut"] = type_of_user
+        if token_epoch:
+            claims["te"] = token_epoch
+        return claims
+
+
+CLAIM_PROFILES = {
+    'full': FullClaimProfile(),
+    'compact': CompactClaimProfile(),
+}
+
+
+def expand_claims(jwt_data: dict) -> dict:
+    """
+    Read the user claims of a token minted under any profile.
+
+    Returns:
+        dict: ``type_of_user``, ``is_administrator``, ``is_ceo_user`` and ``token_epoch``
+    """
+    if "rl" in jwt_data:
+        bits = int(jwt_data.get("rl") or 0)
+        type_of_user = jwt_data.get("ut")
+        if type_of_user is None:
+            type_of_user = next((role for role, bit in ROLE_BITS.items() if bits & bit), None)
+        return {
+            "type_of_user": type_of_user,
+            "is_administrator": bool(bits & ROLE_ADMIN),
+            "is_ceo_user": bool(bits & ROLE_CEO),
+            "token_epoch": int(jwt_data.get("te", 0)),
+        }
+    return {
+        "type_of_user": jwt_data.get("type_of_user"),
+        "is_administrator": bool(jwt_data.get("is_administrator")),
+        "is_ceo_user": bool(jwt_data.get("is_ceo_user")),
+        "token_epoch": int(jwt_data.get("token_epoch", 0)),
+    }
+
+
+def get_role_flags(jwt_data: dict = None) -> dict:
+    """``expand_claims`` for the token of the current request by default."""
+    if jwt_data is None:
+        from flask_jwt_extended import get_jwt
+        jwt_data = get_jwt()
+    return expand_claims(jwt_data)
+
+
+class ClaimProfileManager:
+    """
+    Active claim profile and JWT size budget.
+
+    ``JWT_CLAIM_PROFILE`` picks the layout of new tokens. When
+    ``JWT_MAX_TOKEN_BYTES`` is set, minting a larger token raises
+    ``TokenBudgetExceeded`` instead of shipping it in every request's cookie.
+    ``flask jwt-size-report`` prints what each profile costs per request.
+    """
+
+    def __init__(self):
+        self.profile = CLAIM_PROFILES['full']
+        self.max_token_bytes = 0
+        self.issued = 0
+        self.largest = 0
+
+    def init_app(self, app) -> None:
+        name = str(app.config.get('JWT_CLAIM_PROFILE', 'full')).lower()
+        if name not in CLAIM_PROFILES:
+            raise ValueError(f"Unknown JWT_CLAIM_PROFILE '{name}'")
+        self.profile = CLAIM_PROFILES[name]
+        self.max_token_bytes = app.config.get('JWT_MAX_TOKEN_BYTES', self.max_token_bytes)
+        app.config.setdefault('JWT_ENCODE_NBF', self.profile.encode_nbf)
+        app.extensions['claim_profiles'] = self
+
+        @app.cli.command('jwt-size-report')
+        def jwt_size_report_command():
+            """Print token and cookie header sizes for every claim profile."""
+            for row in self.size_report(app):
+                click.echo(
+                    f"{row['profile']:8} token={row['token_bytes']}B "
+                    f"set-cookie={row['set_cookie_bytes']}B cookie={row['cookie_header_bytes']}B "
+                    f"saved/request={row['saved_per_request']}B"
+                )
+
+    def build(self, user, token_epoch=None) -> dict:
+        epoch = token_epoch if token_epoch is not None else getattr(user, 'token_epoch', None) or 0
+        return self.profile.build(type_of_user=getattr(user, 'type_of_user', None), token_epoch=epoch)
+
+    @property
+    def aud(self):
+        return self.profile.aud
+
+    def check(self, token: str) -> str:
+        size = len(token)
+        self.issued += 1
+        self.largest = max(self.largest, size)
+        if self.max_token_bytes and size > self.max_token_bytes:
+            raise TokenBudgetExceeded(f"JWT is {size} bytes, budget is {self.max_token_bytes}")
+        return token
+
+    def size_report(self, app, *, type_of_user="admin", token_epoch=3) -> list:
+        """Mint a sample access token per profile and measure what it costs on the wire."""
+        from flask_jwt_extended import create_access_token, set_access_cookies
+        from .access_controller import TokenSubject
+
+        rows = []
+        current, encode_nbf = self.profile, app.config.get('JWT_ENCODE_NBF', True)
+        try:
+            for profile in CLAIM_PROFILES.values():
+                self.profile = profile
+                app.config['JWT_ENCODE_NBF'] = profile.encode_nbf
+                claims = profile.build(type_of_user=type_of_user, token_epoch=token_epoch)
+                with app.test_request_context():
+                    token = create_access_token(identity=TokenSubject(12345, claims=claims))
+                    response = app.response_class()
+                    set_access_cookies(response, token)
+                set_cookie = response.headers.getlist('Set-Cookie')
+                cookies = '; '.join(header.split(';', 1)[0] for header in set_cookie)
+                rows.append({
+                    "profile": profile.name,
+                    "token_bytes": len(token),
+                    "set_cookie_bytes": sum(len(f"Set-Cookie: {header}\r\n") for header in set_cookie),
+                    "cookie_header_bytes": len(f"Cookie: {cookies}\r\n"),
+                })
+        finally:
+            self.profile = current
+            app.config['JWT_ENCODE_NBF'] = encode_nbf
+
+        baseline = rows[0]["cookie_header_bytes"]
+        for row in rows:
+            row["saved_per_request"] = baseline - row["cookie_header_bytes"]
+        return rows
+
+    def stats(self) -> dict:
+        return {
+            "profile": self.profile.name,
+            "max_token_bytes": self.max_token_bytes,
+            "issued": self.issued,
+            "largest": self.largest,
+        }
+
+
+claim_profiles = ClaimProfileManager()
@@ -0,0 +1,108 @@
+import hashlib
+import time
+from hmac import compare_digest
+
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.exceptions import CSRFError, JWTDecodeError
+
+from .ttl_cache import TTLCache
+from .claim_profiles import claim_profiles
+
+
+class DecodedTokenCache:
+    """
+    Verified JWT claims keyed by a digest of the raw token.
+
+    A bearer token is presented on every request of its lifetime; once its
+    signature and claims have been verified, the decoded payload is kept here
+    until the token's ``exp`` (capped at ``DECODED_TOKEN_CACHE_TTL``) so later
+    requests skip base64 decoding, signature verification and JSON parsing.
+
+    Entries are also dropped when their JTI is revoked and when a signing key
+    is removed from the key ring. The blocklist check still runs on every
+    request, so revocation never depends on this cache.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.enabled = True
+        self._claims = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._keys_by_jti = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('DECODED_TOKEN_CACHE_ENABLED', self.enabled)
+        maxsize = app.config.get('DECODED_TOKEN_CACHE_SIZE', self._claims.maxsize)
+        ttl = app.config.get('DECODED_TOKEN_CACHE_TTL', self._claims.ttl)
+        self._claims.configure(maxsize=maxsize, ttl=ttl)
+        self._keys_by_jti.configure(maxsize=maxsize, ttl=ttl)
+        app.extensions['decoded_token_cache'] = self
+
+    @staticmethod
+    def key(encoded_token: str) -> bytes:
+        return hashlib.blake2b(encoded_token.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        """
+        Returns:
+            dict | None: A copy of the cached claims, so callers may modify it
+        """
+        claims = self._claims.get(key)
+        return dict(claims) if claims is not None else None
+
+    def put(self, key: bytes, claims: dict) -> None:
+        now = time.time()
+        if claims.get("nbf", 0) > now:
+            return
+        ttl = min(self._claims.ttl, claims.get("exp", now + self._claims.ttl) - now)
+        if ttl <= 0:
+            return
+        self._claims.set(key, dict(claims), ttl=ttl)
+        if claims.get("jti"):
+            self._keys_by_jti.set(claims["jti"], key, ttl=ttl)
+
+    def discard_jti(self, jti: str) -> None:
+        key = self._keys_by_jti.pop(jti)
+        if key is not None:
+            self._claims.discard(key)
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._keys_by_jti.clear()
+
+    def stats(self) -> dict:
+        return self._claims.stats()
+
+
+decoded_token_cache = DecodedTokenCache()
+
+
+class CachingJWTManager(JWTManager):
+    """
+    ``JWTManager`` whose decode path is fronted by ``decoded_token_cache``.
+
+    The cached claims were verified without a CSRF value; the double-submit
+    check is repeated on every request because the CSRF header differs per
+    request. Decodes that allow expired tokens always take the full path.
+
+    Every token it mints is also checked against the ``JWT_MAX_TOKEN_BYTES``
+    budget (see ``claim_profiles``).
+    """
+
+    def _encode_jwt_from_config(self, *args, **kwargs) -> str:
+        return claim_profiles.check(super()._encode_jwt_from_config(*args, **kwargs))
+
+    def _decode_jwt_from_config(self, encoded_token: str, csrf_value=None, allow_expired: bool = False) -> dict:
+        if allow_expired or not decoded_token_cache.enabled:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = decoded_token_cache.key(encoded_token)
+        claims = decoded_token_cache.get(key)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, None, False)
+            decoded_token_cache.put(key, claims)
+
+        if csrf_value:
+            if "csrf" not in claims:
+                raise JWTDecodeError("Missing claim: csrf")
+            if not compare_digest(claims["csrf"], csrf_value):
+                raise CSRFError("CSRF double submit tokens do not match")
+        return claims
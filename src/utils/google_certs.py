@@ -0,0 +1,221 @@
+import json
+import logging
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from google.auth import jwt as google_jwt
+from werkzeug.exceptions import ServiceUnavailable
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+# GOOGLE_CLIENT_ID defaults to a placeholder; it means "not configured"
+PLACEHOLDER_CLIENT_IDS = ("", "12345")
+
+
+def cache_lifetime(headers, default: float = 3600) -> float:
+    """Seconds a response may be reused, from ``Cache-Control`` max-age (less ``Age``) or ``Expires``."""
+    match = _MAX_AGE.search(headers.get("Cache-Control", ""))
+    if match:
+        return max(0, int(match.group(1)) - int(headers.get("Age", 0) or 0))
+    if headers.get("Expires"):
+        try:
+            return max(0, parsedate_to_datetime(headers["Expires"]).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return default
+
+
+def load_google_client_id(path: str, default: str = None) -> str:
+    """
+    The OAuth client id from a Google client secrets file (``web`` or
+    ``installed`` section), or ``default`` when the file is missing.
+    """
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Google client config '{path}' not loaded: {e}")
+        return default
+    section = config.get("web") or config.get("installed") or config
+    return section.get("client_id", default)
+
+
+class GoogleCertsUnavailable(ServiceUnavailable):
+    """Google's certificates could not be fetched and none are cached."""
+
+    description = "Google sign-in is temporarily unavailable. Please try again later."
+
+
+class GoogleCertCache:
+    """
+    Google's ID-token signing certificates, fetched from ``GOOGLE_CERTS_URL``
+    and kept for as long as the response's ``Cache-Control`` max-age allows.
+
+    Within ``GOOGLE_CERTS_REFRESH_MARGIN`` seconds of expiry the next caller
+    starts a background refresh and keeps using the current certificates, so
+    a sign-in only waits for the network on the very first fetch or after the
+    certificates lapsed. A failed refresh keeps the old certificates until
+    they expire. A token signed by an unknown key forces one refresh, at most
+    every ``GOOGLE_CERTS_MIN_REFRESH_INTERVAL`` seconds, to pick up a key
+    rotation.
+
+    ``init_app`` also reads the OAuth client id once from
+    ``GOOGLE_CLIENT_CONFIG_FILE``, falling back to ``GOOGLE_CLIENT_ID``
+    unless that is still the placeholder. Without a client id, sign-in is
+    not configured and ``verify`` rejects every token.
+    """
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL):
+        self.url = url
+        self.client_id = None
+        self.timeout = 5
+        self.refresh_margin = 60
+        self.min_refresh_interval = 30
+        self.default_ttl = 3600
+        self.clock_skew = 10
+        self._certs = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+        self._counts = {"hits": 0, "fetches": 0, "background_refreshes": 0, "failures": 0}
+
+    def init_app(self, app) -> None:
+        self.url = app.config.get('GOOGLE_CERTS_URL', self.url)
+        self.timeout = app.config.get('GOOGLE_CERTS_TIMEOUT', self.timeout)
+        self.refresh_margin = app.config.get('GOOGLE_CERTS_REFRESH_MARGIN', self.refresh_margin)
+        self.min_refresh_interval = app.config.get('GOOGLE_CERTS_MIN_REFRESH_INTERVAL', self.min_refresh_interval)
+        self.clock_skew = app.config.get('GOOGLE_ID_TOKEN_CLOCK_SKEW', self.clock_skew)
+        default = app.config.get('GOOGLE_CLIENT_ID')
+        self.client_id = load_google_client_id(
+            app.config.get('GOOGLE_CLIENT_CONFIG_FILE', 'app/static/credentials_google_api.json'),
+            default=None if default in PLACEHOLDER_CLIENT_IDS else default,
+        ) or None
+        if self.client_id is None:
+            logger.warning("Google sign-in is not configured: no GOOGLE_CLIENT_CONFIG_FILE or GOOGLE_CLIENT_ID")
+        self.clear()
+        app.extensions['google_certs'] = self
+
+    def clear(self) -> None:
+        with self._lock:
+            self._certs = None
+            self._expires_at = self._fetched_at = 0.0
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _fetch(self) -> dict:
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        certs = response.json()
+        ttl = cache_lifetime(response.headers, self.default_ttl)
+        with self._lock:
+            self._certs = certs
+            self._fetched_at = time.time()
+            self._expires_at = self._fetched_at + ttl
+            self._counts["fetches"] += 1
+        return certs
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._fetch()
+        except Exception as e:
+            self._count("failures")
+            logger.warning(f"Refreshing Google certificates failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def certs(self) -> dict:
+        """The current certificates (``kid`` -> PEM), fetching them if none are valid."""
+        now = time.time()
+        with self._lock:
+            certs, expires_at = self._certs, self._expires_at
+            start_refresh = (
+                certs is not None and now < expires_at and expires_at - now <= self.refresh_margin
+                and not self._refreshing
+            )
+            if start_refresh:
+                self._refreshing = True
+        if certs is not None and now < expires_at:
+            self._count("hits")
+            if start_refresh:
+                self._count("background_refreshes")
+                threading.Thread(target=self._refresh_in_background, name="google-certs", daemon=True).start()
+            return certs
+
+        # Expired or never fetched: one caller fetches, the others wait for it
+        with self._fetch_lock:
+            with self._lock:
+                if self._certs is not None and time.time() < self._expires_at:
+                    return self._certs
+            try:
+                return self._fetch()
+            except (requests.RequestException, ValueError) as e:
+                self._count("failures")
+                logger.error(f"Fetching Google certificates failed: {e}")
+                raise GoogleCertsUnavailable() from e
+
+    def _refresh_for_unknown_key(self) -> bool:
+        with self._fetch_lock:
+            if time.time() - self._fetched_at < self.min_refresh_interval:
+                return False
+            try:
+                self._fetch()
+                return True
+            except Exception as e:
+                self._count("failures")
+                logger.warning(f"Refreshing Google certificates failed: {e}")
+                return False
+
+    def verify(self, token: str, audience: str = None) -> dict:
+        """
+        Verify a Google ID token against the cached certificates.
+
+        Returns:
+            dict: the token's claims
+
+        Raises:
+            ValueError: if the token is malformed, expired, signed by an
+            unknown key, or meant for another audience or issuer, or if no
+            client id is configured
+            GoogleCertsUnavailable: if no certificates could be fetched
+        """
+        audience = audience or self.client_id
+        if not audience:
+            # google.auth skips the audience check without one
+            raise ValueError("Google sign-in is not configured.")
+        try:
+            claims = google_jwt.decode(
+                token, certs=self.certs(), audience=audience, clock_skew_in_seconds=self.clock_skew
+            )
+        except ValueError as e:
+            if "Certificate for key id" not in str(e) or not self._refresh_for_unknown_key():
+                raise
+            claims = google_jwt.decode(
+                token, certs=self.certs(), audience=audience, clock_skew_in_seconds=self.clock_skew
+            )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError("Wrong issuer.")
+        return claims
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            counts["keys"] = len(self._certs or {})
+            counts["expires_in"] = max(0, int(self._expires_at - time.time())) if self._certs else None
+        counts["url"] = self.url
+        return counts
+
+
+google_certs = GoogleCertCache()
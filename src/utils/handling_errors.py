@@ -1,9 +1,11 @@
 from flask import make_response, render_template, jsonify
 from werkzeug.exceptions import HTTPException
 from flask_limiter.errors import RateLimitExceeded
+from src.utils.password_hasher import PasswordHasherBusy
+from src.utils.login_throttle import LoginThrottled
 from src.utils import logger, get_message
 from typing import Dict, List, Any, Optional, Union
-from flask_jwt_extended import current_user
+from src.utils.access_controller import current_principal
 from flask import request, g  # Add this with your other Flask imports
 
 # Constants and Configuration
@@ -97,9 +99,12 @@ def _log_error_details(
         error_code: HTTP status code
         context: Additional context information
     """
+    # The principal verified by auth_required, if any; never verifies again
+    principal = current_principal()
     log_context = {
         'error_code': error_code,
         'handler': 'error_handler',
+        'user_id': getattr(principal, 'id', None),
         **(context or {})
     }
     
@@ -129,7 +134,7 @@ def _log_error(error: Exception, error_type: str = "debug") -> None:
     """Log the error and send a debug message."""
     logger.error('%s: %s', error.__class__.__name__, str(error))
     get_message(error, type=error_type)
-    get_message(error, error_type, 'Failed to complete operation', {'user': current_user.id})
+    get_message(error, error_type, 'Failed to complete operation', {'user': getattr(current_principal(), 'id', None)})
 
 def _create_error_response(
     error_code: int,
@@ -191,6 +196,32 @@ def handle_errors(app, CSRFError) -> None:
             additional_context={'error_type': 'rate_limit'}
         )
     
+    @app.errorhandler(LoginThrottled)
+    def handle_login_throttled(e: LoginThrottled):
+        response = _create_error_response(
+            429,
+            e,
+            custom_description=e.description,
+            json_response=True,
+            additional_context={'error_type': 'login_throttled'}
+        )
+        response.status_code = 429
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+    @app.errorhandler(PasswordHasherBusy)
+    def handle_password_hasher_busy(e: PasswordHasherBusy):
+        response = _create_error_response(
+            503,
+            e,
+            custom_description=e.description,
+            json_response=True,
+            additional_context={'error_type': 'password_hasher_busy'}
+        )
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
     @app.errorhandler(ValueError)
     def handle_rate_limit(e: ValueError):
         return _create_error_response(
@@ -0,0 +1,235 @@
+import logging
+import os
+import threading
+import time
+
+import click
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "EdDSA")
+
+
+def _crypto():
+    try:
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+    except ImportError as e:
+        raise RuntimeError("The 'cryptography' package is required for asymmetric JWT_ALGORITHM values") from e
+    return serialization, ed25519, rsa
+
+
+class SigningKey:
+    """One key of the ring. ``private_key`` is None once the key is retired."""
+
+    __slots__ = ("kid", "algorithm", "private_key", "public_key", "created_at")
+
+    def __init__(self, kid, algorithm, private_key, public_key, created_at):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.private_key = private_key
+        self.public_key = public_key
+        self.created_at = created_at
+
+    def to_jwk(self) -> dict:
+        from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+        if self.algorithm == "EdDSA":
+            jwk = OKPAlgorithm.to_jwk(self.public_key, as_dict=True)
+        else:
+            jwk = RSAAlgorithm.to_jwk(self.public_key, as_dict=True)
+        jwk.update(kid=self.kid, alg=self.algorithm, use="sig")
+        return jwk
+
+
+class JwtKeyRing:
+    """
+    Asymmetric JWT signing keys with ``kid`` based rotation.
+
+    Keys live in ``JWT_KEY_DIR`` as PEM files named after their kid:
+
+    - ``<kid>.pem`` holds a private key that can sign and verify
+    - ``<kid>.pub.pem`` holds a retired key that only verifies
+
+    New tokens are signed with ``JWT_ACTIVE_KID`` or, when unset, the newest
+    private key, and carry its kid in the header. Older keys keep verifying
+    until they are retired and deleted, so tokens signed before a rotation
+    stay valid. The public halves are published as a JWKS document so other
+    services can verify tokens offline.
+
+    The ring is only used when ``JWT_ALGORITHM`` is asymmetric (RS256/EdDSA);
+    with HS256 the shared ``JWT_SECRET_KEY`` is used as before.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.algorithm = None
+        self.key_dir = None
+        self.active_kid = None
+        self.reload_interval = 30
+        self._keys = {}
+        self._signing = None
+        self._dir_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self.algorithm = app.config.get('JWT_ALGORITHM', 'HS256')
+        self.enabled = self.algorithm in ASYMMETRIC_ALGORITHMS
+        app.extensions['jwt_keys'] = self
+
+        @app.cli.command('rotate-jwt-key')
+        def rotate_jwt_key_command():
+            """Generate a new signing key; older keys keep verifying."""
+            click.echo(self.generate().kid)
+
+        @app.cli.command('retire-jwt-key')
+        @click.argument('kid')
+        def retire_jwt_key_command(kid):
+            """Drop the private half of a key so it can only verify."""
+            self.retire(kid)
+            click.echo(f"{kid} retired")
+
+        self.key_dir = app.config.get('JWT_KEY_DIR') or os.path.join(app.instance_path, 'jwt_keys')
+        self.active_kid = app.config.get('JWT_ACTIVE_KID') or None
+        self.reload_interval = app.config.get('JWT_KEY_RELOAD_INTERVAL', self.reload_interval)
+        if not self.enabled:
+            return
+
+        os.makedirs(self.key_dir, exist_ok=True)
+        self.load()
+        if self._signing is None:
+            self.generate()
+        # Tokens signed by keys of another family (e.g. before switching from
+        # RS256 to EdDSA) keep verifying while those keys are in the ring.
+        app.config['JWT_DECODE_ALGORITHMS'] = self.decode_algorithms
+
+    def load(self) -> None:
+        """(Re)read every key file in ``key_dir``."""
+        serialization, _, _ = _crypto()
+        keys = {}
+        for name in sorted(os.listdir(self.key_dir)):
+            if not name.endswith('.pem'):
+                continue
+            path = os.path.join(self.key_dir, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            created_at = os.path.getmtime(path)
+            if name.endswith('.pub.pem'):
+                kid = name[:-len('.pub.pem')]
+                public_key = serialization.load_pem_public_key(data)
+                keys.setdefault(kid, SigningKey(kid, self._algorithm_for(public_key), None, public_key, created_at))
+            else:
+                kid = name[:-len('.pem')]
+                private_key = serialization.load_pem_private_key(data, password=None)
+                keys[kid] = SigningKey(kid, self._algorithm_for(private_key), private_key, private_key.public_key(), created_at)
+
+        signers = [key for key in keys.values() if key.private_key is not None and key.algorithm == self.algorithm]
+        signing = keys.get(self.active_kid) if self.active_kid else None
+        if signing is None and signers:
+            signing = max(signers, key=lambda key: key.created_at)
+
+        with self._lock:
+            removed = set(self._keys) - set(keys)
+            self._keys = keys
+            self._signing = signing
+            self._dir_mtime = os.path.getmtime(self.key_dir)
+            self._checked_at = time.monotonic()
+
+        if removed:
+            # Tokens verified with a key that is gone must be verified again.
+            from .decoded_token_cache import decoded_token_cache
+            decoded_token_cache.clear()
+
+    def _maybe_reload(self, force: bool = False) -> None:
+        # Another worker (or an operator) may have rotated the keys; a rotation
+        # always adds or removes a file, which changes the directory's mtime.
+        if not force and time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            if os.path.getmtime(self.key_dir) != self._dir_mtime:
+                self.load()
+        except OSError as e:
+            logger.warning(f"Could not reload JWT keys from {self.key_dir}: {e}")
+
+    def _algorithm_for(self, key) -> str:
+        _, ed25519, rsa = _crypto()
+        if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+            return "EdDSA"
+        if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+            return self.algorithm if self.algorithm.startswith("RS") else "RS256"
+        raise ValueError(f"Unsupported JWT key type {type(key).__name__}")
+
+    def generate(self) -> SigningKey:
+        """Create a new private key for ``algorithm`` and make it the signing key."""
+        if not self.enabled:
+            raise RuntimeError(f"JWT_ALGORITHM {self.algorithm} does not use a key ring")
+        serialization, ed25519, rsa = _crypto()
+        if self.algorithm == "EdDSA":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+        kid = time.strftime('%Y%m%d%H%M%S', time.gmtime()) + '-' + os.urandom(3).hex()
+        path = os.path.join(self.key_dir, f"{kid}.pem")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            ))
+        logger.info(f"Generated JWT signing key {kid}")
+        self.load()
+        return self._keys[kid]
+
+    def retire(self, kid: str) -> None:
+        """Keep only the public half of ``kid``; it verifies but no longer signs."""
+        serialization, _, _ = _crypto()
+        key = self._keys.get(kid)
+        if key is None:
+            raise KeyError(f"Unknown JWT key '{kid}'")
+        with open(os.path.join(self.key_dir, f"{kid}.pub.pem"), 'wb') as f:
+            f.write(key.public_key.public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            ))
+        private_path = os.path.join(self.key_dir, f"{kid}.pem")
+        if os.path.exists(private_path):
+            os.remove(private_path)
+        self.load()
+
+    @property
+    def signing_key(self) -> SigningKey:
+        self._maybe_reload()
+        return self._signing
+
+    def verification_key(self, kid: str):
+        """Public key for ``kid``, or None when the kid is unknown."""
+        key = self._keys.get(kid)
+        if key is None:
+            # A token signed with a key generated since our last check; this
+            # costs one stat() unless the directory really changed.
+            self._maybe_reload(force=True)
+            key = self._keys.get(kid)
+        return key.public_key if key is not None else None
+
+    @property
+    def decode_algorithms(self) -> list:
+        return sorted({key.algorithm for key in self._keys.values()} | {self.algorithm})
+
+    def jwks(self) -> dict:
+        self._maybe_reload()
+        return {"keys": [key.to_jwk() for key in self._keys.values()]}
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "algorithm": self.algorithm,
+            "signing_kid": self._signing.kid if self._signing else None,
+            "kids": sorted(self._keys),
+        }
+
+
+jwt_keys = JwtKeyRing()
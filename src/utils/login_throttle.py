@@ -0,0 +1,187 @@
+import threading
+import time
+
+from flask import request
+from werkzeug.exceptions import TooManyRequests
+
+from .ttl_cache import TTLCache
+
+
+class LoginThrottled(TooManyRequests):
+    """Too many failed logins for the account or the client address."""
+
+    description = "Too many failed login attempts. Please try again later."
+
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after=retry_after)
+
+
+class MemoryThrottleStore:
+    """Failure counters of this process; each entry lives ``window`` seconds."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 100000, window: float = 900):
+        self._entries = TTLCache(maxsize=maxsize, ttl=window)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple:
+        return self._entries.get(key, (0, 0.0))
+
+    def record_failure(self, key: str, window: float) -> int:
+        with self._lock:
+            failures, locked_until = self._entries.get(key, (0, 0.0))
+            self._entries.set(key, (failures + 1, locked_until), ttl=window)
+            return failures + 1
+
+    def lock(self, key: str, until: float, window: float) -> None:
+        with self._lock:
+            failures, _ = self._entries.get(key, (0, 0.0))
+            self._entries.set(key, (failures, until), ttl=max(window, until - time.time()))
+
+    def reset(self, key: str) -> None:
+        self._entries.discard(key)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisThrottleStore:
+    """
+    Failure counters shared by every worker and node through Redis. Each
+    key is a hash with ``failures`` and ``locked_until`` that expires after
+    the window.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, *, prefix: str = "login-throttle:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisThrottleStore':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The 'redis' package is required for LOGIN_THROTTLE_BACKEND='redis'") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: str) -> tuple:
+        failures, locked_until = self.client.hmget(self.prefix + key, "failures", "locked_until")
+        return int(failures or 0), float(locked_until or 0)
+
+    def record_failure(self, key: str, window: float) -> int:
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.prefix + key, "failures", 1)
+        pipe.expire(self.prefix + key, int(window))
+        failures, _ = pipe.execute()
+        return int(failures)
+
+    def lock(self, key: str, until: float, window: float) -> None:
+        pipe = self.client.pipeline()
+        pipe.hset(self.prefix + key, "locked_until", until)
+        pipe.expire(self.prefix + key, int(max(window, until - time.time())) + 1)
+        pipe.execute()
+
+    def reset(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def size(self):
+        return None
+
+
+class LoginThrottle:
+    """
+    Failed-login counters per account and per client address.
+
+    ``check`` runs before the user lookup and the password hash, so a
+    throttled attempt costs no hashing. The first
+    ``LOGIN_THROTTLE_ACCOUNT_ATTEMPTS`` (per username) or
+    ``LOGIN_THROTTLE_IP_ATTEMPTS`` (per address) failures within
+    ``LOGIN_THROTTLE_WINDOW`` seconds are free; every further failure locks
+    the key for twice as long as the previous one, starting at
+    ``LOGIN_THROTTLE_BASE_DELAY`` and capped at ``LOGIN_THROTTLE_MAX_DELAY``.
+    A successful login clears the account counter.
+
+    Unknown usernames are counted like real ones, so the answers do not
+    reveal which accounts exist.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or MemoryThrottleStore()
+        self.enabled = True
+        self.window = 900
+        self.account_attempts = 5
+        self.ip_attempts = 20
+        self.base_delay = 1
+        self.max_delay = 900
+        self._lock = threading.Lock()
+        self._counts = {"checked": 0, "failures": 0, "rejected_account": 0, "rejected_ip": 0}
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('LOGIN_THROTTLE_ENABLED', self.enabled)
+        self.window = app.config.get('LOGIN_THROTTLE_WINDOW', self.window)
+        self.account_attempts = app.config.get('LOGIN_THROTTLE_ACCOUNT_ATTEMPTS', self.account_attempts)
+        self.ip_attempts = app.config.get('LOGIN_THROTTLE_IP_ATTEMPTS', self.ip_attempts)
+        self.base_delay = app.config.get('LOGIN_THROTTLE_BASE_DELAY', self.base_delay)
+        self.max_delay = app.config.get('LOGIN_THROTTLE_MAX_DELAY', self.max_delay)
+
+        name = str(app.config.get('LOGIN_THROTTLE_BACKEND', 'memory')).lower()
+        if name == 'redis':
+            self.store = RedisThrottleStore.from_url(app.config['LOGIN_THROTTLE_REDIS_URL'])
+        elif name == 'memory':
+            self.store = MemoryThrottleStore(
+                maxsize=app.config.get('LOGIN_THROTTLE_CACHE_SIZE', 100000), window=self.window
+            )
+        else:
+            raise ValueError(f"Unknown LOGIN_THROTTLE_BACKEND '{name}'")
+        app.extensions['login_throttle'] = self
+
+    @staticmethod
+    def _keys(username: str, ip: str = None) -> tuple:
+        ip = ip if ip is not None else (request.remote_addr or "unknown")
+        return f"account:{str(username or '').strip().lower()}", f"ip:{ip}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def check(self, username: str, ip: str = None) -> None:
+        """Raise ``LoginThrottled`` while the account or the address is locked."""
+        if not self.enabled:
+            return
+        self._count("checked")
+        now = time.time()
+        for key in self._keys(username, ip):
+            _, locked_until = self.store.get(key)
+            if locked_until > now:
+                self._count("rejected_account" if key.startswith("account:") else "rejected_ip")
+                raise LoginThrottled(retry_after=int(locked_until - now) + 1)
+
+    def failure(self, username: str, ip: str = None) -> None:
+        if not self.enabled:
+            return
+        self._count("failures")
+        account_key, ip_key = self._keys(username, ip)
+        for key, free in ((account_key, self.account_attempts), (ip_key, self.ip_attempts)):
+            failures = self.store.record_failure(key, self.window)
+            if failures > free:
+                delay = min(self.max_delay, self.base_delay * 2 ** (failures - free - 1))
+                self.store.lock(key, time.time() + delay, self.window)
+
+    def success(self, username: str, ip: str = None) -> None:
+        if not self.enabled:
+            return
+        self.store.reset(self._keys(username, ip)[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        counts["rejected"] = counts["rejected_account"] + counts["rejected_ip"]
+        counts["backend"] = self.store.name
+        counts["tracked_keys"] = self.store.size()
+        return counts
+
+
+login_throttle = LoginThrottle()
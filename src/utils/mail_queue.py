@@ -0,0 +1,180 @@
+import logging
+import os
+import queue
+import threading
+
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCooldown:
+    """Per-key cooldowns of this process."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 100000):
+        self._until = TTLCache(maxsize=maxsize, ttl=3600)
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, seconds: float) -> bool:
+        """True if ``key`` was not cooling down; it is from now on."""
+        with self._lock:
+            if key in self._until:
+                return False
+            self._until.set(key, True, ttl=seconds)
+            return True
+
+    def release(self, key: str) -> None:
+        """End the cooldown of ``key`` early, e.g. because nothing was sent."""
+        self._until.discard(key)
+
+
+class RedisCooldown:
+    """Per-key cooldowns shared by every worker and node through Redis."""
+
+    name = "redis"
+
+    def __init__(self, client, *, prefix: str = "mail-cooldown:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisCooldown':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The 'redis' package is required for MAIL_COOLDOWN_BACKEND='redis'") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def acquire(self, key: str, seconds: float) -> bool:
+        return bool(self.client.set(self.prefix + key, 1, ex=max(int(seconds), 1), nx=True))
+
+    def release(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+class MailQueue:
+    """
+    Sends emails on a background thread so requests never wait for SMTP.
+
+    ``submit`` puts a job (a callable that renders and sends one message) on
+    a bounded queue and returns at once. Jobs run inside an app context.
+    With a ``cooldown_key`` a job is dropped while the same key was submitted
+    less than ``cooldown`` seconds ago, which debounces resends to one
+    address. A job that is dropped or fails releases its key again, so the
+    next submit is not suppressed for an email that never went out.
+    Cooldowns live in process memory or, with
+    ``MAIL_COOLDOWN_BACKEND = "redis"``, are shared by all workers.
+
+    ``MAIL_QUEUE_ENABLED = False`` runs jobs inline, e.g. for tests.
+    """
+
+    QUEUED = "queued"
+    COOLDOWN = "cooldown"
+    FULL = "full"
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.cooldown = MemoryCooldown()
+        self._queue = queue.Queue(maxsize=1000)
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        self._counts = {"queued": 0, "sent": 0, "failed": 0, "suppressed": 0, "dropped": 0}
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.enabled = app.config.get('MAIL_QUEUE_ENABLED', self.enabled)
+        self._queue = queue.Queue(maxsize=app.config.get('MAIL_QUEUE_SIZE', 1000))
+
+        name = str(app.config.get('MAIL_COOLDOWN_BACKEND', 'memory')).lower()
+        if name == 'redis':
+            self.cooldown = RedisCooldown.from_url(app.config['MAIL_COOLDOWN_REDIS_URL'])
+        elif name == 'memory':
+            self.cooldown = MemoryCooldown()
+        else:
+            raise ValueError(f"Unknown MAIL_COOLDOWN_BACKEND '{name}'")
+        app.extensions['mail_queue'] = self
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def submit(self, job, *, cooldown_key: str = None, cooldown: float = 0) -> str:
+        """
+        Returns:
+            str: ``QUEUED``, ``COOLDOWN`` (suppressed) or ``FULL`` (dropped)
+        """
+        if not (cooldown_key and cooldown):
+            cooldown_key = None
+        elif not self.cooldown.acquire(cooldown_key, cooldown):
+            self._count("suppressed")
+            return self.COOLDOWN
+
+        if not self.enabled:
+            self._count("queued")
+            self._run(job, cooldown_key)
+            return self.QUEUED
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((job, cooldown_key))
+        except queue.Full:
+            self._count("dropped")
+            logger.warning("Mail queue is full; dropping an email")
+            self._release(cooldown_key)
+            return self.FULL
+        self._count("queued")
+        return self.QUEUED
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive a fork, so every worker process starts its own.
+        if self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread_pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name="mail-queue", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _work(self) -> None:
+        while True:
+            job, cooldown_key = self._queue.get()
+            try:
+                self._run(job, cooldown_key)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job, cooldown_key=None) -> None:
+        try:
+            with self.app.app_context():
+                job()
+            self._count("sent")
+        except Exception as e:
+            self._count("failed")
+            logger.error(f"Sending email failed: {e}")
+            self._release(cooldown_key)
+
+    def _release(self, cooldown_key) -> None:
+        if cooldown_key is None:
+            return
+        try:
+            self.cooldown.release(cooldown_key)
+        except Exception as e:
+            logger.warning(f"Could not release mail cooldown '{cooldown_key}': {e}")
+
+    def join(self) -> None:
+        """Block until every queued email has been handled."""
+        self._queue.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        counts["depth"] = self._queue.qsize()
+        counts["cooldown_backend"] = self.cooldown.name
+        return counts
+
+
+mail_queue = MailQueue()
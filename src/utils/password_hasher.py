@@ -0,0 +1,381 @@
+import atexit
+import json
+import logging
+import math
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import click
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+logger = logging.getLogger(__name__)
+
+# Bounds for calibrated costs. scrypt memory is 128 * n * r bytes per hash,
+# so the upper n keeps one hash at 128 MiB.
+MIN_SCRYPT_N = 2 ** 14
+MAX_SCRYPT_N = 2 ** 17
+MIN_PBKDF2_ITERATIONS = 310000
+MAX_PBKDF2_ITERATIONS = 10000000
+
+
+class PasswordHasherBusy(ServiceUnavailable):
+    """Every hashing slot is taken; the request is rejected instead of queued."""
+
+    description = "The server is busy verifying passwords. Please try again shortly."
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(retry_after=retry_after)
+
+
+class _StillHashing(Exception):
+    """A call timed out while a worker was already running it."""
+
+    def __init__(self, future):
+        super().__init__()
+        self.future = future
+
+
+def default_start_method() -> str:
+    """
+    "forkserver" where available, else "spawn". Never "fork": by the time the
+    pool starts this process runs other threads (blocklist listener, mail
+    queue, purge, server threads), and a forked child can deadlock on a lock
+    one of them held.
+    """
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+# Run inside the worker processes. They return the wall-clock start and end
+# so the parent can tell time spent waiting for a worker from time hashing.
+def _hash_password(password, method=None):
+    started = time.time()
+    kwargs = {"method": method} if method else {}
+    result = generate_password_hash(password, **kwargs)
+    return result, started, time.time()
+
+
+def _verify_password(pwhash, password):
+    started = time.time()
+    result = check_password_hash(pwhash, password)
+    return result, started, time.time()
+
+
+def canonical_method(method: str) -> str:
+    """
+    ``method`` with werkzeug's defaults filled in, as it appears in the
+    hashes it produces ("scrypt" -> "scrypt:32768:8:1").
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        return method if len(args) == 3 else "scrypt:32768:8:1"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = args[1] if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Unsupported PASSWORD_HASH_METHOD '{method}'")
+
+
+def has_cost(method: str) -> bool:
+    """Whether ``method`` pins its work factor instead of leaving it to calibration."""
+    name, *args = method.split(":")
+    return len(args) == (3 if name == "scrypt" else 2)
+
+
+def hash_method(pwhash: str) -> str:
+    """The method a stored hash was made with ("pbkdf2:sha256:600000")."""
+    return (pwhash or "").split("$", 1)[0]
+
+
+def _time_hash(method: str, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        generate_password_hash("calibration", method=method)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_method(method: str, target_ms: float, samples: int = 3) -> tuple:
+    """
+    Pick the work factor of ``method`` whose hash takes about ``target_ms``
+    on this machine. Cost grows linearly, so one cheap probe is scaled up.
+
+    Returns:
+        tuple: (method with its cost, measured milliseconds)
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        r, p = (int(args[1]), int(args[2])) if len(args) == 3 else (8, 1)
+        elapsed = _time_hash(f"scrypt:{MIN_SCRYPT_N}:{r}:{p}", samples)
+        # n must be a power of two
+        n = 2 ** round(math.log2(MIN_SCRYPT_N * target_ms / elapsed))
+        method = f"scrypt:{min(max(n, MIN_SCRYPT_N), MAX_SCRYPT_N)}:{r}:{p}"
+    elif name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        probe = 100000
+        elapsed = _time_hash(f"pbkdf2:{hash_name}:{probe}", samples)
+        iterations = probe * target_ms / elapsed
+        # Two significant digits, so workers calibrating apart agree
+        iterations = int(round(iterations, 1 - int(math.log10(iterations))))
+        iterations = min(max(iterations, MIN_PBKDF2_ITERATIONS), MAX_PBKDF2_ITERATIONS)
+        method = f"pbkdf2:{hash_name}:{iterations}"
+    else:
+        raise ValueError(f"Unsupported PASSWORD_HASH_METHOD '{method}'")
+    return method, round(_time_hash(method, 1), 1)
+
+
+class PasswordHasher:
+    """
+    Password hashing and verification on a bounded process pool.
+
+    scrypt/pbkdf2 hold the CPU for tens of milliseconds, so running them on
+    the request thread lets a login storm pin every worker thread. Calls are
+    handed to ``PASSWORD_HASH_WORKERS`` processes instead; at most
+    ``PASSWORD_HASH_MAX_QUEUE`` more may wait for a free process. Beyond
+    that ``PasswordHasherBusy`` (503 with Retry-After) is raised right away,
+    or after ``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds when that is set. A call
+    still running after ``PASSWORD_HASH_TIMEOUT`` seconds is answered with
+    ``PasswordHasherBusy`` too, but holds its slot until the worker is done.
+
+    ``PASSWORD_HASH_WORKERS = 0`` hashes on the calling thread with the same
+    limits. The pool is created on first use in each process, so forking
+    servers (gunicorn --preload) get one pool per worker. Its processes are
+    started with ``PASSWORD_HASH_START_METHOD`` (see ``default_start_method``);
+    the forkserver imports this module once and forks the workers from its
+    single thread. Like any spawned process they import the main module, so
+    scripts must keep their side effects under ``if __name__ == "__main__"``.
+
+    New hashes use ``PASSWORD_HASH_METHOD``. With ``PASSWORD_HASH_TARGET_MS``
+    set and no cost in the method ("scrypt", "pbkdf2:sha256"), the cost is
+    calibrated at startup to take about that long here. The result is kept
+    in ``PASSWORD_HASH_CALIBRATION_FILE`` so every worker uses the same
+    parameters, and written back to ``PASSWORD_HASH_METHOD``. Run
+    ``flask calibrate-password-hash`` to measure again. Logins re-hash
+    passwords whose stored method differs (``upgrade_password_hash``).
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = None):
+        self.workers = workers if workers is not None else min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue if max_queue is not None else self.workers * 4
+        self.queue_timeout = 0.0
+        self.timeout = 10.0
+        self.start_method = default_start_method()
+        self.method = canonical_method("scrypt")
+        self.calibration = None
+        self._slots = threading.BoundedSemaphore(max(1, self.workers) + self.max_queue)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app) -> None:
+        self.workers = int(app.config.get('PASSWORD_HASH_WORKERS', self.workers))
+        self.max_queue = int(app.config.get('PASSWORD_HASH_MAX_QUEUE', self.workers * 4))
+        self.queue_timeout = float(app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', self.queue_timeout))
+        self.timeout = float(app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout))
+        self.start_method = app.config.get('PASSWORD_HASH_START_METHOD') or self.start_method
+        self.shutdown()
+        self._slots = threading.BoundedSemaphore(max(1, self.workers) + self.max_queue)
+
+        requested = method = app.config.get('PASSWORD_HASH_METHOD') or 'scrypt'
+        target_ms = float(app.config.get('PASSWORD_HASH_TARGET_MS') or 0)
+        calibration_file = (app.config.get('PASSWORD_HASH_CALIBRATION_FILE')
+                            or os.path.join(app.instance_path, 'password_hash.json'))
+        self.calibration = None
+        if target_ms > 0 and not has_cost(method):
+            self.calibration = self._load_calibration(calibration_file, method, target_ms)
+            if self.calibration is None:
+                self.calibration = self.calibrate(method, target_ms, calibration_file)
+            method = self.calibration['method']
+        self.method = canonical_method(method)
+        app.config['PASSWORD_HASH_METHOD'] = self.method
+        app.extensions['password_hasher'] = self
+
+        @app.cli.command('calibrate-password-hash')
+        def calibrate_password_hash_command():
+            """Measure the password hash cost for PASSWORD_HASH_TARGET_MS again."""
+            if target_ms <= 0:
+                click.echo("PASSWORD_HASH_TARGET_MS is not set")
+                return
+            result = self.calibrate(requested, target_ms, calibration_file, overwrite=True)
+            click.echo(f"{result['method']} ({result['measured_ms']} ms) written to {calibration_file}")
+
+    def calibrate(self, method: str, target_ms: float, path: str = None, overwrite: bool = False) -> dict:
+        """
+        Calibrate ``method`` and store the result in ``path``. Unless
+        ``overwrite`` is set, a file written meanwhile by another worker wins.
+        """
+        calibrated, measured_ms = calibrate_method(method, target_ms)
+        result = {
+            "requested": method,
+            "method": calibrated,
+            "target_ms": target_ms,
+            "measured_ms": measured_ms,
+            "cpu_count": os.cpu_count(),
+            "calibrated_at": int(time.time()),
+        }
+        logger.info("Password hashing calibrated to %s (%s ms)", calibrated, measured_ms)
+        if not path:
+            return result
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            with open(path, "w" if overwrite else "x") as f:
+                json.dump(result, f, indent=2)
+        except FileExistsError:
+            return self._load_calibration(path, method, target_ms) or result
+        except OSError as e:
+            logger.warning("Could not save password hash calibration to %s: %s", path, e)
+        return result
+
+    @staticmethod
+    def _load_calibration(path: str, method: str, target_ms: float):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("requested") != method or data.get("target_ms") != target_ms:
+            return None
+        return data
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Whether ``pwhash`` was made with other parameters than ``self.method``."""
+        return bool(pwhash) and hash_method(pwhash) != self.method
+
+    def rehash(self, password: str) -> str:
+        """``hash`` for a password whose stored hash ``needs_rehash``."""
+        pwhash = self.hash(password)
+        with self._lock:
+            self._rehashed += 1
+        return pwhash
+
+    def hash(self, password: str, method: str = None) -> str:
+        return self._run("hash", _hash_password, password, method or self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        if not pwhash:
+            return False
+        return self._run("verify", _verify_password, pwhash, password)
+
+    def _run(self, kind, func, *args):
+        if self.queue_timeout > 0:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy()
+
+        submitted = time.time()
+        with self._lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            result, started, finished = self._call(func, args)
+        except _StillHashing as running:
+            # The worker cannot be interrupted, so the slot stays taken until
+            # it is done; otherwise timed-out hashes would pile up unbounded.
+            running.future.add_done_callback(self._release)
+            raise PasswordHasherBusy() from None
+        except BaseException:
+            self._release()
+            raise
+        self._release()
+
+        with self._lock:
+            self._calls[kind] += 1
+            queued_ms = max(0.0, started - submitted) * 1000
+            hashing_ms = (finished - started) * 1000
+            self._queued_ms += queued_ms
+            self._hashing_ms += hashing_ms
+            self._max_queued_ms = max(self._max_queued_ms, queued_ms)
+            self._max_hashing_ms = max(self._max_hashing_ms, hashing_ms)
+        return result
+
+    def _call(self, func, args):
+        executor = self._get_executor()
+        if executor is None:
+            return func(*args)
+        future = executor.submit(func, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            if future.cancel():
+                raise PasswordHasherBusy()
+            raise _StillHashing(future)
+        except BrokenProcessPool:
+            # A worker died (OOM killer, signal); start a fresh pool next time.
+            logger.warning("Password hashing pool is broken, restarting it")
+            self.shutdown()
+            return func(*args)
+
+    def _release(self, future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None
+        if self._executor is not None and self._executor_pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                context = multiprocessing.get_context(self.start_method)
+                if self.start_method == "forkserver":
+                    # Only this module, not __main__, is imported by the server.
+                    context.set_forkserver_preload([__name__])
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reset_stats(self) -> None:
+        self._calls = {"hash": 0, "verify": 0}
+        self._rehashed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._queued_ms = 0.0
+        self._hashing_ms = 0.0
+        self._max_queued_ms = 0.0
+        self._max_hashing_ms = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = sum(self._calls.values())
+            return {
+                "method": self.method,
+                "calibrated": self.calibration is not None,
+                "rehashed": self._rehashed,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "hashes": self._calls["hash"],
+                "verifies": self._calls["verify"],
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+                "avg_queued_ms": round(self._queued_ms / done, 3) if done else 0.0,
+                "avg_hashing_ms": round(self._hashing_ms / done, 3) if done else 0.0,
+                "max_queued_ms": round(self._max_queued_ms, 3),
+                "max_hashing_ms": round(self._max_hashing_ms, 3),
+            }
+
+
+password_hasher = PasswordHasher()
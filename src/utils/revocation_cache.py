@@ -0,0 +1,67 @@
+import time
+
+from .ttl_cache import TTLCache
+
+
+class RevokedTokenCache:
+    """
+    In-process cache in front of the ``TokenBlocklist`` lookup.
+
+    ``check_if_token_revoked`` runs on every protected request, so the answer
+    for each JTI is remembered here:
+
+    - Negative entries (token not revoked) live for at most
+      ``REVOKED_TOKEN_CACHE_TTL`` seconds and never beyond the token's ``exp``.
+    - Positive entries (token revoked) are written by the logout routes and
+      live until the token expires, after which the JWT is rejected anyway.
+
+    The cache is per process, so a logout handled by another worker is only
+    seen here once the negative entry expires.
+    """
+
+    def __init__(self, maxsize: int = 10000, negative_ttl: float = 60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+
+    def init_app(self, app) -> None:
+        """Read the size bound and negative TTL from the application config."""
+        self._cache.configure(
+            maxsize=app.config.get('REVOKED_TOKEN_CACHE_SIZE', self._cache.maxsize),
+            ttl=app.config.get('REVOKED_TOKEN_CACHE_TTL', self._cache.ttl),
+        )
+        app.extensions['revoked_token_cache'] = self
+
+    def lookup(self, jti: str):
+        """
+        Returns:
+            bool | None: True/False when the answer is cached, None on a miss
+        """
+        return self._cache.get(jti)
+
+    def mark_revoked(self, jti: str, exp: float = None) -> None:
+        """Remember that ``jti`` is revoked until the token expires."""
+        self._cache.set(jti, True, ttl=self._remaining(exp, default=self._cache.ttl))
+
+    def mark_valid(self, jti: str, exp: float = None) -> None:
+        """Remember that ``jti`` is not revoked, capped at the token's ``exp``."""
+        ttl = self._cache.ttl
+        if exp is not None:
+            ttl = min(ttl, self._remaining(exp, default=ttl))
+        self._cache.set(jti, False, ttl=ttl)
+
+    def discard(self, jti: str) -> None:
+        self._cache.discard(jti)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    @staticmethod
+    def _remaining(exp, *, default: float) -> float:
+        if exp is None:
+            return default
+        return float(exp) - time.time()
+
+
+revoked_token_cache = RevokedTokenCache()
@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SharedRevocationSet:
+    """
+    Host-wide set of revoked JTIs backed by a memory-mapped file.
+
+    Every gunicorn worker on the host maps the same file, so a logout handled
+    by one worker is visible to all others immediately, without a database or
+    network hop.
+
+    File layout::
+
+        header  32 bytes   magic (8) | number of slots (8) | reserved (16)
+        slots   24 bytes   blake2b-128 digest of the JTI (16) | exp (8)
+
+    The table uses open addressing with linear probing. An all-zero digest
+    marks an empty slot; slots whose ``exp`` has passed are reused by later
+    inserts. Readers never lock: a lookup that races with a write sees either
+    the old or the new digest, and a partially written digest simply does not
+    match. Writers serialise on an exclusive ``flock`` of the file.
+    """
+
+    MAGIC = b"JTIREV01"
+    HEADER = struct.Struct("<8sQ16x")
+    SLOT_SIZE = 24
+    EXPIRY = struct.Struct("<Q")
+    EMPTY = bytes(16)
+
+    def __init__(self, path: str = None, slots: int = 65536):
+        self.path = path
+        self.slots = slots
+        self._fd = None
+        self._map = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Configure the file location and table size.
+
+        ``SHARED_REVOCATION_SET_PATH`` defaults to a file in the instance folder;
+        set it to an empty string to disable the shared set.
+        """
+        path = app.config.get('SHARED_REVOCATION_SET_PATH')
+        if path is None:
+            path = os.path.join(app.instance_path, 'revoked_jtis.bin')
+        self.close()
+        self.path = path or None
+        self.slots = app.config.get('SHARED_REVOCATION_SET_SLOTS', self.slots)
+        app.extensions['shared_revocation_set'] = self
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _mapping(self):
+        # Workers are forked after the app is created, so each process opens
+        # its own mapping the first time it needs it.
+        if self._map is not None and self._pid == os.getpid():
+            return self._map
+
+        with self._lock:
+            if self._map is not None and self._pid == os.getpid():
+                return self._map
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._flock(fd, exclusive=True)
+            try:
+                size = os.fstat(fd).st_size
+                header = os.pread(fd, self.HEADER.size, 0) if size >= self.HEADER.size else b""
+                if len(header) == self.HEADER.size and header[:8] == self.MAGIC:
+                    self.slots = self.HEADER.unpack(header)[1]
+                else:
+                    os.ftruncate(fd, self.HEADER.size + self.slots * self.SLOT_SIZE)
+                    os.pwrite(fd, self.HEADER.pack(self.MAGIC, self.slots), 0)
+            finally:
+                self._flock(fd, exclusive=False)
+
+            self._fd = fd
+            self._map = mmap.mmap(fd, self.HEADER.size + self.slots * self.SLOT_SIZE)
+            self._pid = os.getpid()
+            return self._map
+
+    @staticmethod
+    def _flock(fd, *, exclusive: bool) -> None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_UN)
+
+    @classmethod
+    def _digest(cls, jti: str) -> bytes:
+        digest = hashlib.blake2b(jti.encode('utf-8'), digest_size=16).digest()
+        return digest if digest != cls.EMPTY else b"\x00" * 15 + b"\x01"
+
+    def _probe(self, digest: bytes):
+        start = int.from_bytes(digest[:8], 'little') % self.slots
+        for step in range(self.slots):
+            yield self.HEADER.size + ((start + step) % self.slots) * self.SLOT_SIZE
+
+    def contains(self, jti: str) -> bool:
+        """Return True if ``jti`` is in the set and its token has not expired."""
+        if not self.enabled:
+            return False
+        try:
+            buf = self._mapping()
+        except OSError as e:
+            logger.warning(f"Shared revocation set unavailable: {e}")
+            return False
+
+        digest = self._digest(jti)
+        now = int(time.time())
+        for offset in self._probe(digest):
+            stored = buf[offset:offset + 16]
+            if stored == self.EMPTY:
+                return False
+            if stored == digest:
+                return self.EXPIRY.unpack_from(buf, offset + 16)[0] > now
+        return False
+
+    def add(self, jti: str, exp: float = None) -> bool:
+        """
+        Insert ``jti`` until ``exp`` (unix seconds).
+
+        Returns:
+            bool: False when the set is disabled, unavailable or full
+        """
+        return self.add_many([(jti, exp)]) == 1
+
+    def add_many(self, items) -> int:
+        """
+        Insert ``(jti, exp)`` pairs while holding the file lock once.
+
+        Returns:
+            int: How many were stored
+        """
+        if not self.enabled:
+            return 0
+        try:
+            buf = self._mapping()
+        except OSError as e:
+            logger.warning(f"Shared revocation set unavailable: {e}")
+            return 0
+
+        now = int(time.time())
+        stored_count = 0
+        self._flock(self._fd, exclusive=True)
+        try:
+            for jti, exp in items:
+                expires = int(exp) if exp is not None else now + 24 * 3600
+                if not self._insert(buf, self._digest(jti), expires, now):
+                    logger.warning("Shared revocation set is full; raise SHARED_REVOCATION_SET_SLOTS.")
+                    break
+                stored_count += 1
+            return stored_count
+        finally:
+            self._flock(self._fd, exclusive=False)
+
+    def _insert(self, buf, digest: bytes, expires: int, now: int) -> bool:
+        target = None
+        for offset in self._probe(digest):
+            stored = buf[offset:offset + 16]
+            if stored == digest:
+                target = offset
+                break
+            if stored == self.EMPTY:
+                target = target if target is not None else offset
+                break
+            if target is None and self.EXPIRY.unpack_from(buf, offset + 16)[0] <= now:
+                target = offset
+
+        if target is None:
+            return False
+
+        # Expiry first, digest last: a reader only matches once the
+        # digest is complete, and by then the expiry is already in place.
+        current = self.EXPIRY.unpack_from(buf, target + 16)[0] if buf[target:target + 16] == digest else 0
+        self.EXPIRY.pack_into(buf, target + 16, max(current, expires))
+        buf[target:target + 16] = digest
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None and self._pid == os.getpid():
+                self._map.close()
+                os.close(self._fd)
+            self._map = None
+            self._fd = None
+            self._pid = None
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        try:
+            buf = self._mapping()
+        except OSError as e:
+            return {"enabled": True, "error": str(e)}
+
+        now = int(time.time())
+        used = live = 0
+        for index in range(self.slots):
+            offset = self.HEADER.size + index * self.SLOT_SIZE
+            if buf[offset:offset + 16] != self.EMPTY:
+                used += 1
+                if self.EXPIRY.unpack_from(buf, offset + 16)[0] > now:
+                    live += 1
+        return {"enabled": True, "path": self.path, "slots": self.slots, "used": used, "live": live}
+
+
+shared_revocation_set = SharedRevocationSet()
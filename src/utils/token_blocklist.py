@@ -0,0 +1,240 @@
+import logging
+import os
+
+from .blocklist_backends import (
+    BlocklistBackend, SqlBlocklistBackend, MemoryBlocklistBackend, RedisBlocklistBackend
+)
+from .revocation_cache import revoked_token_cache
+from .bloom_filter import revoked_jti_filter
+from .shared_revocation_set import shared_revocation_set
+from .token_epoch import token_epochs
+from .decoded_token_cache import decoded_token_cache
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBlocklistManager:
+    """
+    Single entry point for revoking JWTs and checking revocations.
+
+    A lookup walks the cheapest layers first and only reaches the backend
+    when none of them can answer:
+
+    1. the user's token epoch ("log out everywhere", cached per user)
+    2. the host-wide shared revocation set (positive answers only)
+    3. the per-process revoked-token cache
+    4. the Bloom filter of revoked JTIs (definite negatives only)
+    5. the configured ``BlocklistBackend``
+
+    ``revoke`` writes to the backend, warms every local layer and publishes
+    the revocation so other nodes can warm theirs. ``rotate`` does the same
+    for single-use refresh tokens, telling the caller whether it won the
+    race to use the token. ``revoke_all_for_user``
+    bumps the user's token epoch and publishes the new value.
+
+    ``revoke_many`` and ``revoke_all_for_users`` are the bulk forms: one
+    backend write, one pass over the local layers and one published event
+    per batch.
+    """
+
+    BACKENDS = {
+        'sql': SqlBlocklistBackend,
+        'memory': MemoryBlocklistBackend,
+    }
+
+    def __init__(self, backend: BlocklistBackend = None):
+        self.backend = backend or SqlBlocklistBackend()
+        self._subscribed_pid = None
+
+    def init_app(self, app) -> None:
+        """Pick the backend named by ``TOKEN_BLOCKLIST_BACKEND``."""
+        name = str(app.config.get('TOKEN_BLOCKLIST_BACKEND', 'sql')).lower()
+        if name == 'redis':
+            backend = RedisBlocklistBackend.from_url(
+                app.config['TOKEN_BLOCKLIST_REDIS_URL'],
+                channel=app.config.get('TOKEN_BLOCKLIST_CHANNEL', 'jwt:revocations'),
+            )
+        elif name in self.BACKENDS:
+            backend = self.BACKENDS[name]()
+        else:
+            raise ValueError(f"Unknown TOKEN_BLOCKLIST_BACKEND '{name}'")
+
+        self.set_backend(backend)
+        app.extensions['token_blocklist'] = self
+
+    def set_backend(self, backend: BlocklistBackend) -> None:
+        """Swap the backend and reset the layers that were filled from the old one."""
+        self.backend = backend
+        self._subscribed_pid = None
+        revoked_token_cache.clear()
+        revoked_jti_filter.loader = backend.load_since
+        revoked_jti_filter.reset()
+
+    def _ensure_subscribed(self) -> None:
+        # Listener threads do not survive a fork, so subscribe once per worker.
+        if self._subscribed_pid != os.getpid():
+            self._subscribed_pid = os.getpid()
+            self.backend.subscribe(self._on_event)
+
+    def _on_event(self, message: dict) -> None:
+        if 'jti' in message:
+            self._remember(message['jti'], message.get('exp'))
+        elif 'jtis' in message:
+            self._remember_many(message['jtis'])
+        elif 'user_id' in message:
+            token_epochs.remember(message['user_id'], message.get('token_epoch'))
+        elif 'token_epochs' in message:
+            for user_id, epoch in message['token_epochs'].items():
+                token_epochs.remember(int(user_id), epoch)
+
+    def _remember(self, jti: str, exp: float = None) -> None:
+        revoked_token_cache.mark_revoked(jti, exp)
+        revoked_jti_filter.add(jti)
+        shared_revocation_set.add(jti, exp)
+        decoded_token_cache.discard_jti(jti)
+
+    def _remember_many(self, items) -> None:
+        # Same as _remember, with the shared set's file lock taken once
+        for jti, exp in items:
+            revoked_token_cache.mark_revoked(jti, exp)
+            revoked_jti_filter.add(jti)
+            decoded_token_cache.discard_jti(jti)
+        shared_revocation_set.add_many(items)
+
+    def is_revoked(self, jwt_payload: dict) -> bool:
+        self._ensure_subscribed()
+        jti = jwt_payload["jti"]
+        exp = jwt_payload.get("exp")
+
+        if token_epochs.is_stale(jwt_payload):
+            return True
+
+        # Revocations made by any worker on this host show up here first, so
+        # the per-process cache and filter below cannot hide them.
+        if shared_revocation_set.contains(jti):
+            revoked_token_cache.mark_revoked(jti, exp)
+            return True
+
+        revoked = revoked_token_cache.lookup(jti)
+        if revoked is not None:
+            return revoked
+
+        if not revoked_jti_filter.might_contain(jti):
+            revoked_token_cache.mark_valid(jti, exp)
+            return False
+
+        revoked = self.backend.is_revoked(jti)
+        if revoked:
+            revoked_token_cache.mark_revoked(jti, exp)
+            shared_revocation_set.add(jti, exp)
+        else:
+            revoked_token_cache.mark_valid(jti, exp)
+        return revoked
+
+    def revoke(self, jwt_payload: dict) -> dict:
+        """
+        Revoke the token described by ``jwt_payload``.
+
+        Returns:
+            dict: The stored revocation record
+        """
+        jti = jwt_payload["jti"]
+        exp = jwt_payload.get("exp")
+        sub = jwt_payload.get("sub")
+
+        record = self.backend.revoke(
+            jti=jti,
+            token_type=jwt_payload.get("type", "access"),
+            user_id=int(sub) if str(sub).isdigit() else None,
+            expires_at=exp,
+        )
+        self._remember(jti, exp)
+        self.backend.publish({'jti': jti, 'exp': exp})
+        return record
+
+    def rotate(self, jwt_payload: dict) -> bool:
+        """
+        Atomically revoke a single-use token (e.g. a refresh token) on use.
+
+        Returns:
+            bool: True for the first caller, False if the token was already
+            used, in which case no new tokens should be issued
+        """
+        jti = jwt_payload["jti"]
+        exp = jwt_payload.get("exp")
+        sub = jwt_payload.get("sub")
+
+        claimed = self.backend.claim(
+            jti=jti,
+            token_type=jwt_payload.get("type", "refresh"),
+            user_id=int(sub) if str(sub).isdigit() else None,
+            expires_at=exp,
+        )
+        self._remember(jti, exp)
+        if claimed:
+            self.backend.publish({'jti': jti, 'exp': exp})
+        return claimed
+
+    def revoke_many(self, tokens) -> list:
+        """
+        Revoke many tokens with one bulk write.
+
+        Args:
+            tokens: dicts with ``jti`` and optionally ``exp``, ``type`` and
+                ``sub``, e.g. decoded payloads
+
+        Returns:
+            list: The JTIs that were not revoked before
+        """
+        records = [{
+            'jti': token['jti'],
+            'token_type': token.get('type', 'access'),
+            'user_id': int(token['sub']) if str(token.get('sub')).isdigit() else None,
+            'expires_at': token.get('exp'),
+        } for token in tokens]
+        if not records:
+            return []
+
+        revoked = set(self.backend.revoke_many(records))
+        # Only what this call persisted; the rest was revoked (and cached) before
+        items = [[token['jti'], token.get('exp')] for token in tokens if token['jti'] in revoked]
+        self._remember_many(items)
+        if items:
+            self.backend.publish({'jtis': items})
+        return [token['jti'] for token in tokens if token['jti'] in revoked]
+
+    def revoke_all_for_users(self, user_ids) -> dict:
+        """
+        ``revoke_all_for_user`` for many users in one statement.
+
+        Returns:
+            dict: The new token epoch of every existing user, keyed by id
+        """
+        epochs = token_epochs.bump_many(user_ids)
+        if epochs:
+            self.backend.publish({'token_epochs': {str(user_id): epoch for user_id, epoch in epochs.items()}})
+        return epochs
+
+    def revoke_all_for_user(self, user_id: int) -> int:
+        """
+        Invalidate every token issued to ``user_id`` so far.
+
+        Returns:
+            int: The user's new token epoch
+        """
+        epoch = token_epochs.bump(user_id)
+        self.backend.publish({'user_id': user_id, 'token_epoch': epoch})
+        return epoch
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "revoked_token_cache": revoked_token_cache.stats(),
+            "revoked_jti_filter": revoked_jti_filter.stats(),
+            "shared_revocation_set": shared_revocation_set.stats(),
+            "token_epochs": token_epochs.stats(),
+            "decoded_token_cache": decoded_token_cache.stats(),
+        }
+
+
+token_blocklist = TokenBlocklistManager()
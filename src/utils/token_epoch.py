@@ -0,0 +1,126 @@
+import logging
+
+from .ttl_cache import TTLCache
+from .claim_profiles import expand_claims
+
+logger = logging.getLogger(__name__)
+
+
+class TokenEpochStore:
+    """
+    Per-user token epochs ("log out everywhere").
+
+    Every token carries the ``token_epoch`` its user had when it was issued
+    (``te`` under the compact claim profile).
+    Bumping ``User.token_epoch`` therefore invalidates all of that user's
+    outstanding tokens with a single write. Current epochs are cached per user
+    for ``TOKEN_EPOCH_CACHE_TTL`` seconds, so the check normally costs no query.
+    """
+
+    CLAIM = "token_epoch"
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def init_app(self, app) -> None:
+        self._cache.configure(
+            maxsize=app.config.get('TOKEN_EPOCH_CACHE_SIZE', self._cache.maxsize),
+            ttl=app.config.get('TOKEN_EPOCH_CACHE_TTL', self._cache.ttl),
+        )
+        app.extensions['token_epoch'] = self
+
+    def current(self, user_id: int):
+        """
+        Returns:
+            int | None: The user's current epoch, or None if the user does not exist
+        """
+        epoch = self._cache.get(user_id)
+        if epoch is not None:
+            return epoch
+
+        from src.utils import db
+        from src.models import User
+
+        epoch = db.session.query(User.token_epoch).filter_by(id=user_id).scalar()
+        if epoch is not None:
+            self._cache.set(user_id, epoch)
+        return epoch
+
+    def is_stale(self, jwt_payload: dict) -> bool:
+        """True when the token was issued before its user's last epoch bump."""
+        sub = jwt_payload.get("sub")
+        if not str(sub).isdigit():
+            return False
+        current = self.current(int(sub))
+        if current is None:
+            return False
+        return expand_claims(jwt_payload)["token_epoch"] < current
+
+    def bump(self, user_id: int) -> int:
+        """
+        Increment the user's epoch, invalidating every token issued so far.
+
+        Returns:
+            int: The new epoch
+        """
+        from src.utils import db
+        from src.models import User
+
+        try:
+            db.session.query(User).filter_by(id=user_id).update(
+                {User.token_epoch: User.token_epoch + 1}, synchronize_session=False
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        epoch = db.session.query(User.token_epoch).filter_by(id=user_id).scalar()
+        self.remember(user_id, epoch)
+        return epoch
+
+    def bump_many(self, user_ids, chunk_size: int = 1000) -> dict:
+        """
+        ``bump`` for many users with one UPDATE per ``chunk_size`` ids and a
+        single commit.
+
+        Returns:
+            dict: The new epoch of every existing user, keyed by id
+        """
+        from src.utils import db
+        from src.models import User
+
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+        try:
+            for chunk in chunks:
+                db.session.query(User).filter(User.id.in_(chunk)).update(
+                    {User.token_epoch: User.token_epoch + 1}, synchronize_session=False
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        epochs = {}
+        for chunk in chunks:
+            epochs.update(db.session.query(User.id, User.token_epoch).filter(User.id.in_(chunk)).all())
+        for user_id, epoch in epochs.items():
+            self.remember(user_id, epoch)
+        return epochs
+
+    def remember(self, user_id: int, epoch: int) -> None:
+        """Store an epoch learned elsewhere (e.g. from another node)."""
+        if epoch is None:
+            self._cache.discard(user_id)
+        else:
+            self._cache.set(user_id, epoch)
+
+    def discard(self, user_id: int) -> None:
+        self._cache.discard(user_id)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+token_epochs = TokenEpochStore()
@@ -0,0 +1,73 @@
+import logging
+import time
+
+import jwt
+from flask_jwt_extended import decode_token
+
+from .claim_profiles import expand_claims
+from .token_blocklist import token_blocklist
+
+# Claims copied into an active answer; nothing else from the token is disclosed
+INTROSPECTION_CLAIMS = ("sub", "jti", "exp", "iat", "nbf", "aud")
+
+# Rejections that stay true however often the token is presented again:
+# malformed, signed by another (or an unknown) key, or expired
+DEFINITE_REJECTIONS = (jwt.DecodeError, jwt.ExpiredSignatureError)
+
+logger = logging.getLogger(__name__)
+
+
+class UncertainAnswer(dict):
+    """
+    ``{"active": False}`` given because the token could not be checked just
+    now (e.g. not yet valid, or a key or database lookup failed). Callers
+    must not cache it.
+    """
+
+
+def introspect_token(encoded_token: str) -> dict:
+    """
+    Whether ``encoded_token`` is currently accepted by this service (RFC 7662
+    style), answered from the verified-token cache and the revocation layers,
+    so a repeated question costs neither a signature check nor a query.
+
+    Returns:
+        dict: ``{"active": False}``, an ``UncertainAnswer``, or ``active``
+        with the minimal claims, the token type and the expanded role flags
+    """
+    if not isinstance(encoded_token, str) or not encoded_token:
+        return {"active": False}
+    try:
+        claims = decode_token(encoded_token)
+        if token_blocklist.is_revoked(claims):
+            return {"active": False}
+    except DEFINITE_REJECTIONS:
+        return {"active": False}
+    except Exception as e:
+        logger.warning(f"Token introspection could not check a token: {e}")
+        return UncertainAnswer(active=False)
+
+    answer = {"active": True, "token_type": claims.get("type", "access")}
+    answer.update({key: claims[key] for key in INTROSPECTION_CLAIMS if key in claims})
+    roles = expand_claims(claims)
+    answer.update(
+        type_of_user=roles["type_of_user"],
+        is_administrator=roles["is_administrator"],
+        is_ceo_user=roles["is_ceo_user"],
+    )
+    return answer
+
+
+def introspection_max_age(answers, *, cap: int = 0, inactive_max_age: int = 3600) -> int:
+    """
+    Seconds a caller may reuse ``answers``: until the earliest ``exp`` of the
+    active tokens, never beyond ``cap`` when it is set. Expired, revoked and
+    forged tokens stay inactive, so all-inactive answers get ``inactive_max_age``;
+    an ``UncertainAnswer`` among them makes it 0.
+    """
+    if any(isinstance(answer, UncertainAnswer) for answer in answers):
+        return 0
+    now = time.time()
+    ages = [int(answer["exp"] - now) if "exp" in answer else 0 for answer in answers if answer["active"]]
+    max_age = max(0, min(ages)) if ages else inactive_max_age
+    return min(max_age, cap) if cap else max_age
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from flask import request
+from flask_jwt_extended import create_access_token, get_jwt, set_access_cookies
+
+from .access_controller import TokenSubject, create_additional_claims
+from .claim_profiles import get_role_flags
+from .ttl_cache import TTLCache
+from .user_cache import user_cache
+
+
+class ExpiringTokenRefresher:
+    """
+    Implicit refresh of access tokens that are about to expire.
+
+    Runs as an ``after_request`` hook but only does work when the request was
+    actually authenticated with an access token, the response is not an error
+    and the token expires within ``ACCESS_TOKEN_REFRESH_WINDOW`` seconds.
+
+    Each JTI is refreshed once: the new token is cached until the old one
+    expires, so later requests carrying the same token get the same
+    replacement instead of minting another one. Concurrent requests may both
+    mint one (outside the lock); the first one stored is handed to both.
+
+    Like ``Refresh.post``, the replacement's role claims come from the
+    (cached) user, so a role change applies at the next refresh; a deleted
+    user gets no replacement.
+    """
+
+    def __init__(self, window: float = 15 * 60, maxsize: int = 10000):
+        self.window = window
+        self._tokens = TTLCache(maxsize=maxsize, ttl=window)
+        self._lock = threading.Lock()
+        self.refreshed = 0
+
+    def init_app(self, app) -> None:
+        self.window = app.config.get('ACCESS_TOKEN_REFRESH_WINDOW', self.window)
+        self._tokens.configure(
+            maxsize=app.config.get('ACCESS_TOKEN_REFRESH_CACHE_SIZE', self._tokens.maxsize),
+            ttl=self.window,
+        )
+        app.after_request(self.after_request)
+        app.extensions['token_refresher'] = self
+
+    def after_request(self, response):
+        try:
+            jwt_data = get_jwt()
+        except RuntimeError:
+            # No token was verified in this request
+            return response
+        if not jwt_data or jwt_data.get('type') != 'access':
+            return response
+        if response.status_code >= 400 or request.endpoint == 'static':
+            return response
+
+        remaining = jwt_data.get('exp', 0) - time.time()
+        if remaining <= 0 or remaining > self.window:
+            return response
+
+        token = self._replacement(jwt_data, remaining)
+        if token is not None:
+            set_access_cookies(response, token)
+        return response
+
+    def _replacement(self, jwt_data: dict, remaining: float) -> str:
+        jti = jwt_data['jti']
+        token = self._tokens.get(jti)
+        if token is not None:
+            return token
+
+        user = user_cache.get(int(jwt_data['sub'])) if str(jwt_data['sub']).isdigit() else None
+        if user is None:
+            return None
+        # The epoch was just checked against the current one.
+        claims = create_additional_claims(
+            user=user, token_epoch=get_role_flags(jwt_data)["token_epoch"]
+        ) or {}
+        token = create_access_token(identity=TokenSubject(user.id, claims=claims))
+
+        with self._lock:
+            stored = self._tokens.get(jti)
+            if stored is not None:
+                return stored
+            self._tokens.set(jti, token, ttl=remaining)
+            self.refreshed += 1
+        return token
+
+    def stats(self) -> dict:
+        return dict(self._tokens.stats(), refreshed=self.refreshed)
+
+
+token_refresher = ExpiringTokenRefresher()
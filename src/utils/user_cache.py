@@ -0,0 +1,123 @@
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class UserSnapshot:
+    """
+    Read-only copy of the ``User`` columns that protected routes read from
+    ``current_user``. It is detached from any session, so it can be shared
+    between requests. The password hash is not copied.
+    """
+
+    FIELDS = (
+        "id", "email", "username", "firstname", "lastname", "country",
+        "country_tel_code", "phone_number", "address", "address_2",
+        "postal_code", "confirmed", "type_of_user", "created_at",
+    )
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field))
+
+    @classmethod
+    def from_user(cls, user) -> 'UserSnapshot':
+        return cls(**{field: getattr(user, field) for field in cls.FIELDS})
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.firstname or ''} {self.lastname or ''}".strip()
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data["created_at"] = self.created_at.isoformat() if self.created_at else None
+        return data
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id}>"
+
+
+class UserIdentityCache:
+    """
+    Per-process identity map used by ``user_lookup_callback``.
+
+    Users are cached as ``UserSnapshot`` objects for ``USER_CACHE_TTL``
+    seconds. Any flush that changes or deletes a ``User`` evicts its entry
+    once the transaction commits, whichever code path made the change
+    (``User.save``/``update``/``delete``, ``confirm_user_email``,
+    ``delete_user``, ...). Bulk ``query.update()`` calls bypass the flush and
+    rely on the TTL; other workers also only see a change once it expires.
+    """
+
+    _PENDING_KEY = "user_cache_pending"
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._listening = False
+
+    def init_app(self, app) -> None:
+        self._cache.configure(
+            maxsize=app.config.get('USER_CACHE_SIZE', self._cache.maxsize),
+            ttl=app.config.get('USER_CACHE_TTL', self._cache.ttl),
+        )
+        if not self._listening:
+            event.listen(Session, "after_flush", self._after_flush)
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_soft_rollback", self._after_rollback)
+            self._listening = True
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id):
+        """
+        Returns:
+            UserSnapshot | None: The cached or freshly loaded user, None if it does not exist
+        """
+        snapshot = self._cache.get(user_id)
+        if snapshot is not None:
+            return snapshot
+
+        from src.models import User
+
+        user = User.query.filter_by(id=user_id).one_or_none()
+        if user is None:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        self._cache.set(user_id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id) -> None:
+        self._cache.discard(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    def _after_flush(self, session, flush_context) -> None:
+        from src.models import User
+
+        changed = {
+            obj.id for obj in list(session.dirty) + list(session.deleted)
+            if isinstance(obj, User) and obj.id is not None
+        }
+        if changed:
+            session.info.setdefault(self._PENDING_KEY, set()).update(changed)
+
+    def _after_commit(self, session) -> None:
+        for user_id in session.info.pop(self._PENDING_KEY, ()):
+            self.invalidate(user_id)
+
+    def _after_rollback(self, session, previous_transaction) -> None:
+        # Nothing was written, but evicting is cheap and keeps savepoint
+        # rollbacks from leaving an outer transaction's changes untracked.
+        self._after_commit(session)
+
+
+user_cache = UserIdentityCache()
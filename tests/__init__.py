@@ -0,0 +1,7 @@
+import os
+
+# The application modules read these at import time.
+os.environ.setdefault("OPEN_AI_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+# Responses behind auth_required carry the X-Auth-* profile headers
+os.environ.setdefault("AUTH_PROFILE", "true")
@@ -0,0 +1,24 @@
+import warnings
+
+from src import create_app
+from src.utils import db, limiter
+
+_app = None
+
+
+def make_app():
+    """
+    The application on an in-memory SQLite database with every table
+    created. ``create_app`` registers its blueprints on one module-level
+    app, so all tests share it.
+    """
+    global _app
+    if _app is None:
+        warnings.filterwarnings("ignore")
+        _app = create_app()
+        _app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+        db.init_app(_app)
+        limiter.enabled = False
+        with _app.app_context():
+            db.create_all()
+    return _app
@@ -0,0 +1,133 @@
+import fnmatch
+import queue
+import threading
+import time
+
+
+class FakePubSub:
+
+    def __init__(self, server, ignore_subscribe_messages=False):
+        self.server = server
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        self.server.subscribe(channel, self.messages)
+
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+
+class FakePipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+
+class FakeRedis:
+    """
+    The subset of the redis-py client used by the Redis backends, kept in a
+    dictionary: strings with ``ex``/``nx``, hashes, expiry, pub/sub and
+    pipelines.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.channels = {}
+        self.published = []
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self.data[key] = value
+            self.expires.pop(key, None)
+            if ex is not None:
+                self.expires[key] = time.time() + ex
+            return True
+
+    def get(self, key):
+        with self._lock:
+            return self.data.get(key) if self._alive(key) else None
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._alive(key))
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self.expires[key] = time.time() + seconds
+            return True
+
+    def ttl(self, key):
+        with self._lock:
+            if not self._alive(key):
+                return -2
+            return int(self.expires[key] - time.time()) if key in self.expires else -1
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            self._alive(key)
+            entry = self.data.setdefault(key, {})
+            entry[field] = int(entry.get(field, 0)) + amount
+            return entry[field]
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._alive(key)
+            self.data.setdefault(key, {})[field] = value
+            return 1
+
+    def hmget(self, key, *fields):
+        with self._lock:
+            entry = self.data.get(key, {}) if self._alive(key) else {}
+            return [entry.get(field) for field in fields]
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            keys = [key for key in list(self.data) if self._alive(key) and fnmatch.fnmatchcase(key, match)]
+        return iter(keys)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def publish(self, channel, message):
+        with self._lock:
+            self.published.append((channel, message))
+            subscribers = list(self.channels.get(channel, ()))
+        for messages in subscribers:
+            messages.put({"type": "message", "channel": channel, "data": message})
+        return len(subscribers)
+
+    def subscribe(self, channel, messages):
+        with self._lock:
+            self.channels.setdefault(channel, []).append(messages)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self, ignore_subscribe_messages)
@@ -0,0 +1,105 @@
+import importlib
+import unittest
+from unittest import mock
+
+from flask_jwt_extended import create_access_token
+from flask_jwt_extended.exceptions import NoAuthorizationError
+
+from src.models import User
+from src.utils import ClaimsPrincipal, UserSnapshot, auth_required, authenticate, db, user_cache
+
+from tests.app_factory import make_app
+
+# The module, not the helpers src.utils re-exports from it
+access_controller = importlib.import_module("src.utils.access_controller")
+
+
+class AuthenticateTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        with cls.app.app_context():
+            user = User(email="authenticated@example.com", username="authenticated", firstname="A", lastname="U",
+                        password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add(user)
+            db.session.commit()
+            cls.user_id = user.id
+            cls.headers = {"Authorization": f"Bearer {create_access_token(identity=user)}"}
+
+    def test_required_check_does_not_reuse_an_absent_principal(self):
+        with self.app.test_request_context("/"):
+            self.assertIsNone(authenticate(optional=True))
+            with self.assertRaises(NoAuthorizationError):
+                authenticate()
+
+    def test_same_check_is_verified_once(self):
+        with self.app.test_request_context("/", headers=self.headers):
+            principal = authenticate()
+            self.assertEqual(principal.id, self.user_id)
+            self.assertIs(authenticate(), principal)
+
+    def test_claims_principal_is_not_reused_for_a_full_user(self):
+        with self.app.test_request_context("/", headers=self.headers):
+            self.assertIsInstance(authenticate(claims_only=True), ClaimsPrincipal)
+            principal = authenticate(claims_only=False)
+            self.assertIsInstance(principal, UserSnapshot)
+            self.assertEqual(principal.email, "authenticated@example.com")
+
+    def test_stacked_decorators_verify_once(self):
+        @auth_required()
+        @auth_required(roles=("normal",))
+        def view():
+            return "ok"
+
+        verify = mock.Mock(wraps=access_controller.verify_jwt_in_request)
+        with mock.patch.object(access_controller, "verify_jwt_in_request", verify):
+            with self.app.test_request_context("/", headers=self.headers):
+                self.assertEqual(view(), "ok")
+        self.assertEqual(verify.call_count, 1)
+
+    def test_other_locations_verify_again(self):
+        with self.app.test_request_context("/", headers=self.headers):
+            self.assertIsNotNone(authenticate(locations=["headers"]))
+            with self.assertRaises(NoAuthorizationError):
+                authenticate(locations=["cookies"])
+
+
+class AuthProfilerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+        with cls.app.app_context():
+            user = User(email="profiled@example.com", username="profiled", firstname="P", lastname="F",
+                        password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add(user)
+            db.session.commit()
+            cls.headers = {"Authorization": f"Bearer {create_access_token(identity=user)}"}
+
+    def test_authenticated_responses_carry_the_profile(self):
+        response = self.client.get("/api/v1/admin/user", headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(float(response.headers["X-Auth-Verify-Ms"]), 0)
+        self.assertGreaterEqual(float(response.headers["X-Auth-Request-Ms"]),
+                                float(response.headers["X-Auth-Verify-Ms"]))
+
+    def test_query_count_follows_the_user_cache(self):
+        self.client.get("/api/v1/admin/user", headers=self.headers)
+
+        warm = self.client.get("/api/v1/admin/user", headers=self.headers)
+        user_cache.clear()
+        cold = self.client.get("/api/v1/admin/user", headers=self.headers)
+
+        self.assertEqual(warm.headers["X-Auth-Queries"], "0")
+        self.assertEqual(cold.headers["X-Auth-Queries"], "1")
+
+    def test_other_responses_do_not(self):
+        response = self.client.get("/.well-known/jwks.json")
+        self.assertNotIn("X-Auth-Verify-Ms", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import queue
+import time
+import unittest
+
+from src.utils.blocklist_backends import RedisBlocklistBackend
+
+from tests.fake_redis import FakeRedis
+
+
+class RedisBlocklistBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeRedis()
+        self.backend = RedisBlocklistBackend(self.client)
+
+    def test_revoke_marks_jti_until_expiry(self):
+        record = self.backend.revoke(jti="a", token_type="access", user_id=1, expires_at=time.time() + 60)
+
+        self.assertEqual(record["jti"], "a")
+        self.assertTrue(self.backend.is_revoked("a"))
+        self.assertFalse(self.backend.is_revoked("b"))
+        self.assertGreater(self.client.ttl("jwt:blocklist:a"), 0)
+        self.assertEqual(json.loads(self.client.get("jwt:blocklist:a"))["user_id"], 1)
+
+    def test_expired_revocation_is_forgotten(self):
+        self.backend.revoke(jti="a", token_type="access", expires_at=time.time() + 60)
+        self.client.expires["jwt:blocklist:a"] = time.time() - 1
+
+        self.assertFalse(self.backend.is_revoked("a"))
+
+    def test_claim_succeeds_once(self):
+        self.assertTrue(self.backend.claim(jti="r", token_type="refresh", expires_at=time.time() + 60))
+        self.assertFalse(self.backend.claim(jti="r", token_type="refresh", expires_at=time.time() + 60))
+        self.assertTrue(self.backend.is_revoked("r"))
+
+    def test_revoke_many_reports_new_jtis_only(self):
+        self.backend.revoke(jti="a", token_type="access")
+        records = [
+            {"jti": jti, "token_type": "access", "user_id": None, "expires_at": time.time() + 60}
+            for jti in ("a", "b", "c")
+        ]
+
+        self.assertEqual(self.backend.revoke_many(records), ["b", "c"])
+        self.assertTrue(all(self.backend.is_revoked(jti) for jti in "abc"))
+
+    def test_load_since_scans_once(self):
+        self.backend.revoke(jti="a", token_type="access")
+        self.backend.revoke(jti="b", token_type="access")
+
+        jtis, cursor = self.backend.load_since()
+        self.assertEqual(sorted(jtis), ["a", "b"])
+        self.assertEqual(self.backend.load_since(cursor), ([], cursor))
+
+    def test_publish_reaches_subscribers(self):
+        received = queue.Queue()
+        self.backend.subscribe(received.put)
+        other_node = RedisBlocklistBackend(self.client)
+        deadline = time.time() + 2
+        while not self.client.channels.get("jwt:revocations") and time.time() < deadline:
+            time.sleep(0.01)
+
+        other_node.publish({"jti": "a", "exp": 123})
+
+        self.assertEqual(received.get(timeout=2), {"jti": "a", "exp": 123})
+        self.assertEqual(self.client.published, [("jwt:revocations", json.dumps({"jti": "a", "exp": 123}))])
+
+
+if __name__ == "__main__":
+    unittest.main()
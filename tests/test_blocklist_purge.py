@@ -0,0 +1,54 @@
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from src.models import TokenBlocklist
+from src.utils import db, purge_expired_tokens
+
+from tests.app_factory import make_app
+
+
+class PurgeExpiredTokensTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+
+    def add_row(self, expires_at):
+        jti = str(uuid.uuid4())
+        db.session.add(TokenBlocklist(jti=jti, type="access", expires_at=expires_at))
+        db.session.commit()
+        return jti
+
+    def remaining(self, jtis):
+        return {jti for (jti,) in db.session.query(TokenBlocklist.jti).filter(TokenBlocklist.jti.in_(jtis))}
+
+    def test_only_expired_rows_are_removed(self):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        expired = [self.add_row(now - timedelta(hours=1)) for _ in range(5)]
+        live = self.add_row(now + timedelta(minutes=5))
+        unknown = self.add_row(None)
+
+        report = purge_expired_tokens(batch_size=2, now=now)
+
+        self.assertGreaterEqual(report["removed"], len(expired))
+        self.assertEqual(self.remaining(expired + [live, unknown]), {live, unknown})
+
+    def test_max_batches_stops_early(self):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        purge_expired_tokens(now=now)
+        expired = [self.add_row(now - timedelta(hours=1)) for _ in range(3)]
+
+        report = purge_expired_tokens(batch_size=2, max_batches=1, now=now)
+
+        self.assertEqual(report["removed"], 2)
+        self.assertEqual(len(self.remaining(expired)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import uuid
+
+from src.utils.bloom_filter import BloomFilter
+
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        added = [str(uuid.uuid4()) for _ in range(2000)]
+        for jti in added:
+            bloom.add(jti)
+
+        self.assertTrue(all(jti in bloom for jti in added))
+
+    def test_false_positive_rate_stays_near_the_target(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        for _ in range(2000):
+            bloom.add(str(uuid.uuid4()))
+
+        false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+    def test_max_bytes_clamps_the_bit_array(self):
+        bloom = BloomFilter(capacity=1000000, error_rate=0.001, max_bytes=1024)
+        self.assertEqual(bloom.size_bytes, 1024)
+        bloom.add("a")
+        self.assertIn("a", bloom)
+
+    def test_clear(self):
+        bloom = BloomFilter(capacity=10)
+        bloom.add("a")
+        bloom.clear()
+        self.assertNotIn("a", bloom)
+        self.assertEqual(bloom.count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
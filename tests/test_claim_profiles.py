@@ -0,0 +1,85 @@
+import unittest
+
+from flask_jwt_extended import create_access_token, decode_token
+
+from src.models import User
+from src.utils import (
+    CLAIM_PROFILES, TokenBudgetExceeded, claim_profiles, db, expand_claims, token_epochs
+)
+
+from tests.app_factory import make_app
+
+
+class ExpandClaimsTest(unittest.TestCase):
+
+    def test_profiles_expand_to_the_same_claims(self):
+        for type_of_user in ("admin", "ceo", "normal", "Admin", None):
+            for token_epoch in (0, 7):
+                with self.subTest(type_of_user=type_of_user, token_epoch=token_epoch):
+                    full = CLAIM_PROFILES['full'].build(type_of_user=type_of_user, token_epoch=token_epoch)
+                    compact = CLAIM_PROFILES['compact'].build(type_of_user=type_of_user, token_epoch=token_epoch)
+                    self.assertEqual(expand_claims(compact), expand_claims(full))
+                    self.assertEqual(expand_claims(compact)["token_epoch"], token_epoch)
+
+    def test_compact_profile_leaves_defaults_out(self):
+        self.assertEqual(CLAIM_PROFILES['compact'].build(type_of_user="normal"), {"rl": 0, "ut": "normal"})
+        self.assertEqual(CLAIM_PROFILES['compact'].build(type_of_user="admin", token_epoch=2), {"rl": 1, "te": 2})
+
+
+class ClaimProfileManagerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        with cls.app.app_context():
+            user = User(email="compact@example.com", username="compact", firstname="C", lastname="P",
+                        password_hash="x", confirmed=True, type_of_user="admin")
+            db.session.add(user)
+            db.session.commit()
+            cls.user_id = user.id
+            token_epochs.bump(user.id)
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        saved = (claim_profiles.profile, claim_profiles.max_token_bytes, self.app.config['JWT_ENCODE_NBF'])
+        self.addCleanup(self.restore, *saved)
+
+    def restore(self, profile, max_token_bytes, encode_nbf):
+        claim_profiles.profile = profile
+        claim_profiles.max_token_bytes = max_token_bytes
+        self.app.config['JWT_ENCODE_NBF'] = encode_nbf
+
+    def mint(self, name):
+        profile = CLAIM_PROFILES[name]
+        claim_profiles.profile = profile
+        self.app.config['JWT_ENCODE_NBF'] = profile.encode_nbf
+        return create_access_token(identity=db.session.get(User, self.user_id))
+
+    def test_compact_token_round_trips_within_the_budget(self):
+        compact = self.mint('compact')
+        claim_profiles.max_token_bytes = len(compact)
+
+        self.assertEqual(len(self.mint('compact')), len(compact))
+        claims = expand_claims(decode_token(compact))
+        self.assertEqual(claims, {"type_of_user": "admin", "is_administrator": True,
+                                  "is_ceo_user": False, "token_epoch": 1})
+        with self.assertRaises(TokenBudgetExceeded):
+            self.mint('full')
+
+    def test_size_report(self):
+        rows = {row["profile"]: row for row in claim_profiles.size_report(self.app)}
+
+        self.assertLess(rows["compact"]["token_bytes"], rows["full"]["token_bytes"])
+        self.assertEqual(rows["full"]["saved_per_request"], 0)
+        self.assertGreater(rows["compact"]["saved_per_request"], 0)
+
+    def test_size_report_command(self):
+        result = self.app.test_cli_runner().invoke(args=["jwt-size-report"])
+
+        self.assertEqual([line.split()[0] for line in result.output.splitlines()], list(CLAIM_PROFILES))
+
+
+if __name__ == "__main__":
+    unittest.main()
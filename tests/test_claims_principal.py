@@ -0,0 +1,68 @@
+import unittest
+
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+
+from src.models import User
+from src.utils import ClaimsPrincipal, db, user_cache
+
+from tests.app_factory import make_app
+
+
+class ClaimsPrincipalTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        with cls.app.app_context():
+            user = User(email="principal@example.com", username="principal", firstname="Claire", lastname="Ims",
+                        password_hash="x", confirmed=True, type_of_user="admin")
+            db.session.add(user)
+            db.session.commit()
+            cls.user_id = user.id
+            cls.claims = decode_token(create_access_token(identity=user))
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        user_cache.clear()
+
+        self.queries = 0
+
+        def count(*args):
+            self.queries += 1
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        self.addCleanup(event.remove, db.engine, "before_cursor_execute", count)
+
+    def test_claims_are_read_without_a_query(self):
+        principal = ClaimsPrincipal(self.claims)
+
+        self.assertEqual(principal.id, self.user_id)
+        self.assertEqual(principal.type_of_user, "admin")
+        self.assertTrue(principal.is_administrator)
+        self.assertFalse(principal.is_ceo_user)
+        self.assertEqual(self.queries, 0)
+
+    def test_snapshot_fields_load_the_user_once(self):
+        principal = ClaimsPrincipal(self.claims)
+
+        self.assertEqual(principal.email, "principal@example.com")
+        self.assertEqual(principal.full_name, "Claire Ims")
+        self.assertEqual(self.queries, 1)
+
+    def test_orm_attributes_load_the_model(self):
+        principal = ClaimsPrincipal(self.claims)
+
+        self.assertEqual(principal.password_hash, "x")
+        self.assertEqual(self.queries, 1)
+
+    def test_private_attributes_are_not_forwarded(self):
+        with self.assertRaises(AttributeError):
+            ClaimsPrincipal(self.claims)._sa_instance_state
+        self.assertEqual(self.queries, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
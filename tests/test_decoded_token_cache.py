@@ -0,0 +1,51 @@
+import unittest
+
+from flask_jwt_extended import create_access_token
+
+from src.models import User
+from src.utils import db, decoded_token_cache, token_epochs
+
+from tests.app_factory import make_app
+
+
+class DecodedTokenCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+
+    def make_token(self, email):
+        with self.app.app_context():
+            user = User(email=email, username=email, firstname="D", lastname="C",
+                        password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add(user)
+            db.session.commit()
+            return user.id, create_access_token(identity=user)
+
+    def get_protected(self, token):
+        return self.client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+    def test_revoked_token_is_rejected_after_being_cached(self):
+        _, token = self.make_token("cached-revoked@example.com")
+        self.assertEqual(self.get_protected(token).status_code, 200)
+        self.assertIsNotNone(decoded_token_cache.get(decoded_token_cache.key(token)))
+
+        response = self.client.get("/api/v1/auth/logout", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertIsNone(decoded_token_cache.get(decoded_token_cache.key(token)))
+        self.assertEqual(self.get_protected(token).status_code, 401)
+
+    def test_epoch_bump_rejects_a_cached_token(self):
+        user_id, token = self.make_token("cached-bumped@example.com")
+        self.assertEqual(self.get_protected(token).status_code, 200)
+
+        with self.app.app_context():
+            token_epochs.bump(user_id)
+
+        self.assertEqual(self.get_protected(token).status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
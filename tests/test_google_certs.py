@@ -0,0 +1,179 @@
+import datetime
+import importlib
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from flask import Flask
+from google.auth import crypt, jwt
+
+from src.utils import GoogleCertCache
+
+from tests.app_factory import make_app
+
+google_certs_module = importlib.import_module("src.utils.google_certs")
+
+CLIENT_ID = "client-id.apps.googleusercontent.com"
+
+
+def make_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "google-certs-test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(1).not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1)).sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption())
+    return private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+KEYS = {"k1": make_key(), "k2": make_key()}
+
+
+def id_token(kid, audience=CLIENT_ID):
+    now = int(time.time())
+    signer = crypt.RSASigner.from_string(KEYS[kid][0], key_id=kid)
+    return jwt.encode(signer, {"iss": "https://accounts.google.com", "aud": audience, "sub": "1",
+                               "iat": now, "exp": now + 600}).decode()
+
+
+class CertsHandler(BaseHTTPRequestHandler):
+    kids = ("k1",)
+    max_age = 300
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        body = json.dumps({kid: KEYS[kid][1] for kid in self.kids}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", f"public, max-age={self.max_age}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+
+class GoogleCertCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), CertsHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        CertsHandler.kids, CertsHandler.max_age, CertsHandler.requests = ("k1",), 300, 0
+        self.clock = Clock()
+        patcher = mock.patch.object(google_certs_module, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = Flask(__name__)
+        app.config.update(
+            GOOGLE_CERTS_URL=f"http://127.0.0.1:{self.server.server_port}/certs",
+            GOOGLE_CERTS_REFRESH_MARGIN=60,
+            GOOGLE_CERTS_MIN_REFRESH_INTERVAL=30,
+            GOOGLE_CLIENT_CONFIG_FILE="/nonexistent/credentials.json",
+            GOOGLE_CLIENT_ID=CLIENT_ID,
+        )
+        self.certs = GoogleCertCache()
+        self.certs.init_app(app)
+
+    def wait_for_refresh(self):
+        deadline = time.monotonic() + 5
+        while self.certs._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_certificates_are_reused_until_max_age(self):
+        token = id_token("k1")
+        for _ in range(3):
+            self.assertEqual(self.certs.verify(token)["sub"], "1")
+        self.assertEqual(CertsHandler.requests, 1)
+
+        self.clock.now += 301
+        self.certs.verify(token)
+        self.assertEqual(CertsHandler.requests, 2)
+        self.assertEqual(self.certs.stats()["background_refreshes"], 0)
+
+    def test_refresh_in_background_before_expiry(self):
+        token = id_token("k1")
+        self.certs.verify(token)
+
+        self.clock.now += 250
+        self.certs.verify(token)
+        self.wait_for_refresh()
+
+        stats = self.certs.stats()
+        self.assertEqual((CertsHandler.requests, stats["background_refreshes"], stats["fetches"]), (2, 1, 2))
+        self.assertEqual(stats["expires_in"], 300)
+
+    def test_unknown_kid_refreshes_once_per_interval(self):
+        self.certs.verify(id_token("k1"))
+        CertsHandler.kids = ("k1", "k2")
+
+        with self.assertRaises(ValueError):
+            self.certs.verify(id_token("k2"))
+        self.assertEqual(CertsHandler.requests, 1)
+
+        self.clock.now += 31
+        self.assertEqual(self.certs.verify(id_token("k2"))["sub"], "1")
+        self.assertEqual(CertsHandler.requests, 2)
+
+    def test_other_audience_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.certs.verify(id_token("k1", audience="someone-else"))
+
+
+class GoogleClientIdTest(unittest.TestCase):
+
+    def client_id(self, **config):
+        app = Flask(__name__)
+        app.config.update(GOOGLE_CLIENT_CONFIG_FILE="/nonexistent/credentials.json", **config)
+        certs = GoogleCertCache()
+        certs.init_app(app)
+        return certs
+
+    def test_placeholder_is_not_configured(self):
+        for config in ({}, {"GOOGLE_CLIENT_ID": "12345"}, {"GOOGLE_CLIENT_ID": ""}):
+            with self.subTest(config=config):
+                certs = self.client_id(**config)
+                self.assertIsNone(certs.client_id)
+                with self.assertRaises(ValueError):
+                    certs.verify(id_token("k1"))
+
+    def test_unconfigured_sign_in_answers_503(self):
+        client = make_app().test_client()
+        self.assertEqual(client.get("/api/v1/auth2/login").status_code, 503)
+        self.assertEqual(client.post("/api/v1/auth2/google/signin", data={"id_token": id_token("k1")}).status_code, 503)
+
+    def test_configured_client_id(self):
+        self.assertEqual(self.client_id(GOOGLE_CLIENT_ID=CLIENT_ID).client_id, CLIENT_ID)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+
+import jwt
+from flask import Flask
+
+from src.utils import JwtKeyRing
+
+
+class JwtKeyRingTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.app = Flask(__name__)
+        self.app.config.update(JWT_ALGORITHM="EdDSA", JWT_KEY_DIR=directory.name)
+        self.keys = JwtKeyRing()
+        self.keys.init_app(self.app)
+
+    def sign(self):
+        key = self.keys.signing_key
+        return jwt.encode({"sub": "1"}, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def verify(self, token):
+        kid = jwt.get_unverified_header(token)["kid"]
+        return jwt.decode(token, self.keys.verification_key(kid), algorithms=self.keys.decode_algorithms)
+
+    def test_jwks_publishes_the_public_keys(self):
+        jwks = self.keys.jwks()
+
+        self.assertEqual([jwk["kid"] for jwk in jwks["keys"]], [self.keys.signing_key.kid])
+        jwk = jwks["keys"][0]
+        self.assertEqual((jwk["kty"], jwk["alg"], jwk["use"]), ("OKP", "EdDSA", "sig"))
+        self.assertNotIn("d", jwk)
+
+    def test_rotation_keeps_old_tokens_verifiable(self):
+        old_kid = self.keys.signing_key.kid
+        old_token = self.sign()
+
+        new_kid = self.keys.generate().kid
+        new_token = self.sign()
+
+        self.assertNotEqual(new_kid, old_kid)
+        self.assertEqual(self.keys.signing_key.kid, new_kid)
+        self.assertEqual(jwt.get_unverified_header(new_token)["kid"], new_kid)
+        self.assertEqual(self.verify(old_token)["sub"], "1")
+        self.assertEqual({jwk["kid"] for jwk in self.keys.jwks()["keys"]}, {old_kid, new_kid})
+
+    def test_retired_key_verifies_but_no_longer_signs(self):
+        old_kid = self.keys.signing_key.kid
+        old_token = self.sign()
+        self.keys.generate()
+
+        self.keys.retire(old_kid)
+
+        self.assertIn(old_kid, self.keys.stats()["kids"])
+        self.assertNotEqual(self.keys.signing_key.kid, old_kid)
+        self.assertEqual(self.verify(old_token)["sub"], "1")
+
+    def test_unknown_kid_has_no_verification_key(self):
+        self.assertIsNone(self.keys.verification_key("missing"))
+
+    def test_cli_rotates_and_retires(self):
+        runner = self.app.test_cli_runner()
+        old_kid = self.keys.signing_key.kid
+
+        result = runner.invoke(args=["rotate-jwt-key"])
+        new_kid = result.output.strip()
+        self.assertEqual(self.keys.signing_key.kid, new_kid)
+
+        result = runner.invoke(args=["retire-jwt-key", old_kid])
+        self.assertEqual(result.output, f"{old_kid} retired\n")
+        self.assertEqual(self.keys.stats()["kids"], sorted([old_kid, new_kid]))
+
+
+if __name__ == "__main__":
+    unittest.main()
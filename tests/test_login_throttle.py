@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from src.utils import LoginThrottle, LoginThrottled, MemoryThrottleStore
+
+
+class LoginThrottleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("src.utils.login_throttle.time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.throttle = LoginThrottle(store=MemoryThrottleStore())
+        self.throttle.account_attempts = 3
+        self.throttle.ip_attempts = 10
+        self.throttle.base_delay = 2
+
+    def fail(self, times, username="alice", ip="10.0.0.1"):
+        for _ in range(times):
+            self.throttle.failure(username, ip)
+
+    def test_account_locks_after_the_free_attempts(self):
+        self.fail(3)
+        self.throttle.check("alice", "10.0.0.1")
+
+        self.fail(1)
+        with self.assertRaises(LoginThrottled) as raised:
+            self.throttle.check("ALICE ", "10.0.0.2")
+        self.assertEqual(raised.exception.code, 429)
+        self.assertEqual(raised.exception.retry_after, 3)
+
+        self.throttle.check("bob", "10.0.0.1")
+
+    def test_lock_doubles_with_every_further_failure(self):
+        self.fail(5)
+
+        self.now += 3
+        with self.assertRaises(LoginThrottled):
+            self.throttle.check("alice", "10.0.0.1")
+        self.now += 1
+        self.throttle.check("alice", "10.0.0.1")
+
+    def test_success_resets_the_account(self):
+        self.fail(4)
+
+        self.throttle.success("alice", "10.0.0.1")
+
+        self.throttle.check("alice", "10.0.0.1")
+        self.fail(3)
+        self.throttle.check("alice", "10.0.0.1")
+
+    def test_address_locks_across_usernames(self):
+        for i in range(11):
+            self.throttle.failure(f"user-{i}", "10.0.0.9")
+
+        with self.assertRaises(LoginThrottled):
+            self.throttle.check("someone-else", "10.0.0.9")
+        self.assertEqual(self.throttle.stats()["rejected_ip"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
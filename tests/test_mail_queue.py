@@ -0,0 +1,69 @@
+import threading
+import unittest
+
+from flask import Flask
+
+from src.utils import MailQueue, RedisCooldown
+
+from tests.fake_redis import FakeRedis
+
+
+def make_queue(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    mail_queue = MailQueue()
+    mail_queue.init_app(app)
+    return mail_queue
+
+
+def fail():
+    raise RuntimeError("SMTP is down")
+
+
+class MailQueueCooldownTest(unittest.TestCase):
+
+    def test_resend_is_suppressed(self):
+        mail_queue = make_queue(MAIL_QUEUE_ENABLED=False)
+        sent = []
+
+        self.assertEqual(mail_queue.submit(lambda: sent.append(1), cooldown_key="a", cooldown=60), MailQueue.QUEUED)
+        self.assertEqual(mail_queue.submit(lambda: sent.append(2), cooldown_key="a", cooldown=60), MailQueue.COOLDOWN)
+        self.assertEqual(sent, [1])
+
+    def test_failed_job_releases_the_cooldown(self):
+        mail_queue = make_queue(MAIL_QUEUE_ENABLED=False)
+
+        mail_queue.submit(fail, cooldown_key="a", cooldown=60)
+
+        self.assertEqual(mail_queue.submit(lambda: None, cooldown_key="a", cooldown=60), MailQueue.QUEUED)
+        self.assertEqual(mail_queue.stats()["failed"], 1)
+
+    def test_full_queue_releases_the_cooldown(self):
+        mail_queue = make_queue(MAIL_QUEUE_SIZE=1)
+        started, unblock = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            unblock.wait(5)
+
+        mail_queue.submit(block)
+        started.wait(5)
+        mail_queue.submit(lambda: None)
+        try:
+            self.assertEqual(mail_queue.submit(lambda: None, cooldown_key="a", cooldown=60), MailQueue.FULL)
+            self.assertTrue(mail_queue.cooldown.acquire("a", 60))
+        finally:
+            unblock.set()
+            mail_queue.join()
+
+    def test_redis_cooldown_release(self):
+        cooldown = RedisCooldown(FakeRedis())
+
+        self.assertTrue(cooldown.acquire("a", 60))
+        self.assertFalse(cooldown.acquire("a", 60))
+        cooldown.release("a")
+        self.assertTrue(cooldown.acquire("a", 60))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from src.utils.password_hasher import PasswordHasher, PasswordHasherBusy, default_start_method
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cheap enough to keep the tests fast
+METHOD = "pbkdf2:sha256:1000"
+# Long enough to outlive a short timeout
+SLOW_METHOD = "pbkdf2:sha256:2000000"
+
+SCRIPT = f'''
+import sys
+sys.path.insert(0, {ROOT!r})
+from src.utils.password_hasher import PasswordHasher
+
+if __name__ == "__main__":
+    hasher = PasswordHasher(workers=1)
+    pwhash = hasher.hash("Secret#123", method={METHOD!r})
+    print(hasher.verify(pwhash, "Secret#123"), hasher.stats()["hashes"])
+    hasher.shutdown()
+'''
+
+
+class PasswordHasherTest(unittest.TestCase):
+
+    def test_pool_never_forks(self):
+        self.assertIn(default_start_method(), ("forkserver", "spawn"))
+
+    def test_hash_and_verify_on_pool_while_threads_run(self):
+        hasher = PasswordHasher(workers=1, max_queue=4)
+        self.addCleanup(hasher.shutdown)
+        # A thread holding a lock while the pool starts must not matter.
+        lock = threading.Lock()
+        lock.acquire()
+        holder = threading.Thread(target=lock.acquire, daemon=True)
+        holder.start()
+
+        pwhash = hasher.hash("Secret#123", method=METHOD)
+
+        self.assertTrue(pwhash.startswith("pbkdf2:sha256:1000$"))
+        self.assertTrue(hasher.verify(pwhash, "Secret#123"))
+        self.assertFalse(hasher.verify(pwhash, "wrong"))
+        stats = hasher.stats()
+        self.assertEqual((stats["hashes"], stats["verifies"]), (1, 2))
+        lock.release()
+
+    def test_timed_out_call_keeps_its_slot_until_the_worker_is_done(self):
+        hasher = PasswordHasher(workers=1, max_queue=0)
+        self.addCleanup(hasher.shutdown)
+        hasher.hash("warm-up", method=METHOD)
+        hasher.timeout = 0.05
+
+        with self.assertRaises(PasswordHasherBusy):
+            hasher.hash("slow", method=SLOW_METHOD)
+        self.assertEqual(hasher.stats()["in_flight"], 1)
+        with self.assertRaises(PasswordHasherBusy):
+            hasher.hash("rejected", method=METHOD)
+
+        deadline = time.monotonic() + 30
+        while hasher.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stats = hasher.stats()
+        self.assertEqual((stats["in_flight"], stats["timeouts"], stats["rejected"]), (0, 1, 1))
+        hasher.timeout = 10
+        self.assertTrue(hasher.hash("again", method=METHOD))
+
+    def test_guarded_script_hashes_on_the_pool(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as script:
+            script.write(SCRIPT)
+        self.addCleanup(os.remove, script.name)
+
+        result = subprocess.run([sys.executable, script.name], capture_output=True, text=True, timeout=120)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split()[-2:], ["True", "1"])
+
+    def test_inline_hashing_without_workers(self):
+        hasher = PasswordHasher(workers=0)
+
+        self.assertTrue(hasher.verify(hasher.hash("pw", method=METHOD), "pw"))
+
+
+if __name__ == "__main__":
+    unittest.main()
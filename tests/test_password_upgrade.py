@@ -0,0 +1,59 @@
+import unittest
+
+from src.models import User, upgrade_password_hash
+from src.utils import db, password_hasher
+
+from tests.app_factory import make_app
+
+OLD_METHOD = "pbkdf2:sha256:1000"
+
+
+class PasswordUpgradeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+
+    def make_user(self, email, password):
+        with self.app.app_context():
+            user = User(email=email, username=email, firstname="P", lastname="U", confirmed=True,
+                        type_of_user="normal", password_hash=password_hasher.hash(password, OLD_METHOD))
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+    def stored_hash(self, user_id):
+        with self.app.app_context():
+            return db.session.get(User, user_id).password_hash
+
+    def test_check_password_only_verifies(self):
+        user_id = self.make_user("verify-only@example.com", "Secret#123")
+        with self.app.app_context():
+            credentials = User.get_credentials("verify-only@example.com")
+            self.assertTrue(credentials.check_password("Secret#123"))
+            self.assertTrue(db.session.get(User, user_id).check_password("Secret#123"))
+        self.assertTrue(self.stored_hash(user_id).startswith(OLD_METHOD))
+
+    def test_upgrade_saves_a_hash_longer_than_128(self):
+        user_id = self.make_user("upgrade@example.com", "Secret#123")
+        with self.app.app_context():
+            credentials = User.get_credentials("upgrade@example.com")
+            upgrade_password_hash(credentials, "Secret#123")
+            self.assertFalse(password_hasher.needs_rehash(credentials.password_hash))
+
+        stored = self.stored_hash(user_id)
+        self.assertEqual(stored, credentials.password_hash)
+        self.assertGreater(len(stored), 128)
+        self.assertLessEqual(len(stored), User.password_hash.type.length)
+
+    def test_login_upgrades_the_hash(self):
+        user_id = self.make_user("login-upgrade@example.com", "Secret#123")
+        response = self.client.post("/api/v1/auth/login",
+                                    json={"username": "login-upgrade@example.com", "password": "Secret#123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(password_hasher.needs_rehash(self.stored_hash(user_id)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from flask_jwt_extended import create_access_token, create_refresh_token
+
+from src.models import User
+from src.utils import db
+
+from tests.app_factory import make_app
+
+
+def cookie_value(response, name):
+    for cookie in response.headers.getlist("Set-Cookie"):
+        if cookie.startswith(f"{name}="):
+            return cookie.split(";", 1)[0].split("=", 1)[1]
+    return None
+
+
+class RefreshRotationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+
+    def make_user(self, email):
+        with self.app.app_context():
+            user = User(email=email, username=email, firstname="R", lastname="F",
+                        password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add(user)
+            db.session.commit()
+            return create_access_token(identity=user), create_refresh_token(identity=user)
+
+    def refresh(self, token):
+        return self.client.post("/api/v1/auth/refresh", headers={"Authorization": f"Bearer {token}"})
+
+    def test_refresh_returns_a_new_pair(self):
+        _, refresh_token = self.make_user("rotate@example.com")
+
+        response = self.refresh(refresh_token)
+
+        self.assertEqual(response.status_code, 200)
+        new_refresh = cookie_value(response, "refresh_token_cookie")
+        self.assertIsNotNone(cookie_value(response, "access_token_cookie"))
+        self.assertIsNotNone(new_refresh)
+        self.assertNotEqual(new_refresh, refresh_token)
+        self.assertEqual(self.refresh(new_refresh).status_code, 200)
+
+    def test_replayed_refresh_token_is_rejected(self):
+        _, refresh_token = self.make_user("replay@example.com")
+        self.assertEqual(self.refresh(refresh_token).status_code, 200)
+
+        self.assertEqual(self.refresh(refresh_token).status_code, 401)
+
+    def test_refresh_after_logout_everywhere_is_rejected(self):
+        access_token, refresh_token = self.make_user("everywhere@example.com")
+        response = self.client.post("/api/v1/auth/logout-everywhere",
+                                    headers={"Authorization": f"Bearer {access_token}"})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.refresh(refresh_token).status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
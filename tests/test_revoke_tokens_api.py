@@ -0,0 +1,62 @@
+import unittest
+import uuid
+
+from flask_jwt_extended import create_access_token
+
+from src.models import User, TokenBlocklist
+from src.utils import db
+
+from tests.app_factory import make_app
+
+
+class RevokeTokensApiTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+        with cls.app.app_context():
+            admin = User(email="revoker@example.com", username="revoker", firstname="R", lastname="A",
+                         password_hash="x", confirmed=True, type_of_user="admin")
+            owner = User(email="owner@example.com", username="owner", firstname="O", lastname="W",
+                         password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add_all([admin, owner])
+            db.session.commit()
+            cls.admin_id, cls.owner_id = admin.id, owner.id
+            cls.headers = {"Authorization": f"Bearer {create_access_token(identity=admin)}"}
+
+    def revoke(self, jtis):
+        return self.client.post("/api/v1/admin/revoke-tokens", json={"jtis": jtis}, headers=self.headers)
+
+    def test_rows_belong_to_the_token_owner(self):
+        owned, unowned = str(uuid.uuid4()), str(uuid.uuid4())
+        response = self.revoke([{"jti": owned, "user_id": self.owner_id, "type": "refresh"}, unowned])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json["revoked"], response.json["already_revoked"]), (2, 0))
+        with self.app.app_context():
+            rows = {row.jti: row for row in TokenBlocklist.query.filter(TokenBlocklist.jti.in_([owned, unowned]))}
+        self.assertEqual((rows[owned].user_id, rows[owned].type), (self.owner_id, "refresh"))
+        self.assertIsNone(rows[unowned].user_id)
+
+    def test_repeated_jtis_are_already_revoked(self):
+        jti = str(uuid.uuid4())
+        self.revoke([jti])
+        response = self.revoke([jti])
+        self.assertEqual((response.json["revoked"], response.json["already_revoked"]), (0, 1))
+
+    def test_unknown_type_is_rejected(self):
+        jti = str(uuid.uuid4())
+        response = self.revoke([{"jti": jti, "type": "id"}])
+        self.assertEqual(response.status_code, 400)
+        with self.app.app_context():
+            self.assertIsNone(TokenBlocklist.query.filter_by(jti=jti).one_or_none())
+
+    def test_unknown_user_is_rejected(self):
+        response = self.revoke([{"jti": str(uuid.uuid4()), "user_id": 987654}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["unknown_users"], [987654])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from src.models import User
+from src.utils import db, password_hasher
+
+from tests.app_factory import make_app
+
+PASSWORD = "Secret#123"
+
+
+class RouteLoginTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+        with cls.app.app_context():
+            db.session.add(User(email="Route.Login@example.com", username="route_login", firstname="R", lastname="L",
+                                password_hash=password_hasher.hash(PASSWORD), confirmed=True, type_of_user="normal"))
+            db.session.commit()
+
+    def test_username_email_or_email_field(self):
+        for path in ("/login_without_cookies", "/login-w-cookies"):
+            for body in ({"username": "route_login"}, {"username": "route.login@example.com"},
+                         {"email": "ROUTE.LOGIN@example.com"}):
+                with self.subTest(path=path, body=body):
+                    response = self.client.post(path, json=dict(body, password=PASSWORD))
+                    self.assertEqual(response.status_code, 200)
+
+    def test_wrong_password(self):
+        response = self.client.post("/login-w-cookies", json={"username": "route_login", "password": "nope"})
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from src.utils.shared_revocation_set import SharedRevocationSet
+
+MODULE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "src", "utils", "shared_revocation_set.py")
+
+# Loads only the module file, so the child does not import the application
+CHILD = """
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("shared_revocation_set", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+shared = module.SharedRevocationSet(sys.argv[2], slots=64)
+if sys.argv[3] == "add":
+    sys.exit(0 if shared.add(sys.argv[4], float(sys.argv[5])) else 1)
+sys.exit(0 if shared.contains(sys.argv[4]) else 3)
+"""
+
+
+class SharedRevocationSetTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "revoked_jtis.bin")
+        self.shared = SharedRevocationSet(self.path, slots=64)
+        self.addCleanup(self.shared.close)
+
+    def child(self, *args):
+        return subprocess.run([sys.executable, "-c", CHILD, MODULE, self.path, *map(str, args)]).returncode
+
+    def test_other_process_sees_a_revocation(self):
+        self.assertTrue(self.shared.add("revoked-here", time.time() + 60))
+        self.assertEqual(self.child("contains", "revoked-here"), 0)
+        self.assertEqual(self.child("contains", "never-revoked"), 3)
+
+    def test_revocation_from_another_process_is_visible_without_reopening(self):
+        self.assertFalse(self.shared.contains("revoked-there"))
+        self.assertEqual(self.child("add", "revoked-there", time.time() + 60), 0)
+        self.assertTrue(self.shared.contains("revoked-there"))
+
+    def test_expired_entries_are_not_reported_and_slots_are_reused(self):
+        self.shared.add_many([(f"old-{i}", time.time() - 1) for i in range(64)])
+        self.assertFalse(self.shared.contains("old-0"))
+
+        self.assertTrue(self.shared.add("new", time.time() + 60))
+        self.assertTrue(self.shared.contains("new"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import time
+import unittest
+import uuid
+
+from src.models import User, canonical_jti
+from src.utils import db
+from src.utils.blocklist_backends import SqlBlocklistBackend
+
+from tests.app_factory import make_app
+
+
+class CanonicalJtiTest(unittest.TestCase):
+
+    def test_uuid_is_normalised(self):
+        jti = uuid.uuid4()
+        self.assertEqual(canonical_jti(str(jti).upper()), str(jti))
+        self.assertEqual(canonical_jti(jti.hex), str(jti))
+
+    def test_other_strings_are_rejected(self):
+        for jti in ("not-a-uuid", "", None, 42):
+            with self.assertRaises(ValueError):
+                canonical_jti(jti)
+
+
+class SqlBlocklistBackendTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        with cls.app.app_context():
+            user = User(email="blocklist@example.com", username="blocklist", firstname="B", lastname="L",
+                        password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add(user)
+            db.session.commit()
+            cls.user_id = user.id
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        self.backend = SqlBlocklistBackend()
+
+    def tearDown(self):
+        db.session.rollback()
+        self.context.pop()
+
+    def test_jti_reads_back_as_written(self):
+        jti = str(uuid.uuid4())
+        self.backend.revoke(jti=jti, token_type="access", user_id=self.user_id, expires_at=time.time() + 60)
+
+        self.assertIn(jti, self.backend.load_since()[0])
+        self.assertTrue(self.backend.is_revoked(jti.upper()))
+
+    def test_non_uuid_jti_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.backend.revoke(jti="not-a-uuid", token_type="access", user_id=None)
+        self.assertFalse(self.backend.is_revoked("not-a-uuid"))
+
+    def test_revoke_many_skips_existing_rows(self):
+        jtis = [str(uuid.uuid4()) for _ in range(3)]
+        records = [{"jti": jti, "token_type": "access", "user_id": self.user_id, "expires_at": None} for jti in jtis]
+
+        self.assertEqual(self.backend.revoke_many(records[:1]), jtis[:1])
+        self.assertEqual(self.backend.revoke_many(records), jtis[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
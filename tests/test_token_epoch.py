@@ -0,0 +1,64 @@
+import unittest
+
+from flask_jwt_extended import create_access_token, decode_token
+
+from src.models import User
+from src.utils import db, token_epochs
+
+from tests.app_factory import make_app
+
+
+class TokenEpochStoreTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+
+    def make_user(self, email):
+        with self.app.app_context():
+            user = User(email=email, username=email, firstname="E", lastname="P",
+                        password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+    def mint(self, user_id):
+        with self.app.app_context():
+            return create_access_token(identity=db.session.get(User, user_id))
+
+    def get_protected(self, token):
+        return self.client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+    def test_bump_revokes_older_tokens(self):
+        user_id = self.make_user("bumped@example.com")
+        old = self.mint(user_id)
+        self.assertEqual(self.get_protected(old).status_code, 200)
+
+        with self.app.app_context():
+            self.assertEqual(token_epochs.bump(user_id), 1)
+            self.assertTrue(token_epochs.is_stale(decode_token(old)))
+        new = self.mint(user_id)
+
+        self.assertEqual(self.get_protected(old).status_code, 401)
+        self.assertEqual(self.get_protected(new).status_code, 200)
+
+    def test_bump_many(self):
+        user_ids = [self.make_user(f"many-{i}@example.com") for i in range(3)]
+        old = [self.mint(user_id) for user_id in user_ids]
+
+        with self.app.app_context():
+            epochs = token_epochs.bump_many(user_ids + [10 ** 9], chunk_size=2)
+
+        self.assertEqual(epochs, {user_id: 1 for user_id in user_ids})
+        for token in old:
+            self.assertEqual(self.get_protected(token).status_code, 401)
+
+    def test_unknown_user_is_not_stale(self):
+        with self.app.app_context():
+            self.assertIsNone(token_epochs.current(10 ** 9))
+            self.assertFalse(token_epochs.is_stale({"sub": str(10 ** 9), "token_epoch": 0}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from flask_jwt_extended import create_access_token
+
+from src.models import User
+from src.utils import db, token_blocklist
+
+from tests.app_factory import make_app
+
+
+class IntrospectTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+        with cls.app.app_context():
+            user = User(email="introspected@example.com", username="introspected", firstname="I", lastname="T",
+                        password_hash="x", confirmed=True, type_of_user="normal")
+            db.session.add(user)
+            db.session.commit()
+            cls.token = create_access_token(identity=user, expires_delta=timedelta(hours=2))
+            cls.expired = create_access_token(identity=user, expires_delta=timedelta(seconds=-60))
+
+    def setUp(self):
+        self.addCleanup(self.app.config.__setitem__, 'TOKEN_INTROSPECTION_KEY',
+                        self.app.config.get('TOKEN_INTROSPECTION_KEY'))
+        self.app.config['TOKEN_INTROSPECTION_KEY'] = "introspection-key"
+
+    def post(self, key="introspection-key", **kwargs):
+        return self.client.post("/api/v1/auth/introspect", headers={"X-Introspection-Key": key}, **kwargs)
+
+    def introspect(self, token):
+        return self.post(json={"token": token})
+
+    def test_active_answers_are_capped(self):
+        response = self.introspect(self.token)
+        self.assertTrue(response.json["active"])
+        self.assertEqual(response.headers["Cache-Control"], "private, max-age=60")
+
+    def test_definite_rejections_are_cacheable(self):
+        for token in (self.expired, self.token[:-4] + "AAAA", "not.a.token"):
+            response = self.introspect(token)
+            self.assertFalse(response.json["active"])
+            self.assertEqual(response.headers["Cache-Control"], "private, max-age=60")
+
+    def test_failed_checks_are_not_cached(self):
+        with mock.patch.object(token_blocklist, "is_revoked", side_effect=RuntimeError("database is down")):
+            response = self.post(json={"tokens": [self.expired, self.token]})
+        self.assertEqual([answer["active"] for answer in response.json["results"]], [False, False])
+        self.assertEqual(response.headers["Cache-Control"], "no-store")
+
+    def test_form_field_is_accepted(self):
+        self.assertTrue(self.post(data={"token": self.token}).json["active"])
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in ([self.token], "token", 42, {"token": 42}, {"token": ["x"]}, {"tokens": [self.token, 5]},
+                     {"tokens": self.token}, {}):
+            with self.subTest(body=body):
+                self.assertEqual(self.post(json=body).status_code, 400)
+
+    def test_wrong_key_is_rejected(self):
+        self.assertEqual(self.post(key="wrong", json={"token": self.token}).status_code, 401)
+
+    def test_unavailable_without_a_key(self):
+        self.app.config['TOKEN_INTROSPECTION_KEY'] = None
+
+        self.assertEqual(self.post(json={"token": self.token}).status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import importlib
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from flask_jwt_extended import create_access_token, decode_token
+
+from src.models import User
+from src.utils import db, get_role_flags, token_refresher
+
+from tests.app_factory import make_app
+
+# The package re-exports the instance under the module's name
+refresher_module = importlib.import_module("src.utils.token_refresher")
+
+
+def replacement_token(response):
+    for cookie in response.headers.getlist("Set-Cookie"):
+        if cookie.startswith("access_token_cookie="):
+            return cookie.split(";", 1)[0].split("=", 1)[1]
+    return None
+
+
+class ExpiringTokenRefresherTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.client = cls.app.test_client(use_cookies=False)
+
+    def make_user(self, email, type_of_user):
+        with self.app.app_context():
+            user = User(email=email, username=email, firstname="R", lastname="T",
+                        password_hash="x", confirmed=True, type_of_user=type_of_user)
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=user, expires_delta=timedelta(minutes=5))
+            return user.id, token
+
+    def test_replacement_reflects_role_change(self):
+        user_id, token = self.make_user("demoted@example.com", "admin")
+        with self.app.app_context():
+            self.assertTrue(get_role_flags(decode_token(token))["is_administrator"])
+            db.session.get(User, user_id).type_of_user = "normal"
+            db.session.commit()
+
+        response = self.client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+        replacement = replacement_token(response)
+        self.assertIsNotNone(replacement)
+        with self.app.app_context():
+            flags = get_role_flags(decode_token(replacement))
+        self.assertFalse(flags["is_administrator"])
+        self.assertEqual(flags["type_of_user"], "normal")
+
+    def test_deleted_user_gets_no_replacement(self):
+        user_id, token = self.make_user("deleted@example.com", "normal")
+        with self.app.app_context():
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
+
+        response = self.client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+        self.assertIsNone(replacement_token(response))
+
+    def test_same_token_gets_the_same_replacement(self):
+        _, token = self.make_user("repeat@example.com", "normal")
+
+        first = replacement_token(self.client.get("/protected", headers={"Authorization": f"Bearer {token}"}))
+        second = replacement_token(self.client.get("/protected", headers={"Authorization": f"Bearer {token}"}))
+
+        self.assertIsNotNone(first)
+        self.assertEqual(first, second)
+
+    def test_replacement_is_minted_outside_the_lock(self):
+        _, token = self.make_user("unlocked@example.com", "normal")
+        create_access_token_ = refresher_module.create_access_token
+
+        def checked_create_access_token(*args, **kwargs):
+            self.assertFalse(token_refresher._lock.locked())
+            return create_access_token_(*args, **kwargs)
+
+        with mock.patch.object(refresher_module, "create_access_token", checked_create_access_token):
+            response = self.client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+        self.assertIsNotNone(replacement_token(response))
+
+    def test_unauthenticated_request_is_left_alone(self):
+        response = self.client.get("/protected")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertIsNone(replacement_token(response))
+
+
+if __name__ == "__main__":
+    unittest.main()
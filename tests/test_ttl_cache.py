@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+from src.utils.ttl_cache import TTLCache
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("src.utils.ttl_cache.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_their_ttl(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("default", 1)
+        cache.set("short", 2, ttl=5)
+
+        self.now += 5
+        self.assertIsNone(cache.get("short"))
+        self.assertNotIn("short", cache)
+        self.assertEqual(cache.get("default"), 1)
+
+        self.now += 55
+        self.assertEqual(cache.get("default", "gone"), "gone")
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual([key for key in "abc" if key in cache], ["a", "c"])
+
+    def test_shrinking_trims_the_oldest_entries(self):
+        cache = TTLCache(maxsize=3, ttl=60)
+        for key in "abc":
+            cache.set(key, key)
+        cache.configure(maxsize=1)
+
+        self.assertEqual(len(cache), 1)
+        self.assertIn("c", cache)
+
+    def test_non_positive_ttl_is_not_stored(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1, ttl=0)
+        self.assertNotIn("a", cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from src.models import User
+from src.utils import UserSnapshot, db, user_cache
+
+from tests.app_factory import make_app
+
+
+class UserIdentityCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+
+    def setUp(self):
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        user_cache.clear()
+
+    def make_user(self, email):
+        user = User(email=email, username=email, firstname="Cache", lastname="User",
+                    password_hash="x", confirmed=True, type_of_user="normal")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+    def test_snapshot_is_cached(self):
+        user_id = self.make_user("cached@example.com")
+
+        snapshot = user_cache.get(user_id)
+
+        self.assertIsInstance(snapshot, UserSnapshot)
+        self.assertIs(user_cache.get(user_id), snapshot)
+        self.assertFalse(hasattr(snapshot, "password_hash"))
+
+    def test_update_invalidates_the_entry(self):
+        user_id = self.make_user("renamed@example.com")
+        self.assertEqual(user_cache.get(user_id).firstname, "Cache")
+
+        db.session.get(User, user_id).firstname = "Renamed"
+        db.session.commit()
+
+        self.assertEqual(user_cache.get(user_id).firstname, "Renamed")
+
+    def test_rolled_back_change_is_not_cached(self):
+        user_id = self.make_user("rolledback@example.com")
+        user_cache.get(user_id)
+
+        db.session.get(User, user_id).firstname = "Discarded"
+        db.session.flush()
+        db.session.rollback()
+
+        self.assertEqual(user_cache.get(user_id).firstname, "Cache")
+
+    def test_delete_invalidates_the_entry(self):
+        user_id = self.make_user("removed@example.com")
+        user_cache.get(user_id)
+
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+
+        self.assertIsNone(user_cache.get(user_id))
+
+
+if __name__ == "__main__":
+    unittest.main()